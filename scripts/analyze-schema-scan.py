@@ -2,7 +2,8 @@
 """
 Schema Scan Analyzer
 
-Reads the JSON report from database-schema-scanner.py and provides:
+Reads the JSON report from database-schema-scanner.py (format v1 or v2)
+and provides:
 1. Detailed analysis of mismatches
 2. Actionable recommendations
 3. Affected files and impact assessment
@@ -13,14 +14,17 @@ import json
 import sys
 from pathlib import Path
 from collections import defaultdict
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 
 class ScanAnalyzer:
     """Analyzes schema scan results"""
 
-    def __init__(self, report_path: str):
+    def __init__(self, report_path: Optional[str] = None, report: Optional[Dict[str, Any]] = None):
+        """Analyze a report file, or a report already in memory (no JSON round trip)"""
+        if report is None and report_path is None:
+            raise ValueError("Either report_path or report must be provided")
         self.report_path = report_path
-        self.report = self._load_report()
+        self.report = report if report is not None else self._load_report()
 
     def _load_report(self) -> Dict[str, Any]:
         """Load the JSON report"""
@@ -30,6 +34,19 @@ class ScanAnalyzer:
         with open(self.report_path, 'r') as f:
             return json.load(f)
 
+    @property
+    def format_version(self) -> int:
+        """Report format: 1 embeds full mismatches in every grouping, 2 stores indexes"""
+        return self.report.get('format_version', 1)
+
+    def get_mismatches_by(self, section: str) -> Dict[str, List[Dict]]:
+        """Get a mismatch grouping ('mismatches_by_type' or 'mismatches_by_file')"""
+        groups = self.report.get(section, {})
+        if self.format_version < 2:
+            return groups
+        mismatches = self.report.get('mismatches', [])
+        return {name: [mismatches[i] for i in indexes] for name, indexes in groups.items()}
+
     def get_mismatch_summary(self) -> Dict[str, Any]:
         """Get summary statistics"""
         return self.report.get('mismatch_summary', {})
@@ -38,7 +55,7 @@ class ScanAnalyzer:
         """Get affected files grouped by severity"""
         affected = defaultdict(list)
 
-        for file, mismatches in self.report.get('mismatches_by_file', {}).items():
+        for file, mismatches in self.get_mismatches_by('mismatches_by_file').items():
             critical_count = sum(1 for m in mismatches if m['severity'] == 'critical')
             total = len(mismatches)
 
@@ -59,7 +76,7 @@ class ScanAnalyzer:
         recommendations = []
 
         # Group by type
-        by_type = self.report.get('mismatches_by_type', {})
+        by_type = self.get_mismatches_by('mismatches_by_type')
 
         for mtype, mismatches in by_type.items():
             if not mismatches:
@@ -92,6 +109,12 @@ class ScanAnalyzer:
             'rpc_not_found': 'Implement missing RPC function in database or use table operations instead.',
             'schema_not_found': 'Use correct schema name. Check available schemas in database.types.ts',
             'property_possibly_not_found': 'Verify property is returned by query or add separate join/lookup.',
+            'n_plus_one_query': 'Batch per-item queries into one .in() filter or array RPC issued before the loop.',
+            'filter_on_unindexed_column': 'Add an index leading with the filtered column (after any equality-filtered columns), or filter on an indexed column.',
+            'wide_select_star': "Replace select('*') with the columns the caller reads.",
+            'unbounded_list_query': 'Paginate with .range() or cap with .limit(); use .single() for one-row lookups.',
+            'exact_count': "Switch count: 'exact' to 'planned' or 'estimated' where an approximate total is enough.",
+            'sequential_await_waterfall': 'Issue independent queries together with Promise.all instead of awaiting each in turn.',
         }
         return approaches.get(mtype, 'Review database schema and update code to match.')
 
@@ -106,20 +129,25 @@ class ScanAnalyzer:
         else:
             return 'Very High (4+ hours)'
 
-    def generate_analysis_report(self, output_path: str) -> None:
-        """Generate analysis report as JSON"""
-        analysis = {
+    def build_analysis(self) -> Dict[str, Any]:
+        """Build the analysis as an in-memory dict"""
+        return {
             'summary': self.get_mismatch_summary(),
             'affected_files': self.get_affected_files(),
             'recommendations': self.get_fix_recommendations(),
             'next_steps': self._get_next_steps()
         }
 
+    def generate_analysis_report(self, output_path: str) -> Dict[str, Any]:
+        """Generate analysis report as JSON, returning it for in-process use"""
+        analysis = self.build_analysis()
+
         Path(output_path).parent.mkdir(parents=True, exist_ok=True)
         with open(output_path, 'w') as f:
             json.dump(analysis, f, indent=2)
 
         print(f"✅ Analysis report generated: {output_path}")
+        return analysis
 
     def _get_next_steps(self) -> List[str]:
         """Get recommended next steps"""
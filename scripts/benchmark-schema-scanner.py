@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+Schema Scanner Benchmarks
+
+Measures the hot paths of database-schema-scanner.py against the naive
+implementations they replaced, on the real project tree:
+
+1. Match location lookup: per-file LineIndex vs counting newlines in the
+   file prefix for every match
+2. Full code scan: serial vs a process pool (--jobs)
+3. Property check: nested any() over every table column vs the parser's
+   precomputed column index
+
+Before timing anything, the detector regression cases below are scanned and
+checked, so a benchmark run never measures a scanner that got faster by
+finding less.
+
+Usage:
+    python3 scripts/benchmark-schema-scanner.py [--repeat N] [--jobs N]
+"""
+
+import argparse
+import importlib.util
+import os
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List, Tuple
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+PROJECT_ROOT = SCRIPT_DIR.parent
+DATABASE_TYPES = PROJECT_ROOT / 'lib' / 'types' / 'database.types.ts'
+FEATURES_DIR = PROJECT_ROOT / 'features'
+
+# Every pattern the scanner looks for, used to collect realistic match offsets
+SCANNER_PATTERN = re.compile(
+    r"\.from\s*\(|\.rpc\s*\(|\.schema\s*\(|row\.[a-z_]+|data\.[a-z_]+|result\.[a-z_]+"
+)
+# database.types.ts has no database calls; every property key is used instead
+# as a dense synthetic workload
+DENSE_PATTERN = re.compile(r"\w+\??:")
+
+
+# Detector regression cases: (name, file, source, expected waterfall lines
+# per first call line)
+WATERFALL_CASES = [
+    (
+        'results used only after the run',
+        'features/example/api/queries/stats.ts',
+        """export async function getStats() {
+  const supabase = await createClient()
+  const { data: a } = await supabase.from('x').select('id')
+  const { data: b } = await supabase
+    .from('y')
+    .select('id')
+  return [a, b]
+}
+""",
+        {3: [3, 5]},
+    ),
+    (
+        'second query filters on the first result',
+        'features/example/api/queries/stats.ts',
+        """export async function getStats() {
+  const supabase = await createClient()
+  const { data: a } = await supabase.from('x').select('id').single()
+  const { data: b } = await supabase.from('y').select('id').eq('x_id', a.id)
+  return [a, b]
+}
+""",
+        {},
+    ),
+    (
+        'result checked between the queries',
+        'app/(example)/page.tsx',
+        """export default async function Page() {
+  const { data: a, error } = await supabase.from('x').select('id')
+  if (error) throw error
+  if (!a) return null
+  const { data: b } = await supabase.from('y').select('id')
+  const { data: c } = await supabase.from('z').select('id')
+  return [a, b, c]
+}
+""",
+        {5: [5, 6]},
+    ),
+]
+# Loop classification: (name, source, expected concurrency, batched)
+LOOP_CASES = [
+    (
+        'unrelated .in() later in the loop body',
+        """for (const id of ids) {
+  const { data } = await supabase.from('x').select('id').eq('id', id)
+  const tags = await supabase.from('y').select('id').in('id', data.tags)
+}
+""",
+        'sequential',
+        False,
+    ),
+    (
+        'chunked .in() on the query itself',
+        """for (let i = 0; i < ids.length; i += 100) {
+  await supabase.from('x').select('id').in('id', ids.slice(i, i + 100))
+}
+""",
+        'sequential',
+        True,
+    ),
+    (
+        '.map() callback that is neither awaited nor fanned out',
+        """const queries = ids.map((id) => supabase.from('x').select('id').eq('id', id))
+""",
+        'unawaited',
+        False,
+    ),
+]
+
+# Select lists: (name, source, expected recorded columns, mismatch types
+# reported). A column list the scanner cannot read is None, never '*'
+SELECT_CASES = [
+    (
+        'column list from a constant',
+        """const { data } = await supabase.schema('analytics').from('admin_analytics_overview_mv')
+  .select(SELECTED_FIELDS).limit(10)
+""",
+        None,
+        [],
+    ),
+    (
+        'constant column list with count options',
+        """const { count } = await supabase.schema('analytics').from('admin_analytics_overview_mv')
+  .select(COLUMNS, { count: 'exact', head: true })
+""",
+        None,
+        ['exact_count'],
+    ),
+    (
+        'no arguments',
+        """const { data } = await supabase.schema('analytics').from('admin_analytics_overview_mv')
+  .select().limit(10)
+""",
+        '*',
+        ['wide_select_star'],
+    ),
+    (
+        'literal star',
+        """const { data } = await supabase.schema('analytics').from('admin_analytics_overview_mv')
+  .select('*').limit(10)
+""",
+        '*',
+        ['wide_select_star'],
+    ),
+]
+
+
+def check_detectors(scanner) -> None:
+    """Scan the regression cases and check what the detectors record"""
+    code_scanner = scanner.CodeScanner(str(PROJECT_ROOT))
+    for name, file_path, source, expected in WATERFALL_CASES:
+        matches = code_scanner._scan_content(str(PROJECT_ROOT / file_path), source)
+        found = {match.line: match.waterfall['lines'] for match in matches if match.waterfall}
+        assert found == expected, f"Waterfall case '{name}': expected {expected}, found {found}"
+    for name, source, concurrency, batched in LOOP_CASES:
+        matches = code_scanner._scan_content(str(PROJECT_ROOT / 'features/example/api/queries/data.ts'), source)
+        loop = next(match.loop for match in matches if match.type == 'from')
+        found = (loop['concurrency'], loop['batched'])
+        assert found == (concurrency, batched), \
+            f"Loop case '{name}': expected {(concurrency, batched)}, found {found}"
+    db_parser = scanner.DatabaseSchemaParser(str(DATABASE_TYPES))
+    db_parser.parse()
+    for name, source, columns, types in SELECT_CASES:
+        matches = code_scanner._scan_content(str(PROJECT_ROOT / 'features/example/api/queries/data.ts'), source)
+        query = next(match.query for match in matches if match.type == 'from')
+        mismatches = scanner.MismatchDetector(db_parser, matches).detect()
+        found = (query['select']['columns'], sorted(m.type for m in mismatches))
+        assert found == (columns, types), f"Select case '{name}': expected {(columns, types)}, found {found}"
+    total = len(WATERFALL_CASES) + len(LOOP_CASES) + len(SELECT_CASES)
+    print(f"\n✅ Detector regression cases: {total} passed")
+
+
+def load_scanner():
+    """Import database-schema-scanner.py (hyphenated, so not importable by name)"""
+    spec = importlib.util.spec_from_file_location(
+        'database_schema_scanner', SCRIPT_DIR / 'database-schema-scanner.py'
+    )
+    module = importlib.util.module_from_spec(spec)
+    # Registered so process pool workers can unpickle its functions
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def read_sources(paths: List[Path], pattern: re.Pattern) -> List[Tuple[str, List[int]]]:
+    """Read files and collect the offsets of every pattern match"""
+    sources = []
+    for path in paths:
+        content = path.read_text(encoding='utf-8')
+        sources.append((content, [m.start() for m in pattern.finditer(content)]))
+    return sources
+
+
+def find_ts_files(root: Path) -> List[Path]:
+    """Find all TypeScript/TSX files below a directory"""
+    files = []
+    for dirpath, dirs, filenames in os.walk(root):
+        dirs[:] = [d for d in dirs if d not in ['node_modules', '.next', '.git', 'dist']]
+        files.extend(Path(dirpath) / f for f in filenames if f.endswith(('.ts', '.tsx')))
+    return sorted(files)
+
+
+def best_of(repeat: int, func: Callable[[], object]) -> float:
+    """Run a function several times and return the fastest wall time"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def bench_line_lookup(scanner, label: str, sources: List[Tuple[str, List[int]]], repeat: int) -> None:
+    """Compare prefix newline counting with the shared LineIndex"""
+
+    def prefix_count():
+        for content, offsets in sources:
+            lines = content.split('\n')
+            for offset in offsets:
+                line_num = content[:offset].count('\n') + 1
+                lines[line_num - 1].strip()
+
+    def line_index():
+        for content, offsets in sources:
+            index = scanner.LineIndex(content)
+            for offset in offsets:
+                index.locate(offset)
+
+    # Both strategies must agree before their timings mean anything
+    for content, offsets in sources:
+        index = scanner.LineIndex(content)
+        for offset in offsets:
+            assert index.line_number(offset) == content[:offset].count('\n') + 1
+
+    total_lines = sum(content.count('\n') + 1 for content, _ in sources)
+    total_matches = sum(len(offsets) for _, offsets in sources)
+    naive = best_of(repeat, prefix_count)
+    indexed = best_of(repeat, line_index)
+
+    print(f"\n{label}")
+    print(f"   Files: {len(sources)}, lines: {total_lines}, matches: {total_matches}")
+    print(f"   Prefix count: {naive * 1000:9.2f} ms")
+    print(f"   LineIndex:    {indexed * 1000:9.2f} ms")
+    print(f"   Speedup:      {naive / indexed if indexed else float('inf'):9.1f}x")
+
+
+def bench_code_scan(scanner, jobs: int, repeat: int) -> None:
+    """Compare a serial scan of the project with a process pool scan"""
+    serial_matches = scanner.CodeScanner(str(PROJECT_ROOT)).scan()
+    parallel_matches = scanner.CodeScanner(str(PROJECT_ROOT), jobs=jobs).scan()
+    assert serial_matches == parallel_matches, "Parallel scan must match the serial scan"
+
+    serial = best_of(repeat, lambda: scanner.CodeScanner(str(PROJECT_ROOT)).scan())
+    parallel = best_of(repeat, lambda: scanner.CodeScanner(str(PROJECT_ROOT), jobs=jobs).scan())
+
+    print(f"\nProject tree ({len(serial_matches)} matches)")
+    print(f"   Serial:       {serial * 1000:9.2f} ms")
+    print(f"   {jobs} workers:    {parallel * 1000:9.2f} ms")
+    print(f"   Speedup:      {serial / parallel if parallel else float('inf'):9.1f}x")
+
+
+def bench_property_check(scanner, repeat: int) -> None:
+    """Compare the nested column substring scan with the column index"""
+    db_parser = scanner.DatabaseSchemaParser(str(DATABASE_TYPES))
+    db_parser.parse()
+    matches = scanner.CodeScanner(str(PROJECT_ROOT)).scan()
+    props = [m.property_name for m in matches if m.type == 'property_access' and '_' in m.property_name]
+
+    def nested_any():
+        return [
+            any(
+                col in prop for schema_tables in db_parser.tables.values()
+                for table in schema_tables.values()
+                for col in table.columns
+            )
+            for prop in props
+        ]
+
+    def column_index():
+        detector = scanner.MismatchDetector(db_parser, [])
+        return [detector._contains_column(prop) for prop in props]
+
+    assert nested_any() == column_index(), "Column index must agree with the nested scan"
+
+    total_columns = sum(len(table.columns) for tables in db_parser.tables.values() for table in tables.values())
+    naive = best_of(repeat, nested_any)
+    indexed = best_of(repeat, column_index)
+
+    print(f"\nProperty accesses with '_' ({len(props)} checks, {total_columns} table columns)")
+    print(f"   Nested any(): {naive * 1000:9.2f} ms")
+    print(f"   Column index: {indexed * 1000:9.2f} ms")
+    print(f"   Speedup:      {naive / indexed if indexed else float('inf'):9.1f}x")
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description='Benchmark the schema scanner hot paths')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per measurement (best is reported)')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1, help='Worker processes for the parallel scan')
+    args = parser.parse_args()
+
+    scanner = load_scanner()
+
+    print("⏱️  Schema Scanner Benchmarks")
+    print("="*80)
+
+    check_detectors(scanner)
+
+    print("\n📍 Match location lookup")
+    bench_line_lookup(
+        scanner,
+        f"{DATABASE_TYPES.relative_to(PROJECT_ROOT)} (every property key)",
+        read_sources([DATABASE_TYPES], DENSE_PATTERN),
+        args.repeat,
+    )
+    bench_line_lookup(
+        scanner,
+        f"{FEATURES_DIR.relative_to(PROJECT_ROOT)}/ (scanner patterns)",
+        read_sources(find_ts_files(FEATURES_DIR), SCANNER_PATTERN),
+        args.repeat,
+    )
+
+    print("\n🔎 Code scan")
+    bench_code_scan(scanner, max(args.jobs, 2), args.repeat)
+
+    print("\n🔗 Property check")
+    bench_property_check(scanner, args.repeat)
+
+    print("\n" + "="*80)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
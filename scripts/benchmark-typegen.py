@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Type Generator Benchmarks
+
+Measures the psycopg fallback's rendering in generate-supabase-types.py on
+a synthetic catalog, without a database:
+
+1. Type mapping: map_postgres_type for every column of Row, Insert and
+   Update vs the renderer's memoized lookup, once per column
+2. Rendering: the whole Database type for growing slices of the catalog,
+   which should take the same time per column at every size
+
+Before timing anything, the fixture catalog in scripts/fixtures/typegen is
+rendered and compared byte for byte with its expected output, so the
+renderer is never measured while it lays types out differently from
+Prettier, and rendered once more through the command line to check that a
+run with another --output leaves lib/types/ alone.
+
+Usage:
+    python3 scripts/benchmark-typegen.py [--tables N] [--columns N] [--repeat N]
+                                         [--write-catalog PATH]
+
+--write-catalog stores the synthetic catalog as a snapshot that
+`generate-supabase-types.py --snapshot-in PATH` renders.
+"""
+
+import argparse
+import difflib
+import hashlib
+import importlib.util
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+# A catalog snapshot introspected from objects recreated from the project's
+# schemas, and the CLI's (Prettier-formatted) output for those objects
+FIXTURE_DIR = SCRIPT_DIR / 'fixtures' / 'typegen'
+
+SCHEMAS = ['public', 'organization', 'scheduling', 'catalog']
+ENUM_LABELS = ['draft', 'active', 'archived']
+# (type_name, data_type) pairs in the shape the catalog query reports them
+COLUMN_TYPES = [
+    ('int8', 'bigint'),
+    ('text', 'text'),
+    ('timestamptz', 'timestamp with time zone'),
+    ('bool', 'boolean'),
+    ('uuid', 'uuid'),
+    ('jsonb', 'jsonb'),
+    ('numeric', 'numeric(10,2)'),
+    ('_text', 'text[]'),
+    ('status', 'status'),
+    ('_money_amount', 'money_amount[]'),
+]
+
+
+def load_generator():
+    """Import generate-supabase-types.py (hyphenated, so not importable by name)"""
+    spec = importlib.util.spec_from_file_location(
+        'generate_supabase_types', SCRIPT_DIR / 'generate-supabase-types.py'
+    )
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def synthetic_catalog(tables: int, columns_per_table: int) -> Dict[str, List[Dict[str, object]]]:
+    """A catalog shaped like the catalog query's result.
+
+    Tables are spread over SCHEMAS; each has an id column with a primary
+    key index, a foreign key (and its index) to the previous table in its
+    schema, planner size estimates, and a mix of built-in, array, enum and
+    domain columns.
+    """
+    catalog: Dict[str, List[Dict[str, object]]] = {
+        'tables': [], 'views': [], 'columns': [], 'relationships': [],
+        'enums': [], 'functions': [], 'domains': [], 'composite_types': [],
+        'indexes': [],
+    }
+    for i, schema in enumerate(SCHEMAS):
+        catalog['enums'].append({'id': 1000 + i, 'schema': schema, 'name': 'status', 'labels': ENUM_LABELS})
+        catalog['domains'].append({
+            'id': 2000 + i, 'schema': schema, 'name': 'money_amount',
+            'base_schema': 'pg_catalog', 'base_type_name': 'numeric', 'base_data_type': 'numeric',
+        })
+
+    for table_id in range(tables):
+        schema = SCHEMAS[table_id % len(SCHEMAS)]
+        name = f"table_{table_id:05d}"
+        catalog['tables'].append({
+            'id': table_id, 'schema': schema, 'name': name, 'relkind': 'r', 'comment': None,
+            'estimated_rows': 1000 * (table_id % 97), 'total_bytes': 8192 * (1 + table_id % 97),
+            'base_relations': None,
+        })
+        catalog['indexes'].append({
+            'schema': schema, 'table': name, 'name': f"{name}_pkey", 'method': 'btree',
+            'columns': ['id'], 'is_unique': True, 'is_primary': True, 'is_partial': False, 'is_valid': True,
+        })
+        for position in range(1, columns_per_table + 1):
+            if position == 1:
+                type_name, data_type, column = 'int8', 'bigint', 'id'
+            else:
+                type_name, data_type = COLUMN_TYPES[(table_id + position) % len(COLUMN_TYPES)]
+                column = f"column_{position:02d}"
+            catalog['columns'].append({
+                'table_id': table_id,
+                'schema': schema,
+                'table': name,
+                'ordinal_position': position,
+                'name': column,
+                'data_type': data_type,
+                'type_name': type_name,
+                # Enums and domains come from the first schema, across schemas
+                'type_schema': SCHEMAS[0] if type_name.lstrip('_') in ('status', 'money_amount') else 'pg_catalog',
+                'has_default': position == 1,
+                'default_value': None,
+                'is_identity': position == 1,
+                'identity_generation': 'ALWAYS' if position == 1 else None,
+                'is_generated': False,
+                'is_nullable': position % 3 == 0,
+            })
+        if table_id >= len(SCHEMAS):
+            catalog['relationships'].append({
+                'schema': schema,
+                'table_name': name,
+                'constraint_name': f"{name}_parent_fkey",
+                'columns': ['column_02'],
+                'referenced_schema': schema,
+                'referenced_table': f"table_{table_id - len(SCHEMAS):05d}",
+                'referenced_columns': ['id'],
+            })
+            catalog['indexes'].append({
+                'schema': schema, 'table': name, 'name': f"{name}_column_02_idx", 'method': 'btree',
+                'columns': ['column_02'], 'is_unique': False, 'is_primary': False, 'is_partial': False,
+                'is_valid': True,
+            })
+    return catalog
+
+
+def catalog_slice(catalog: Dict[str, List[Dict[str, object]]], tables: int) -> Dict[str, List[Dict[str, object]]]:
+    """The part of a synthetic catalog covering its first tables"""
+    return dict(
+        catalog,
+        tables=catalog['tables'][:tables],
+        columns=[column for column in catalog['columns'] if column['table_id'] < tables],
+        relationships=[rel for rel in catalog['relationships'] if int(rel['table_name'][6:]) < tables],
+        indexes=[index for index in catalog['indexes'] if int(index['table'][6:]) < tables],
+    )
+
+
+def check_layout(generator) -> None:
+    """Render the fixture catalog and compare it with the expected output.
+
+    The expected file is the Supabase CLI's output for the fixture objects,
+    copied from database.types.ts, less the __InternalSupabase and Constants
+    blocks the fallback does not emit. Two content differences the fallback
+    has always had are applied to it as well: non-updatable views get
+    Insert/Update: never, and relationships have no isOneToOne.
+    """
+    schemas, catalog = generator.read_catalog_snapshot(FIXTURE_DIR / 'catalog.json')
+    rendered = "\n".join(generator.TypesRenderer(catalog, schemas).lines()) + "\n"
+    expected = (FIXTURE_DIR / 'database.types.ts').read_text(encoding='utf-8')
+    if rendered != expected:
+        diff = difflib.unified_diff(
+            expected.splitlines(), rendered.splitlines(), fromfile='expected', tofile='rendered', lineterm='',
+        )
+        print("\n".join(list(diff)[:200]))
+        raise SystemExit("Rendered fixture types differ from the expected layout")
+    print(f"Layout matches {(FIXTURE_DIR / 'database.types.ts').relative_to(SCRIPT_DIR.parent)} "
+          f"({expected.count(chr(10))} lines)")
+
+
+def check_output_paths() -> None:
+    """Render the fixture snapshot to a temporary --output and check that
+    the types and index manifest land there, and nothing in lib/types/
+    changes"""
+    types_dir = SCRIPT_DIR.parent / 'lib' / 'types'
+
+    def digests() -> Dict[str, str]:
+        return {
+            path.name: hashlib.sha256(path.read_bytes()).hexdigest()
+            for path in sorted(types_dir.iterdir()) if path.is_file()
+        }
+
+    before = digests()
+    with tempfile.TemporaryDirectory() as directory:
+        output = Path(directory) / 'db.types.ts'
+        subprocess.run(
+            [sys.executable, str(SCRIPT_DIR / 'generate-supabase-types.py'),
+             '--snapshot-in', str(FIXTURE_DIR / 'catalog.json'), '--output', str(output)],
+            check=True, capture_output=True, text=True,
+        )
+        written = sorted(path.name for path in Path(directory).iterdir())
+    assert written == ['database.indexes.json', 'db.types.ts'], f"Unexpected files written: {written}"
+    assert digests() == before, "Rendering to another --output changed lib/types/"
+    print("Non-default --output leaves lib/types/ untouched")
+
+
+def best_of(repeat: int, func: Callable[[], object]) -> float:
+    """Run a function several times and return the fastest wall time"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def bench_type_mapping(generator, catalog: Dict[str, List[Dict[str, object]]], repeat: int) -> None:
+    """Compare mapping every column three times with the memoized lookup"""
+    renderer = generator.TypesRenderer(catalog, SCHEMAS)
+    columns = catalog['columns']
+
+    def per_use():
+        for column in columns:
+            for _ in ('Row', 'Insert', 'Update'):
+                generator.map_postgres_type(
+                    column['type_schema'], column['type_name'], column['data_type'],
+                    renderer.enums, renderer.composite_types, renderer.domains,
+                )
+
+    def memoized():
+        fresh = generator.TypesRenderer(catalog, SCHEMAS)
+        for column in columns:
+            fresh.ts_type(column['type_schema'], column['type_name'], column['data_type'])
+
+    # Both must agree before their timings mean anything
+    for column in columns[:len(COLUMN_TYPES) * len(SCHEMAS) * 2]:
+        key = (column['type_schema'], column['type_name'], column['data_type'])
+        assert renderer.ts_type(*key) == generator.map_postgres_type(
+            *key, renderer.enums, renderer.composite_types, renderer.domains
+        )
+
+    naive = best_of(repeat, per_use)
+    cached = best_of(repeat, memoized)
+    print(f"\nColumns: {len(columns)}")
+    print(f"   3x map_postgres_type: {naive * 1000:9.2f} ms")
+    print(f"   Memoized, once:       {cached * 1000:9.2f} ms")
+    print(f"   Speedup:              {naive / cached if cached else float('inf'):9.1f}x")
+
+
+def bench_rendering(generator, catalog: Dict[str, List[Dict[str, object]]], repeat: int) -> None:
+    """Render growing slices of the catalog and report time per column"""
+    total = len(catalog['tables'])
+    sizes = sorted({max(1, total // 8), max(1, total // 4), max(1, total // 2), total})
+
+    print(f"\n   {'Tables':>7} {'Columns':>9} {'Lines':>10} {'Time':>10} {'Per column':>12}")
+    baseline = None
+    for tables in sizes:
+        part = catalog_slice(catalog, tables)
+        lines = sum(1 for _ in generator.TypesRenderer(part, SCHEMAS).lines())
+        elapsed = best_of(repeat, lambda: sum(1 for _ in generator.TypesRenderer(part, SCHEMAS).lines()))
+        per_column = elapsed / len(part['columns']) * 1e6
+        baseline = baseline or per_column
+        print(f"   {tables:>7} {len(part['columns']):>9} {lines:>10} {elapsed * 1000:>8.0f} ms "
+              f"{per_column:>8.2f} µs  ({per_column / baseline:.2f}x)")
+
+
+def main():
+    """Main entry point"""
+    parser = argparse.ArgumentParser(description='Benchmark type rendering on a synthetic catalog')
+    parser.add_argument('--tables', type=int, default=5000, help='Tables in the synthetic catalog')
+    parser.add_argument('--columns', type=int, default=20, help='Columns per table')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per measurement (best is reported)')
+    parser.add_argument('--write-catalog', type=Path, default=None,
+                        help='Also write the synthetic catalog as a --snapshot-in snapshot')
+    args = parser.parse_args()
+
+    generator = load_generator()
+    catalog = synthetic_catalog(args.tables, args.columns)
+
+    print("⏱️  Type Generator Benchmarks")
+    print("="*80)
+    check_layout(generator)
+    check_output_paths()
+    print(f"Synthetic catalog: {args.tables} tables, {len(catalog['columns'])} columns, "
+          f"{len(SCHEMAS)} schemas")
+
+    if args.write_catalog:
+        generator.write_catalog_snapshot(catalog, SCHEMAS, args.write_catalog)
+        print(f"Catalog snapshot written to {args.write_catalog}")
+
+    print("\n🔤 Type mapping")
+    bench_type_mapping(generator, catalog, args.repeat)
+
+    print("\n📝 Rendering (time per column should stay flat)")
+    bench_rendering(generator, catalog, args.repeat)
+
+    print("\n" + "="*80)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
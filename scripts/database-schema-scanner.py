@@ -8,19 +8,31 @@ This script:
 3. Validates that code matches the actual database schema
 4. Reports all mismatches with details
 5. Saves results to JSON for analysis and fixing
+6. With --watch, rescans files as they change and prints mismatch deltas
 
 Database is the single source of truth.
 Frontend code must match the database, not the other way around.
 """
 
+import argparse
+import hashlib
 import json
+import marshal
 import re
 import os
+import queue
+import sqlite3
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Set, Tuple
-from dataclasses import dataclass, asdict
-from collections import defaultdict
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from dataclasses import dataclass, asdict, astuple
+from collections import Counter, defaultdict, deque
+from collections.abc import Sequence
+from bisect import bisect_right
+from itertools import accumulate, groupby
+from operator import attrgetter
 import ast
 
 @dataclass
@@ -48,6 +60,9 @@ class CodeMatch:
     schema_name: Optional[str]
     property_name: Optional[str]
     context: str
+    loop: Optional[Dict[str, Any]] = None  # enclosing loop of a from/rpc call, see CodeStructure
+    query: Optional[Dict[str, Any]] = None  # what is chained on a from call: filters, select, modifiers
+    waterfall: Optional[Dict[str, Any]] = None  # on the first of consecutive independent awaited calls
 
 @dataclass
 class Mismatch:
@@ -60,187 +75,415 @@ class Mismatch:
     issue: str
     suggestion: str
     context: str
+    details: Optional[Dict[str, Any]] = None
+
+# Tokens of a TypeScript type literal, as emitted by Supabase type generation
+TS_TYPE_TOKEN = re.compile(
+    r"(?P<comment>//[^\n]*|/\*.*?\*/)"
+    r"|(?P<key>[A-Za-z_$][\w$]*|\"[^\"\n]*\"|'[^'\n]*')\??\s*:(?!:)"
+    r"|(?P<open>\{)"
+    r"|(?P<close>\})"
+    r"|(?P<open_bracket>[\[(<])"
+    r"|(?P<close_bracket>[\])>])"
+    r"|(?P<separator>[;,])"
+    r"|(?P<text>\"[^\"\n]*\"|'[^'\n]*'|[^\s{}\[\]()<>;,\"']+)",
+    re.DOTALL
+)
+DATABASE_TYPE_START = re.compile(r"export\s+type\s+Database\s*=\s*(?=\{)")
+# Sharded types (generate-supabase-types.py --shard) keep each schema's type in
+# its own file, imported by the database.types.ts barrel
+SHARD_IMPORT = re.compile(r'^import type \{ (\w+) \} from "\./([\w.-]+)"$', re.MULTILINE)
+
+# Parsed schema model snapshot, stored in the scan cache directory
+SCHEMA_SNAPSHOT_FILE = 'schema-model.bin'
+# Index manifest written next to database.types.ts by generate-supabase-types.py
+INDEX_MANIFEST_FILE = 'database.indexes.json'
+INDEX_MANIFEST_VERSION = 1
+
+# Sections of a schema in the Database type
+SCHEMA_SECTIONS = ('Tables', 'Views', 'Functions', 'Enums', 'CompositeTypes')
+
+
+def walk_type_literal(content: str, start: int) -> Iterator[Tuple[Tuple[str, ...], str, Optional[str]]]:
+    """Walk the object type literal opening at content[start] in one pass.
+
+    Yields (path, key, value) for every property, where path holds the keys
+    of the enclosing objects. Object-valued properties are yielded with a
+    value of None when they open; every other property is yielded once its
+    value ends, with the value's source text (whitespace collapsed). Each
+    member of a union of objects (e.g. overloaded functions) is reported
+    under the key that holds the union. Index signatures are skipped.
+    """
+    # Frame: [path, bracket depth, pending key, value start, value end, has object value]
+    stack: List[list] = []
+
+    def end_value(frame: list) -> Optional[Tuple[Tuple[str, ...], str, Optional[str]]]:
+        path, _, key, value_start, value_end, has_object = frame
+        frame[2:] = [None, -1, -1, False]
+        if key is None or has_object or value_start < 0:
+            return None
+        value = ' '.join(content[value_start:value_end].split())
+        # Multi-line unions start with a leading '|'
+        return path, key, value[2:] if value.startswith('| ') else value
+
+    for token in TS_TYPE_TOKEN.finditer(content, start):
+        kind = token.lastgroup
+        if kind == 'comment':
+            continue
+
+        if not stack:
+            if kind != 'open':
+                return
+            stack.append([(), 0, None, -1, -1, False])
+            continue
+
+        frame = stack[-1]
+        if kind == 'open':
+            key = frame[2]
+            if key is not None:
+                frame[5] = True
+                yield frame[0], key, None
+            stack.append([frame[0] + (key or '',), 0, None, -1, -1, False])
+        elif kind == 'close':
+            event = end_value(frame)
+            if event:
+                yield event
+            stack.pop()
+            if not stack:
+                return
+        elif frame[1]:
+            # Inside brackets: generic arguments, tuples, index signatures
+            if kind == 'open_bracket':
+                frame[1] += 1
+            elif kind == 'close_bracket':
+                frame[1] -= 1
+            if frame[3] >= 0:
+                frame[4] = token.end()
+        elif kind == 'key':
+            event = end_value(frame)
+            if event:
+                yield event
+            frame[2] = token.group('key').strip('"\'')
+        elif kind == 'separator':
+            event = end_value(frame)
+            if event:
+                yield event
+        else:
+            if kind == 'open_bracket':
+                frame[1] += 1
+            if frame[2] is not None:
+                if frame[3] < 0:
+                    frame[3] = token.start()
+                frame[4] = token.end()
+
+
+class SubstringIndex:
+    """Aho-Corasick automaton over a set of words.
+
+    Answers "does any indexed word occur inside this text?" in time linear
+    in the length of the text, however many words are indexed.
+    """
+
+    def __init__(self, words: Iterable[str]):
+        self.transitions: List[Dict[str, int]] = [{}]
+        self.terminal: List[bool] = [False]
+
+        for word in words:
+            state = 0
+            for char in word:
+                next_state = self.transitions[state].get(char)
+                if next_state is None:
+                    next_state = len(self.transitions)
+                    self.transitions[state][char] = next_state
+                    self.transitions.append({})
+                    self.terminal.append(False)
+                state = next_state
+            self.terminal[state] = True
+
+        # Failure links, breadth first; a state is terminal if any suffix is
+        self.fail = [0] * len(self.transitions)
+        pending = deque(self.transitions[0].values())
+        while pending:
+            state = pending.popleft()
+            for char, next_state in self.transitions[state].items():
+                fallback = self.fail[state]
+                while fallback and char not in self.transitions[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.transitions[fallback].get(char, 0)
+                self.terminal[next_state] = self.terminal[next_state] or self.terminal[self.fail[next_state]]
+                pending.append(next_state)
+
+    def contains_any(self, text: str) -> bool:
+        """Check if any indexed word is a substring of text"""
+        if self.terminal[0]:
+            return True
+        transitions, fail, terminal = self.transitions, self.fail, self.terminal
+        state = 0
+        for char in text:
+            while state and char not in transitions[state]:
+                state = fail[state]
+            state = transitions[state].get(char, 0)
+            if terminal[state]:
+                return True
+        return False
+
 
 class DatabaseSchemaParser:
     """Parses database schema from lib/types/database.types.ts"""
 
+    # Bump whenever the snapshot layout or the parsed model changes
+    SNAPSHOT_VERSION = 1
+
     def __init__(self, database_types_path: str):
         self.path = database_types_path
+        self.source_paths: List[str] = [database_types_path]  # the types file and its shards
+        self.content_hash: Optional[str] = None
         self.tables: Dict[str, Dict[str, DatabaseTable]] = defaultdict(dict)  # schema -> name -> table
         self.views: Dict[str, Dict[str, DatabaseTable]] = defaultdict(dict)   # schema -> name -> view
         self.functions: Dict[str, Dict[str, RPCFunction]] = defaultdict(dict)  # schema -> name -> function
+        self.enums: Dict[str, Dict[str, List[str]]] = defaultdict(dict)  # schema -> name -> labels
+        self.composite_types: Dict[str, Dict[str, Dict[str, str]]] = defaultdict(dict)  # schema -> name -> fields
         self.schemas: Set[str] = set()
-
-    def parse(self) -> None:
-        """Parse the database.types.ts file"""
+        # (schema, name) -> index manifest entry: kind, estimated_rows,
+        # total_bytes, indexes and a view's base_relations; empty without a manifest
+        self.relations: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+        # Lookup structures, built once after parsing
+        self.table_columns: Dict[Tuple[str, str], Set[str]] = {}  # (schema, table) -> columns
+        self.all_table_columns: Set[str] = set()
+        self.table_column_index = SubstringIndex([])
+
+    def parse(self, snapshot_path: Optional[str] = None) -> None:
+        """Parse the database.types.ts file.
+
+        With a snapshot path, the parsed model is loaded from a snapshot of
+        the same types file content when one exists, and written there
+        after parsing otherwise.
+        """
         if not os.path.exists(self.path):
             raise FileNotFoundError(f"Database types file not found: {self.path}")
 
-        with open(self.path, 'r') as f:
-            content = f.read()
-
-        # Extract schema names
-        self._extract_schemas(content)
-
-        # Extract tables from each schema
-        self._extract_tables(content)
-
-        # Extract views from each schema
-        self._extract_views(content)
-
-        # Extract RPC functions
-        self._extract_functions(content)
-
-    def _extract_schemas(self, content: str) -> None:
-        """Extract schema names from Database type definition"""
-        # Look for schema: { Tables: { ... } pattern
-        # A real schema has Tables, Views, Functions, etc.
-        schema_pattern = r"^\s+([a-z_]+):\s*{\s*$"
-
-        lines = content.split('\n')
-        for i, line in enumerate(lines):
-            match = re.match(schema_pattern, line)
-            if match:
-                schema_name = match.group(1)
-                # Filter out system/type properties
-                if schema_name not in ['__InternalSupabase', 'Relationships']:
-                    # Check if this is followed by Tables, Views, or Functions
-                    # Look ahead a few lines
-                    next_lines = '\n'.join(lines[i:min(i+10, len(lines))])
-                    if 'Tables:' in next_lines or 'Views:' in next_lines or 'Functions:' in next_lines:
-                        self.schemas.add(schema_name)
-
-    def _extract_tables(self, content: str) -> None:
-        """Extract table definitions"""
-        # For each schema, find its Tables section
-        for schema in self.schemas:
-            # Find the schema section
-            schema_start = content.find(f"{schema}: {{")
-            if schema_start == -1:
-                continue
-
-            # Find Tables: { within this schema
-            tables_start = content.find("Tables: {", schema_start)
-            if tables_start == -1:
-                continue
-
-            # Find the end of Tables section (next Views: or Functions:)
-            tables_end = min(
-                (content.find("Views: {", tables_start) if "Views: {" in content[tables_start:tables_start+50000] else len(content)),
-                (content.find("Functions: {", tables_start) if "Functions: {" in content[tables_start:tables_start+50000] else len(content))
-            )
-
-            tables_content = content[tables_start:tables_end]
-
-            # Extract each table: pattern is "table_name: { Row: { ... } }"
-            table_pattern = r"(\w+):\s*{\s*Row:\s*{([^}]*?)}\s*Insert:"
-
-            for match in re.finditer(table_pattern, tables_content, re.DOTALL):
-                table_name = match.group(1)
-                columns_str = match.group(2)
-                columns = self._extract_columns(columns_str)
-
-                if columns:  # Only add if we found columns
-                    self.tables[schema][table_name] = DatabaseTable(
-                        schema=schema,
-                        name=table_name,
-                        type='table',
-                        columns=columns
-                    )
-
-    def _extract_views(self, content: str) -> None:
-        """Extract view definitions"""
-        # For each schema, find its Views section
-        for schema in self.schemas:
-            # Find the schema section
-            schema_start = content.find(f"{schema}: {{")
-            if schema_start == -1:
-                continue
-
-            # Find Views: { within this schema
-            views_start = content.find("Views: {", schema_start)
-            if views_start == -1:
-                continue
-
-            # Find the end of Views section (next Functions:)
-            views_end = content.find("Functions: {", views_start)
-            if views_end == -1:
-                views_end = len(content)
-
-            views_content = content[views_start:views_end]
-
-            # Extract each view: pattern is "view_name: { Row: { ... } }"
-            view_pattern = r"(\w+):\s*{\s*Row:\s*{([^}]*?)}\s*Insert:"
-
-            for match in re.finditer(view_pattern, views_content, re.DOTALL):
-                view_name = match.group(1)
-                columns_str = match.group(2)
-                columns = self._extract_columns(columns_str)
-
-                if columns:  # Only add if we found columns
-                    self.views[schema][view_name] = DatabaseTable(
-                        schema=schema,
-                        name=view_name,
-                        type='view',
-                        columns=columns
-                    )
-
-    def _extract_functions(self, content: str) -> None:
-        """Extract RPC function definitions"""
-        # For each schema, find its Functions section
-        for schema in self.schemas:
-            # Find the schema section
-            schema_start = content.find(f"{schema}: {{")
-            if schema_start == -1:
-                continue
-
-            # Find Functions: { within this schema
-            functions_start = content.find("Functions: {", schema_start)
-            if functions_start == -1:
-                continue
-
-            # Find the end of Functions section (next Enums: or closing brace)
-            functions_end = content.find("Enums: {", functions_start)
-            if functions_end == -1:
-                functions_end = len(content)
-
-            functions_content = content[functions_start:functions_end]
-
-            # Extract each function: pattern is "func_name: { Args: { ... } }"
-            func_pattern = r"(\w+):\s*{\s*Args:\s*{([^}]*?)}\s*Returns:"
+        with open(self.path, 'rb') as f:
+            raw = f.read()
+        digest = hashlib.sha256(raw)
+        content = raw.decode('utf-8')
+
+        # A sharded barrel is parsed as if every shard were written inline
+        shards: List[Tuple[str, str]] = []
+        for type_name, module in SHARD_IMPORT.findall(content):
+            shard_path = os.path.join(os.path.dirname(self.path), f"{module}.ts")
+            with open(shard_path, 'rb') as f:
+                shard_raw = f.read()
+            digest.update(shard_raw)
+            shards.append((type_name, shard_raw.decode('utf-8')))
+            self.source_paths.append(shard_path)
+
+        # The manifest is optional and not part of the model snapshot, but
+        # checks depend on it, so it is part of the hash
+        manifest_path = os.path.join(os.path.dirname(self.path), INDEX_MANIFEST_FILE)
+        if os.path.exists(manifest_path):
+            with open(manifest_path, 'rb') as f:
+                manifest_raw = f.read()
+            digest.update(manifest_raw)
+            self.source_paths.append(manifest_path)
+            self.load_index_manifest(manifest_raw)
+        self.content_hash = digest.hexdigest()
+
+        if snapshot_path and self.load_snapshot(snapshot_path):
+            return
 
-            for match in re.finditer(func_pattern, functions_content, re.DOTALL):
-                func_name = match.group(1)
-                args_str = match.group(2)
-                # Extract argument names
-                args = re.findall(r"(\w+):", args_str)
+        for type_name, shard in shards:
+            content = self.inline_shard(content, type_name, shard)
+        self.parse_content(content)
+
+        if snapshot_path:
+            self.write_snapshot(snapshot_path)
+
+    def to_snapshot(self) -> bytes:
+        """Serialize the parsed model, tagged with the types file hash"""
+        return marshal.dumps((
+            self.SNAPSHOT_VERSION,
+            self.content_hash,
+            sorted(self.schemas),
+            {schema: {name: t.columns for name, t in tables.items()} for schema, tables in self.tables.items()},
+            {schema: {name: v.columns for name, v in views.items()} for schema, views in self.views.items()},
+            {schema: {name: f.args for name, f in funcs.items()} for schema, funcs in self.functions.items()},
+            dict(self.enums),
+            dict(self.composite_types),
+        ))
 
-                if func_name not in ['Relationships']:
-                    self.functions[schema][func_name] = RPCFunction(
-                        schema=schema,
-                        name=func_name,
-                        args=args
-                    )
+    def write_snapshot(self, snapshot_path: str) -> None:
+        """Write the parsed model snapshot"""
+        os.makedirs(os.path.dirname(snapshot_path), exist_ok=True)
+        temp_path = f"{snapshot_path}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(self.to_snapshot())
+        os.replace(temp_path, snapshot_path)
 
-    def _extract_columns(self, columns_str: str) -> Dict[str, str]:
-        """Extract column names and types from a columns definition"""
-        columns = {}
-        if not columns_str.strip():
-            return columns
+    def load_snapshot(self, snapshot_path: str) -> bool:
+        """Load the parsed model from a snapshot of the current types file"""
+        try:
+            with open(snapshot_path, 'rb') as f:
+                data = marshal.load(f)
+            version, content_hash, schemas, tables, views, functions, enums, composite_types = data
+        except (OSError, EOFError, ValueError, TypeError):
+            return False
+        if version != self.SNAPSHOT_VERSION or content_hash != self.content_hash:
+            return False
+
+        self.schemas = set(schemas)
+        for schema, relations in tables.items():
+            for name, columns in relations.items():
+                self.tables[schema][name] = DatabaseTable(schema=schema, name=name, type='table', columns=columns)
+        for schema, relations in views.items():
+            for name, columns in relations.items():
+                self.views[schema][name] = DatabaseTable(schema=schema, name=name, type='view', columns=columns)
+        for schema, funcs in functions.items():
+            for name, args in funcs.items():
+                self.functions[schema][name] = RPCFunction(schema=schema, name=name, args=args)
+        self.enums.update(enums)
+        self.composite_types.update(composite_types)
+
+        self._build_indexes()
+        return True
+
+    def load_index_manifest(self, raw: bytes) -> None:
+        """Load relation sizes and indexes from an index manifest"""
+        try:
+            manifest = json.loads(raw)
+        except ValueError as e:
+            raise ValueError(f"Malformed index manifest: {e}") from e
+        if manifest.get('format_version') != INDEX_MANIFEST_VERSION:
+            raise ValueError(
+                f"Unsupported index manifest version {manifest.get('format_version')}; "
+                "regenerate it with generate-supabase-types.py"
+            )
+        self.relations = {
+            tuple(key.split('.', 1)): entry for key, entry in manifest['relations'].items()
+        }
 
-        # Pattern to match: column_name: type (can be complex with | and null)
-        # Match until we hit end of line
-        pattern = r"(\w+):\s*([^,\n}]+?)(?=\n|\})"
+    def indexed_relation(self, schema: str, name: str) -> Optional[Tuple[str, str]]:
+        """Get the relation whose indexes serve queries on a table or view.
+
+        Tables and materialized views serve themselves; a plain view over a
+        single relation is followed down to it. Views that join several
+        relations (or anything not in the manifest) return None.
+        """
+        key = (schema, name)
+        for _ in range(8):  # views over views, without looping forever
+            entry = self.relations.get(key)
+            if entry is None:
+                return None
+            if entry['kind'] != 'view':
+                return key
+            bases = entry.get('base_relations') or []
+            if len(bases) != 1:
+                return None
+            key = tuple(bases[0].split('.', 1))
+        return None
 
-        for match in re.finditer(pattern, columns_str):
-            col_name = match.group(1).strip()
-            col_type = match.group(2).strip()
+    def estimated_rows(self, schema: str, name: str) -> Optional[int]:
+        """Planner row estimate of a relation from the index manifest.
+
+        Views have none of their own; they get the largest estimate among
+        the relations they read, which is what a view over one main table
+        and its lookups returns at most per join row.
+        """
+        entry = self.relations.get((schema, name))
+        if entry is None:
+            return None
+        if entry.get('estimated_rows') is not None or entry['kind'] != 'view':
+            return entry.get('estimated_rows')
+        estimates = [
+            self.estimated_rows(*base.split('.', 1))
+            for base in entry.get('base_relations') or []
+            if tuple(base.split('.', 1)) != (schema, name)
+        ]
+        estimates = [rows for rows in estimates if rows is not None]
+        return max(estimates) if estimates else None
+
+    def view_joins(self, schema: str, name: str) -> Optional[bool]:
+        """Whether a view (or a view it reads) joins several relations;
+        None when the manifest does not describe it"""
+        entry = self.relations.get((schema, name))
+        if entry is None or entry['kind'] != 'view':
+            return None
+        bases = entry.get('base_relations') or []
+        if len(bases) > 1:
+            return True
+        return bool(bases) and bool(self.view_joins(*bases[0].split('.', 1)))
 
-            # Skip empty columns
-            if col_name and col_type:
-                columns[col_name] = col_type
+    @staticmethod
+    def inline_shard(content: str, type_name: str, shard: str) -> str:
+        """Replace references to a shard's schema type with its object literal"""
+        start = re.search(rf"export\s+type\s+{type_name}\s*=\s*(?=\{{)", shard)
+        end = re.search(r"^\}$", shard[start.end():], re.MULTILINE) if start else None
+        if not end:
+            raise ValueError(f"No 'export type {type_name}' definition found in its shard")
+        literal = shard[start.end():start.end() + end.end()]
+        return re.sub(rf"(?<=:) {type_name}$", lambda _: ' ' + literal, content, flags=re.MULTILINE)
+
+    def parse_content(self, content: str) -> None:
+        """Parse the Database type from database.types.ts content in a single pass"""
+        start = DATABASE_TYPE_START.search(content)
+        if not start:
+            raise ValueError("No 'export type Database' definition found")
+
+        for path, key, value in walk_type_literal(content, start.end()):
+            depth = len(path)
+
+            if depth == 1 and value is None and key in SCHEMA_SECTIONS:
+                # A schema is any top-level entry with Tables/Views/Functions...
+                self.schemas.add(path[0])
+
+            elif depth == 2 and value is None:
+                schema, section = path
+                if section == 'Functions':
+                    # Overloads report the same function once per signature
+                    if key not in self.functions[schema]:
+                        self.functions[schema][key] = RPCFunction(schema=schema, name=key, args=[])
+                elif section == 'CompositeTypes':
+                    self.composite_types[schema][key] = {}
+
+            elif depth == 2 and path[1] == 'Enums':
+                self.enums[path[0]][key] = re.findall(r'"([^"]*)"', value)
+
+            elif depth == 3 and value is not None and path[1] == 'CompositeTypes':
+                self.composite_types[path[0]][path[2]][key] = value
+
+            elif depth == 4 and value is not None:
+                schema, section, name, part = path
+                if part == 'Row' and section in ('Tables', 'Views'):
+                    relations = self.tables if section == 'Tables' else self.views
+                    relation = relations[schema].get(name)
+                    if relation is None:
+                        relation = relations[schema][name] = DatabaseTable(
+                            schema=schema,
+                            name=name,
+                            type='table' if section == 'Tables' else 'view',
+                            columns={}
+                        )
+                    relation.columns[key] = value
+                elif part == 'Args' and section == 'Functions':
+                    args = self.functions[schema][name].args
+                    if key not in args:
+                        args.append(key)
+
+        self._build_indexes()
+
+    def _build_indexes(self) -> None:
+        """Precompute column lookups used for every checked code match"""
+        self.table_columns = {
+            (schema, name): set(table.columns)
+            for schema, schema_tables in self.tables.items()
+            for name, table in schema_tables.items()
+        }
+        self.all_table_columns = set().union(*self.table_columns.values())
+        self.table_column_index = SubstringIndex(self.all_table_columns)
 
-        return columns
+    def column_fragment_in(self, text: str) -> bool:
+        """Check if any table column name occurs inside text"""
+        return self.table_column_index.contains_any(text)
 
     def get_table(self, schema: str, table_name: str) -> Optional[DatabaseTable]:
         """Get a table definition"""
@@ -282,19 +525,637 @@ class DatabaseSchemaParser:
                ('public' in self.functions and func_name in self.functions['public'])
 
 
+class LineIndex:
+    """Maps character offsets in a file to line numbers and source lines.
+
+    Built once per file so every scanner can resolve match locations with a
+    bisect lookup instead of recounting newlines in the file prefix. The
+    index itself is only computed on the first lookup, so files without any
+    matches never pay for it.
+    """
+
+    def __init__(self, content: str):
+        self.content = content
+        self._lines: Optional[List[str]] = None
+        self._line_starts: List[int] = []
+
+    @property
+    def lines(self) -> List[str]:
+        """Source lines of the file"""
+        if self._lines is None:
+            self._build()
+        return self._lines
+
+    def _build(self) -> None:
+        """Split the file into lines and record where each line starts"""
+        self._lines = self.content.split('\n')
+        # Offset at which each line starts (line 1 starts at offset 0)
+        self._line_starts = [0, *accumulate(len(line) + 1 for line in self._lines[:-1])]
+
+    def line_number(self, offset: int) -> int:
+        """Get the 1-based line number containing an offset"""
+        if self._lines is None:
+            self._build()
+        return bisect_right(self._line_starts, offset)
+
+    def context(self, line_num: int) -> str:
+        """Get the stripped source line for a 1-based line number"""
+        return self.lines[line_num - 1].strip() if line_num <= len(self.lines) else ""
+
+    def locate(self, offset: int) -> Tuple[int, str]:
+        """Get the line number and context line for an offset"""
+        line_num = self.line_number(offset)
+        return line_num, self.context(line_num)
+
+
+class ScanCache:
+    """Persistent per-file cache of scan results.
+
+    Stores each file's CodeMatch list keyed by its root-relative path, and
+    validates entries by mtime and size first, then by content hash, so a
+    file that was touched but not changed is never rescanned. Mismatches are
+    cached per file as well, but only for the database.types.ts content they
+    were detected against.
+    """
+
+    # Bump whenever the tokenizer or CodeMatch layout changes
+    VERSION = 7
+
+    def __init__(self, cache_dir: str, schema_hash: str):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, 'scan-cache.sqlite')
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS files ("
+            " path TEXT PRIMARY KEY,"
+            " mtime_ns INTEGER NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " sha256 TEXT NOT NULL,"
+            " matches TEXT NOT NULL,"
+            " mismatches TEXT)"
+        )
+        meta = dict(self.conn.execute("SELECT key, value FROM meta"))
+
+        if meta.get('version') != str(self.VERSION):
+            self.conn.execute("DELETE FROM files")
+        elif meta.get('schema_hash') != schema_hash:
+            # Matches do not depend on the schema, but every mismatch might
+            self.conn.execute("UPDATE files SET mismatches = NULL")
+
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+            [('version', str(self.VERSION)), ('schema_hash', schema_hash)],
+        )
+        self.entries: Dict[str, Tuple[int, int, str, str, Optional[str]]] = {
+            row[0]: row[1:]
+            for row in self.conn.execute(
+                "SELECT path, mtime_ns, size, sha256, matches, mismatches FROM files"
+            )
+        }
+        # Files whose cached matches were reused without rescanning
+        self.fresh: Set[str] = set()
+
+    @staticmethod
+    def file_hash(file_path: str) -> str:
+        """Get the content hash of a file"""
+        with open(file_path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+
+    def get_matches(self, relative_path: str, file_path: str) -> Optional[List[CodeMatch]]:
+        """Get cached matches for a file, or None if it must be rescanned"""
+        entry = self.entries.get(relative_path)
+        if entry is None:
+            return None
+
+        mtime_ns, size, sha256, matches, mismatches = entry
+        stat = os.stat(file_path)
+        if (stat.st_mtime_ns, stat.st_size) != (mtime_ns, size):
+            if stat.st_size != size or self.file_hash(file_path) != sha256:
+                return None
+            # Touched but unchanged: refresh the stat key only
+            self.entries[relative_path] = (stat.st_mtime_ns, size, sha256, matches, mismatches)
+            self.conn.execute(
+                "UPDATE files SET mtime_ns = ? WHERE path = ?",
+                (stat.st_mtime_ns, relative_path),
+            )
+
+        self.fresh.add(relative_path)
+        return [CodeMatch(*row) for row in json.loads(matches)]
+
+    def put_matches(self, relative_path: str, file_path: str, matches: List[CodeMatch]) -> None:
+        """Store freshly scanned matches for a file, dropping its cached mismatches"""
+        stat = os.stat(file_path)
+        entry = (
+            stat.st_mtime_ns,
+            stat.st_size,
+            self.file_hash(file_path),
+            json.dumps([astuple(match) for match in matches]),
+            None,
+        )
+        self.entries[relative_path] = entry
+        self.conn.execute(
+            "INSERT OR REPLACE INTO files (path, mtime_ns, size, sha256, matches, mismatches)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (relative_path, *entry),
+        )
+
+    def get_mismatches(self, relative_path: str) -> Optional[List[Mismatch]]:
+        """Get cached mismatches for an unchanged file, or None if detection must rerun"""
+        entry = self.entries.get(relative_path)
+        if relative_path not in self.fresh or entry is None or entry[4] is None:
+            return None
+        return [Mismatch(*row) for row in json.loads(entry[4])]
+
+    def put_mismatches(self, relative_path: str, mismatches: List[Mismatch]) -> None:
+        """Store the mismatches detected for a file"""
+        entry = self.entries.get(relative_path)
+        if entry is None:
+            return
+        data = json.dumps([astuple(mismatch) for mismatch in mismatches])
+        self.entries[relative_path] = (*entry[:4], data)
+        self.conn.execute(
+            "UPDATE files SET mismatches = ? WHERE path = ?", (data, relative_path)
+        )
+
+    def prune(self, relative_paths: List[str]) -> None:
+        """Drop entries for files that no longer exist"""
+        removed = set(self.entries) - set(relative_paths)
+        for relative_path in removed:
+            del self.entries[relative_path]
+        self.conn.executemany(
+            "DELETE FROM files WHERE path = ?", [(path,) for path in removed]
+        )
+
+    def close(self) -> None:
+        """Persist all changes"""
+        self.conn.commit()
+        self.conn.close()
+
+
+# Single tokenizer for every database access pattern, so each file is walked
+# once. Every token is anchored on the '.' of a member access, which keeps the
+# regex engine's fast literal scan; the row./data./result. receivers of
+# property accesses are matched with fixed-width lookbehinds.
+DB_ACCESS_PATTERN = re.compile(
+    r"\.(?:(?P<from>from\s*\(\s*['\"](?P<from_name>[a-z_]+)['\"]\s*\))"
+    r"|(?P<rpc>rpc\s*\(\s*['\"](?P<rpc_name>[a-z_]+)['\"]\s*)"
+    r"|(?P<schema>schema\s*\(\s*['\"](?P<schema_name>[a-z_]+)['\"]\s*\))"
+    r"|(?P<property>(?:(?<=row\.)|(?<=data\.)|(?<=result\.))[a-z_]+)"
+    r"|(?P<filter>(?P<filter_method>eq|in|gte?|lte?|order)\s*\(\s*['\"](?P<filter_column>[\w.>-]+)['\"])"
+    r"|(?P<select>select\s*\(\s*(?P<select_columns>'[^']*'|\"[^\"]*\"|`[^`]*`|[A-Za-z_$][\w$.]*)?"
+    r"(?:\s*,\s*(?P<select_options>\{[^{}]*\}))?)"
+    r"|(?P<modifier>(?P<modifier_name>limit|range|single|maybeSingle|insert|update|upsert|delete)"
+    r"\s*(?:<[^<>()]*(?:<[^<>()]*>[^<>()]*)*>\s*)?\())"
+)
+# Query builder calls that bound a query to a page or a single row
+BOUNDING_MODIFIERS = ('limit', 'range', 'single', 'maybeSingle')
+MUTATIONS = ('insert', 'update', 'upsert', 'delete')
+PROPERTY_NAME_PATTERN = re.compile(r"[a-z_]+")
+PROPERTY_RECEIVERS = ('row', 'data', 'result')
+
+
+def _receiver_start(content: str, dot: int) -> int:
+    """Get the offset of a row/data/result receiver ending at a '.', or -1"""
+    for receiver in PROPERTY_RECEIVERS:
+        start = dot - len(receiver)
+        if start >= 0 and content.startswith(receiver, start):
+            return start
+    return -1
+
+
+# Tokens of a file's code structure: brackets, commas, loop heads,
+# Promise.all fan-outs and awaits. Comments, strings, template literals and regex
+# literals are matched whole ('skip') so brackets inside them never count.
+CODE_STRUCTURE_TOKEN = re.compile(
+    r"(?P<skip>//[^\n]*|/\*.*?\*/"
+    r"|'(?:\\.|[^'\\\n])*'|\"(?:\\.|[^\"\\\n])*\"|`(?:\\.|[^`\\])*`"
+    r"|(?<=[=(,:\[!&|?{};])\s*/(?![/*])(?:\\.|\[(?:\\.|[^\]\\\n])*\]|[^/\\\n\[])+/)"
+    r"|(?P<loop>\b(?:for(?:\s+await)?|while)\s*(?=\()|\.(?:map|flatMap|forEach)\s*(?=\())"
+    r"|(?P<fan_out>\bPromise\.all(?:Settled)?\s*(?=\())"
+    r"|(?P<await>\bawait\b)"
+    r"|(?P<open>[(\[{])"
+    r"|(?P<close>[)\]}])"
+    r"|(?P<comma>,)",
+    re.DOTALL
+)
+NUMBER_PATTERN = re.compile(r"\d+")
+# Between an await and the client call it awaits: the client, and an
+# optional .schema() step
+AWAITED_CLIENT_PATTERN = re.compile(
+    r"\s*[A-Za-z_$][\w$]*(?:\s*\.\s*schema\s*\(\s*['\"][a-z_]+['\"]\s*\))?\s*"
+)
+# The declaration (or assignment) an await is the value of
+AWAIT_DECLARATION_PATTERN = re.compile(
+    r"(?:\b(?:const|let|var)\s+|(?:^|(?<=[;{}]))[ \t]*)"
+    r"(?P<pattern>\{[^{};]*\}|\[[^\[\];]*\]|[A-Za-z_$][\w$]*)"
+    r"\s*(?::[^=;(){}\n]+)?=\s*$",
+    re.MULTILINE
+)
+IDENTIFIER_PATTERN = re.compile(r"[A-Za-z_$][\w$]*")
+# Where an expression statement ends: a ';', the close of the enclosing
+# bracket, or a line break not followed by a chained call. Strings and
+# comments are skipped whole; opening brackets are jumped over by the caller
+STATEMENT_END_TOKEN = re.compile(
+    r"(?P<skip>//[^\n]*|/\*.*?\*/"
+    r"|'(?:\\.|[^'\\\n])*'|\"(?:\\.|[^\"\\\n])*\"|`(?:\\.|[^`\\])*`)"
+    r"|(?P<open>[(\[{])"
+    r"|(?P<end>[;)\]}]|\n(?!\s*\??\.))",
+    re.DOTALL
+)
+# Variable uses: identifiers not preceded by '.', outside quoted strings and comments
+NAME_USE_TOKEN = re.compile(
+    r"(?P<skip>//[^\n]*|/\*.*?\*/|'(?:\\.|[^'\\\n])*'|\"(?:\\.|[^\"\\\n])*\")"
+    r"|(?P<name>(?<![\w$.])[A-Za-z_$][\w$]*)",
+    re.DOTALL
+)
+STATEMENT_LOOPS = {'for', 'for...of', 'for...in', 'while'}
+# Something an opening '[' indexes into (a[i]) rather than starting an array literal
+INDEXED_PATTERN = re.compile(r"[\w$)\]]\s*$")
+DO_KEYWORD_PATTERN = re.compile(r"\bdo\s*$")
+# RPCs named as reads, which can run concurrently with other reads
+READ_RPC_PATTERN = re.compile(r"(?:get|list|count|search|fetch|find)_")
+# Server components and API modules, where awaited queries should not waterfall
+WATERFALL_MODULE_PATTERN = re.compile(r"(?:^|/)app/(?:.+/)?page\.tsx$|(?:^|/)features/.+/api/")
+# Query modules, where a database call inside a loop is an N+1 pattern
+QUERY_MODULE_PATTERN = re.compile(r"(?:^|/)features/.+/api/queries(?:/|\.tsx?$)")
+
+
+class CodeStructure:
+    """Bracket pairs, loop bodies and awaits of a file, from a single
+    tokenizer pass.
+
+    Only built for files that contain database calls. Loop bodies are the
+    braces (or single statement) after a for/while head, and the argument
+    list of .map()/.flatMap()/.forEach() callbacks; a .map() inside the
+    arguments of Promise.all() is a parallel fan-out.
+    """
+
+    def __init__(self, content: str):
+        self.content = content
+        self.closes: Dict[int, int] = {}  # opening bracket offset -> closing bracket offset
+        self.opens: Dict[int, int] = {}   # closing bracket offset -> opening bracket offset
+        self.commas: Counter = Counter()  # bracket offset -> commas directly inside it
+        self.blocks: List[Tuple[int, int]] = []  # (opening, closing) offsets of every {} pair
+        # (body start, body end, kind, head offset), in head order
+        self.loops: List[Tuple[int, int, str, int]] = []
+        self.awaits: List[int] = []  # offsets of await keywords, in order
+        # Block boundaries in offset order, and the innermost block at each
+        # boundary and just after it; built on the first block() lookup
+        self._block_bounds: Optional[List[int]] = None
+        self._blocks_at: List[Tuple[int, int]] = []
+        self._blocks_after: List[Tuple[int, int]] = []
+
+        stack: List[int] = []
+        heads: List[Tuple[str, int, int]] = []  # (head text, head offset, '(' offset)
+        fan_outs: List[int] = []
+        for token in CODE_STRUCTURE_TOKEN.finditer(content):
+            kind = token.lastgroup
+            if kind == 'open':
+                stack.append(token.start())
+            elif kind == 'close':
+                if stack:
+                    start = stack.pop()
+                    self.closes[start] = token.start()
+                    self.opens[token.start()] = start
+                    if content[start] == '{':
+                        self.blocks.append((start, token.start()))
+            elif kind == 'comma':
+                if stack:
+                    self.commas[stack[-1]] += 1
+            elif kind == 'loop':
+                heads.append((token.group(), token.start(), token.end()))
+            elif kind == 'fan_out':
+                fan_outs.append(token.end())
+            elif kind == 'await':
+                self.awaits.append(token.start())
+
+        fan_out_args = [(paren, self.closes[paren]) for paren in fan_outs if paren in self.closes]
+        for head, offset, paren in heads:
+            close = self.closes.get(paren)
+            if close is None:
+                continue
+            if head.startswith('.'):
+                parallel = any(start < offset < end for start, end in fan_out_args)
+                kind = 'Promise.all(.map)' if parallel and head != '.forEach' else head.strip()[1:]
+                self.loops.append((paren, close, kind, offset))
+                continue
+            body = None if head.startswith('while') and self._ends_do_block(offset) else self._statement_after(close)
+            if body is None:
+                continue  # the while of a do...while, or an empty loop
+            header = content[paren + 1:close]
+            if head.startswith('for'):
+                kind = 'for...of' if re.search(r"\bof\b", header) else 'for...in' if re.search(r"\bin\b", header) else 'for'
+            else:
+                kind = 'while'
+            self.loops.append((*body, kind, offset))
+
+    def _ends_do_block(self, offset: int) -> bool:
+        """Whether a while at an offset closes a do { ... } block"""
+        end = len(self.content[max(0, offset - 80):offset].rstrip()) + max(0, offset - 80)
+        opening = self.opens.get(end - 1) if self.content[end - 1:end] == '}' else None
+        return opening is not None and DO_KEYWORD_PATTERN.search(self.content, max(0, opening - 80), opening) is not None
+
+    def _statement_after(self, offset: int) -> Optional[Tuple[int, int]]:
+        """The block or single statement following a loop head's ')'"""
+        match = re.compile(r"\s*").match(self.content, offset + 1)
+        start = match.end()
+        if start >= len(self.content) or self.content[start] == ';':
+            return None
+        if self.content[start] == '{':
+            return start, self.closes.get(start, len(self.content))
+        end = self.content.find(';', start)
+        newline = self.content.find('\n', start)
+        ends = [position for position in (end, newline) if position != -1]
+        return start, min(ends) if ends else len(self.content)
+
+    def _build_block_index(self) -> None:
+        """Sweep the block boundaries once, recording the innermost block
+        on and after each, so block() is a bisect lookup"""
+        outside = (-1, len(self.content))
+        boundaries = sorted(
+            [(start, close, True) for start, close in self.blocks]
+            + [(close, start, False) for start, close in self.blocks]
+        )
+        stack: List[Tuple[int, int]] = [outside]
+        self._block_bounds = []
+        for position, other, opening in boundaries:
+            self._block_bounds.append(position)
+            if opening:
+                # A block's own braces are not inside it
+                self._blocks_at.append(stack[-1])
+                stack.append((position, other))
+            else:
+                stack.pop()
+                self._blocks_at.append(stack[-1])
+            self._blocks_after.append(stack[-1])
+
+    def block(self, offset: int) -> Tuple[int, int]:
+        """The innermost {} block containing an offset, or (-1, end of file)"""
+        if self._block_bounds is None:
+            self._build_block_index()
+        position = bisect_right(self._block_bounds, offset) - 1
+        if position < 0:
+            return -1, len(self.content)
+        if self._block_bounds[position] == offset:
+            return self._blocks_at[position]
+        return self._blocks_after[position]
+
+    def block_end(self, offset: int) -> int:
+        """End of the innermost {} block containing an offset (or of the file)"""
+        return self.block(offset)[1]
+
+    def next_await(self, offset: int) -> int:
+        """Offset of the first await after an offset, or the end of the file"""
+        position = bisect_right(self.awaits, offset)
+        return self.awaits[position] if position < len(self.awaits) else len(self.content)
+
+    def awaited_call(self, offset: int) -> Optional[int]:
+        """The await of a statement that awaits a client call at an offset
+        directly (await supabase.from(...), await client.schema('x').rpc(...)),
+        or None"""
+        position = bisect_right(self.awaits, offset) - 1
+        if position < 0:
+            return None
+        start = self.awaits[position]
+        if not AWAITED_CLIENT_PATTERN.fullmatch(self.content, start + len('await'), offset):
+            return None
+        return start
+
+    def statement_end(self, start: int) -> int:
+        """End of the statement an await at an offset belongs to: its ';',
+        the close of the enclosing bracket, or the line break ending the
+        call chain"""
+        position = start
+        while True:
+            token = STATEMENT_END_TOKEN.search(self.content, position)
+            if token is None:
+                return len(self.content)
+            if token.lastgroup == 'end':
+                return token.start()
+            if token.lastgroup == 'open':
+                close = self.closes.get(token.start())
+                if close is None:
+                    return len(self.content)
+                position = close + 1
+            else:
+                position = token.end()
+
+    def await_bindings(self, start: int) -> Optional[Set[str]]:
+        """Names bound by the declaration an await is the value of.
+
+        Names bound from a response's error are left out: checking them is
+        error handling, not a use of the data. An await that is not assigned
+        binds nothing; None means the binding could not be read (nested
+        destructuring, a property target) and must be assumed used.
+        """
+        window = max(0, start - 400)
+        declaration = AWAIT_DECLARATION_PATTERN.search(self.content, window, start)
+        if not declaration:
+            before = self.content[window:start].rstrip()
+            return None if before.endswith('=') and not before.endswith(('==', '!=')) else set()
+        pattern = declaration.group('pattern')
+        if pattern[0] not in '{[':
+            return {pattern}
+
+        names: Set[str] = set()
+        for item in pattern[1:-1].split(','):
+            item = item.split('=')[0].strip()
+            if not item:
+                continue
+            key, _, alias = item.partition(':')
+            key, alias = key.strip().lstrip('.'), alias.strip()
+            if pattern[0] == '{' and key == 'error':
+                continue
+            name = alias or key
+            if IDENTIFIER_PATTERN.fullmatch(name):
+                names.add(name)
+        return names
+
+    def uses(self, names: Set[str], start: int, end: int) -> bool:
+        """Check if any name is used as a variable between two offsets.
+
+        Quoted strings and comments are skipped; template literals are not,
+        so ${name} counts (as does the name in a template's text, which only
+        makes the check more conservative).
+        """
+        if not names:
+            return False
+        for token in NAME_USE_TOKEN.finditer(self.content, start, end):
+            if token.lastgroup == 'name' and token.group() in names:
+                return True
+        return False
+
+    def loops_at(self, offset: int) -> List[Tuple[int, int, str, int]]:
+        """Loops whose body contains an offset, outermost first"""
+        return [loop for loop in self.loops if loop[0] < offset < loop[1]]
+
+    def fan_out(self, loop: Tuple[int, int, str, int]) -> Tuple[str, Optional[int]]:
+        """Describe how many times a loop runs: an expression, and a number
+        when it is a literal (an array literal's length, a numeric bound)"""
+        start, _, kind, head = loop
+        content = self.content
+        if kind in STATEMENT_LOOPS:
+            header_start = content.index('(', head)
+            header = ' '.join(content[header_start + 1:self.closes[header_start]].split())
+            if kind == 'for...of':
+                iterable = header.split(' of ', 1)[-1]
+                if iterable.startswith('[') and iterable.endswith(']'):
+                    opening = content.index('[', content.index(' of ', header_start))
+                    return self._array_length(opening)
+                return f"{iterable}.length", None
+            if kind == 'for...in':
+                return f"keys of {header.split(' in ', 1)[-1]}", None
+            bound = re.search(r"<(=?)\s*([^;]+?)\s*;", header) if kind == 'for' else None
+            if bound:
+                limit = bound.group(2)
+                # Chunked loops step by a batch size: i += chunkSize
+                step = re.search(r"\+=\s*([\w$.]+)\s*$", header)
+                if step and step.group(1) == '1':
+                    step = None
+                if NUMBER_PATTERN.fullmatch(limit) and not step:
+                    count = int(limit) + (1 if bound.group(1) else 0)
+                    return str(count), count
+                return (f"{limit} / {step.group(1)}" if step else limit), None
+            return 'N', None
+
+        # .map() and friends: the receiver before the '.'
+        receiver_end = head
+        while receiver_end > 0 and content[receiver_end - 1].isspace():
+            receiver_end -= 1
+        if receiver_end and content[receiver_end - 1] == ']':
+            opening = self.opens.get(receiver_end - 1)
+            if opening is not None and not INDEXED_PATTERN.search(content, max(0, opening - 80), opening):
+                return self._array_length(opening)
+        if receiver_end and content[receiver_end - 1] == ')':
+            opening = self.opens.get(receiver_end - 1)
+            if opening is not None:
+                receiver = ' '.join(content[opening:receiver_end].split())
+                return f"{receiver[:60]}.length", None
+        receiver = re.search(r"[\w$.?!]+$", content[:receiver_end])
+        return (f"{receiver.group().rstrip('?!.')}.length" if receiver else 'N'), None
+
+    def _array_length(self, opening: int) -> Tuple[str, Optional[int]]:
+        """Element count of an array literal, from its direct commas"""
+        inner = self.content[opening + 1:self.closes[opening]].strip()
+        count = 0 if not inner else self.commas[opening] + (0 if inner.endswith(',') else 1)
+        return str(count), count
+
+    def loop_context(self, offset: int) -> Optional[Dict[str, Any]]:
+        """Loop details for a call at an offset, or None outside loops"""
+        loops = self.loops_at(offset)
+        if not loops:
+            return None
+        fan_outs = [self.fan_out(loop) for loop in loops]
+        counts = [count for _, count in fan_outs]
+        estimate = None
+        if all(count is not None for count in counts):
+            estimate = 1
+            for count in counts:
+                estimate *= count
+        innermost = loops[-1]
+        kind = innermost[2]
+        if kind == 'Promise.all(.map)':
+            concurrency = 'parallel'
+        elif kind in STATEMENT_LOOPS:
+            concurrency = 'sequential'
+        else:
+            # .map()/.forEach() callbacks outside Promise.all all start at
+            # once, and nothing here waits for them together
+            concurrency = 'unawaited'
+        return {
+            'kind': kind,
+            'offset': innermost[3],
+            'depth': len(loops),
+            'fan_out': ' × '.join(expression for expression, _ in fan_outs),
+            'estimated_fan_out': estimate,
+            'parallel': concurrency == 'parallel',
+            'concurrency': concurrency,
+            # Set when the query's own chain filters with .in(), so each
+            # iteration fetches a batch (see CodeScanner._chain_query_call)
+            'batched': False,
+        }
+
+
 class CodeScanner:
     """Scans TypeScript/TSX files for database access patterns"""
 
-    def __init__(self, root_path: str):
+    # Files handed to a worker per task; large enough to amortize pickling
+    # and IPC, small enough to keep every core busy until the end
+    CHUNK_SIZE = 64
+
+    def __init__(self, root_path: str, jobs: int = 1, cache: Optional['ScanCache'] = None):
         self.root_path = root_path
+        self.jobs = jobs
+        self.cache = cache
         self.matches: List[CodeMatch] = []
+        self.rescanned_files = 0
 
     def scan(self) -> List[CodeMatch]:
         """Scan all TypeScript/TSX files for database access"""
-        for file_path in self._find_ts_files():
-            self._scan_file(file_path)
+        ts_files = self._find_ts_files()
+        results: Dict[str, List[CodeMatch]] = {}
+
+        # Reuse cached matches for unchanged files; only the rest is scanned
+        stale_files = ts_files
+        if self.cache:
+            stale_files = []
+            for file_path in ts_files:
+                cached = self.cache.get_matches(self._relative_path(file_path), file_path)
+                if cached is None:
+                    stale_files.append(file_path)
+                else:
+                    results[file_path] = cached
+
+        if self.jobs > 1 and len(stale_files) > self.CHUNK_SIZE:
+            self._scan_parallel(stale_files, results)
+        else:
+            for file_path in stale_files:
+                results[file_path] = self._scan_file(file_path)
+        self.rescanned_files = len(stale_files)
+
+        if self.cache:
+            for file_path in stale_files:
+                self.cache.put_matches(self._relative_path(file_path), file_path, results[file_path])
+            self.cache.prune([self._relative_path(file_path) for file_path in ts_files])
+
+        for file_path in ts_files:
+            self.matches.extend(results[file_path])
         return self.matches
 
+    def _scan_parallel(self, ts_files: List[str], results: Dict[str, List[CodeMatch]]) -> None:
+        """Scan files across a process pool, merging results in file order.
+
+        Chunks are merged as soon as every earlier chunk has arrived, so the
+        results are identical to a serial scan and fill in while workers are
+        still running.
+        """
+        chunks = [
+            ts_files[i:i + self.CHUNK_SIZE]
+            for i in range(0, len(ts_files), self.CHUNK_SIZE)
+        ]
+        completed: Dict[int, List[List[tuple]]] = {}
+        next_chunk = 0
+
+        with ProcessPoolExecutor(max_workers=self.jobs) as executor:
+            futures = {
+                executor.submit(_scan_files_worker, self.root_path, chunk): i
+                for i, chunk in enumerate(chunks)
+            }
+            for future in as_completed(futures):
+                completed[futures[future]] = future.result()
+                while next_chunk in completed:
+                    file_rows = completed.pop(next_chunk)
+                    for file_path, rows in zip(chunks[next_chunk], file_rows):
+                        results[file_path] = [CodeMatch(*row) for row in rows]
+                    next_chunk += 1
+
+    def _relative_path(self, file_path: str) -> str:
+        """Get the path of a file as reported in matches"""
+        return file_path.replace(self.root_path, '')
+
     def _find_ts_files(self) -> List[str]:
         """Find all TypeScript/TSX files"""
         ts_files = []
@@ -307,138 +1168,407 @@ class CodeScanner:
                     ts_files.append(os.path.join(root, file))
         return ts_files
 
-    def _scan_file(self, file_path: str) -> None:
+    def _scan_file(self, file_path: str) -> List[CodeMatch]:
         """Scan a single TypeScript file for database access patterns"""
         try:
             with open(file_path, 'r', encoding='utf-8') as f:
                 content = f.read()
-                lines = content.split('\n')
 
-            # Scan for .from() calls
-            self._scan_from_calls(file_path, content, lines)
+            return self._scan_content(file_path, content)
 
-            # Scan for .rpc() calls
-            self._scan_rpc_calls(file_path, content, lines)
+        except Exception as e:
+            print(f"Warning: Error scanning {file_path}: {e}", file=sys.stderr)
+            return []
+
+    def _scan_content(self, file_path: str, content: str) -> List[CodeMatch]:
+        """Tokenize a file once, emitting every kind of database access in offset order"""
+        matches: List[CodeMatch] = []
+        # Shared by all tokens to resolve match locations
+        index = LineIndex(content)
+        relative_path = self._relative_path(file_path)
+
+        # Running .schema() context: (schema name, offset where the call ends)
+        pending_schema: Optional[Tuple[str, int]] = None
+        # Property accesses never overlap: resume after the last property name
+        property_end = 0
+        # Loops and brackets, built on the first from/rpc call only
+        structure: Optional[CodeStructure] = None
+        # The .from() match later filters belong to, until the end of its block
+        query_chain: Optional[Tuple[CodeMatch, int]] = None
+        # from/rpc calls awaited directly, with the offset of their await
+        awaited: List[Tuple[CodeMatch, int]] = []
+
+        for match in DB_ACCESS_PATTERN.finditer(content):
+            kind = match.lastgroup
+
+            # Any token preceded by a row/data/result receiver is also a
+            # property access, e.g. the 'from' in data.from('x')
+            receiver = _receiver_start(content, match.start())
+            if receiver != -1 and receiver >= property_end:
+                prop_match = PROPERTY_NAME_PATTERN.match(content, match.start() + 1)
+                property_end = prop_match.end()
+                prop_name = prop_match.group()
+                if not prop_name.startswith('_'):  # Ignore internal props
+                    line_num, context = index.locate(receiver)
+                    matches.append(CodeMatch(
+                        file=relative_path,
+                        line=line_num,
+                        type='property_access',
+                        table_or_function=None,
+                        schema_name=None,
+                        property_name=prop_name,
+                        context=context
+                    ))
+
+            if kind == 'property':
+                continue
 
-            # Scan for .schema() calls
-            self._scan_schema_calls(file_path, content, lines)
+            if kind in ('filter', 'select', 'modifier'):
+                # Chains and conditional query = query.eq(...) steps alike
+                if query_chain and match.start() < query_chain[1]:
+                    self._chain_query_call(query_chain[0], match, index)
+                continue
 
-            # Scan for property access on database rows
-            self._scan_property_access(file_path, content, lines)
+            line_num, context = index.locate(match.start())
+
+            loop = None
+            awaited_at = None
+            if kind in ('from', 'rpc'):
+                structure = structure or CodeStructure(content)
+                loop = structure.loop_context(match.start())
+                if loop:
+                    loop['line'] = index.line_number(loop.pop('offset'))
+                awaited_at = structure.awaited_call(match.start())
+
+            if kind == 'schema':
+                schema_name = match.group('schema_name')
+                pending_schema = (schema_name, match.end())
+                matches.append(CodeMatch(
+                    file=relative_path,
+                    line=line_num,
+                    type='schema',
+                    table_or_function=None,
+                    schema_name=schema_name,
+                    property_name=None,
+                    context=context
+                ))
 
-        except Exception as e:
-            print(f"Warning: Error scanning {file_path}: {e}", file=sys.stderr)
+            elif kind == 'from':
+                # .schema('x').from('y') chains select the schema for the table
+                schema = 'public'
+                if pending_schema and not content[pending_schema[1]:match.start()].strip():
+                    schema = pending_schema[0]
+                matches.append(CodeMatch(
+                    file=relative_path,
+                    line=line_num,
+                    type='from',
+                    table_or_function=match.group('from_name'),
+                    schema_name=schema,
+                    property_name=None,
+                    context=context,
+                    loop=loop
+                ))
+                query_chain = (matches[-1], structure.block_end(match.start()))
+                if awaited_at is not None:
+                    awaited.append((matches[-1], awaited_at))
+
+            elif kind == 'rpc':
+                query_chain = None
+                matches.append(CodeMatch(
+                    file=relative_path,
+                    line=line_num,
+                    type='rpc',
+                    table_or_function=match.group('rpc_name'),
+                    schema_name='public',
+                    property_name=None,
+                    context=context,
+                    loop=loop
+                ))
+                if awaited_at is not None:
+                    awaited.append((matches[-1], awaited_at))
 
-    def _scan_from_calls(self, file_path: str, content: str, lines: List[str]) -> None:
-        """Scan for .from('table_name') calls"""
-        pattern = r"\.from\s*\(\s*['\"]([a-z_]+)['\"]\s*\)"
-
-        for match in re.finditer(pattern, content):
-            table_name = match.group(1)
-            line_num = content[:match.start()].count('\n') + 1
-            context = lines[line_num - 1].strip() if line_num <= len(lines) else ""
-
-            # Check for preceding .schema() call
-            schema = 'public'
-            schema_pattern = r"\.schema\s*\(\s*['\"]([a-z_]+)['\"]\s*\)\s*\.from\s*\(\s*['\"]" + re.escape(table_name)
-            if re.search(schema_pattern, content[:match.start()]):
-                schema_match = re.search(r"\.schema\s*\(\s*['\"]([a-z_]+)['\"]", content[:match.start()][-100:])
-                if schema_match:
-                    schema = schema_match.group(1)
-
-            self.matches.append(CodeMatch(
-                file=file_path.replace(self.root_path, ''),
-                line=line_num,
-                type='from',
-                table_or_function=table_name,
-                schema_name=schema,
-                property_name=None,
-                context=context
-            ))
+        if len(awaited) > 1:
+            self._mark_waterfalls(structure, awaited)
+        return matches
 
-    def _scan_rpc_calls(self, file_path: str, content: str, lines: List[str]) -> None:
-        """Scan for .rpc('function_name') calls"""
-        pattern = r"\.rpc\s*\(\s*['\"]([a-z_]+)['\"]\s*"
-
-        for match in re.finditer(pattern, content):
-            func_name = match.group(1)
-            line_num = content[:match.start()].count('\n') + 1
-            context = lines[line_num - 1].strip() if line_num <= len(lines) else ""
-
-            self.matches.append(CodeMatch(
-                file=file_path.replace(self.root_path, ''),
-                line=line_num,
-                type='rpc',
-                table_or_function=func_name,
-                schema_name='public',
-                property_name=None,
-                context=context
-            ))
+    @staticmethod
+    def _mark_waterfalls(structure: CodeStructure, awaited: List[Tuple[CodeMatch, int]]) -> None:
+        """Find runs of consecutive awaited reads in the same block where no
+        read uses a result of an earlier one, and describe each run on its
+        first match.
+
+        Writes, other awaits and a change of block end a run; a read that
+        uses an earlier result starts a new one. Only the code from the end
+        of the previous statement to the end of the current one is checked
+        for uses, so results used after the run (return [a, b]) do not
+        count as dependencies.
+        """
+        # (match, await offset, names bound, end of the awaited statement)
+        run: List[Tuple[CodeMatch, int, Optional[Set[str]], int]] = []
+
+        def close_run() -> None:
+            if len(run) > 1:
+                run[0][0].waterfall = {
+                    'lines': [match.line for match, _, _, _ in run],
+                    'calls': [
+                        f".{match.type}('{match.table_or_function}')" for match, _, _, _ in run
+                    ],
+                    'round_trips_saved': len(run) - 1,
+                }
+            run.clear()
+
+        for match, start in awaited:
+            if match.type == 'from':
+                read = not any(name in MUTATIONS for name in (match.query or {}).get('modifiers', []))
+            else:
+                read = bool(READ_RPC_PATTERN.match(match.table_or_function))
+            if not read:
+                close_run()
+                continue
 
-    def _scan_schema_calls(self, file_path: str, content: str, lines: List[str]) -> None:
-        """Scan for .schema('schema_name') calls"""
-        pattern = r"\.schema\s*\(\s*['\"]([a-z_]+)['\"]\s*\)"
-
-        for match in re.finditer(pattern, content):
-            schema_name = match.group(1)
-            line_num = content[:match.start()].count('\n') + 1
-            context = lines[line_num - 1].strip() if line_num <= len(lines) else ""
-
-            self.matches.append(CodeMatch(
-                file=file_path.replace(self.root_path, ''),
-                line=line_num,
-                type='schema',
-                table_or_function=None,
-                schema_name=schema_name,
-                property_name=None,
-                context=context
-            ))
+            if run:
+                previous_start = run[-1][1]
+                block_start = structure.block(start)[0]
+                if structure.block(previous_start)[0] != block_start or structure.next_await(previous_start) != start:
+                    close_run()
 
-    def _scan_property_access(self, file_path: str, content: str, lines: List[str]) -> None:
-        """Scan for property access on database rows (simplified)"""
-        # Look for row.property_name patterns
-        # This is simplified - full analysis would require AST parsing
-        pattern = r"row\.([a-z_]+)|data\.([a-z_]+)|result\.([a-z_]+)"
+            end = structure.statement_end(start)
+            if run:
+                previous_end = run[-1][3]
+                if any(names is None or structure.uses(names, previous_end, end) for _, _, names, _ in run):
+                    close_run()
 
-        for match in re.finditer(pattern, content):
-            prop_name = match.group(1) or match.group(2) or match.group(3)
-            if prop_name and not prop_name.startswith('_'):  # Ignore internal props
-                line_num = content[:match.start()].count('\n') + 1
-                context = lines[line_num - 1].strip() if line_num <= len(lines) else ""
+            run.append((match, start, structure.await_bindings(start), end))
+        close_run()
 
-                self.matches.append(CodeMatch(
-                    file=file_path.replace(self.root_path, ''),
-                    line=line_num,
-                    type='property_access',
-                    table_or_function=None,
-                    schema_name=None,
-                    property_name=prop_name,
-                    context=context
-                ))
+
+    @staticmethod
+    def _chain_query_call(from_match: CodeMatch, match: re.Match, index: LineIndex) -> None:
+        """Record a filter, select or modifier call on the query of a .from() match"""
+        query = from_match.query = from_match.query or {}
+        kind = match.lastgroup
+        if kind == 'filter':
+            line_num, context = index.locate(match.start())
+            query.setdefault('filters', []).append({
+                'method': match.group('filter_method'),
+                'column': match.group('filter_column'),
+                'line': line_num,
+                'context': context,
+            })
+            # A query in a loop that filters with .in() fetches a batch per iteration
+            if match.group('filter_method') == 'in' and from_match.loop:
+                from_match.loop['batched'] = True
+        elif kind == 'select':
+            # Only the first select belongs to the query; .select() with no
+            # arguments selects every column, and a column list from a
+            # constant, call or interpolated template is unknown (None)
+            if 'select' not in query:
+                line_num, context = index.locate(match.start())
+                columns = match.group('select_columns')
+                options = match.group('select_options')
+                if columns and columns[0] in '\'"`' and '${' not in columns:
+                    selected = ' '.join(columns[1:-1].split()) or '*'
+                elif columns is None and match.string.startswith(')', match.end()):
+                    selected = '*'
+                else:
+                    selected = None
+                query['select'] = {
+                    'columns': selected,
+                    'options': ' '.join(options.split()) if options else None,
+                    'line': line_num,
+                    'context': context,
+                }
+        else:
+            name = match.group('modifier_name')
+            # Mutations start the chain; a later .delete() or .update() is
+            # some other object's (a Map's, a hash's)
+            if name in MUTATIONS and 'select' in query:
+                return
+            modifiers = query.setdefault('modifiers', [])
+            if name not in modifiers:
+                modifiers.append(name)
+
+
+def _scan_files_worker(root_path: str, file_paths: List[str]) -> List[List[tuple]]:
+    """Process pool entry point: scan files and return compact match tuples per file"""
+    scanner = CodeScanner(root_path)
+    return [
+        [astuple(match) for match in scanner._scan_file(file_path)]
+        for file_path in file_paths
+    ]
+
+
+def _format_bytes(size: float) -> str:
+    """Human-readable byte count (1.5 MB)"""
+    for unit in ('B', 'kB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+def _format_rows(rows: int) -> str:
+    """Human-readable row count (1.2M rows)"""
+    for divisor, suffix in ((1_000_000_000, 'B'), (1_000_000, 'M'), (1_000, 'k')):
+        if rows >= divisor:
+            return f"{rows / divisor:.1f}{suffix} rows"
+    return f"{rows} rows"
+
+
+# Index access methods that serve equality, range and ORDER BY on a key column
+INDEX_METHOD_OPERATIONS = {
+    'btree': {'eq', 'in', 'gt', 'gte', 'lt', 'lte', 'order'},
+    'hash': {'eq', 'in'},
+    'brin': {'eq', 'in', 'gt', 'gte', 'lt', 'lte'},
+}
+EQUALITY_FILTERS = ('eq', 'in')
+# Estimated rows from which a sequential scan is worth reporting as medium / high
+UNINDEXED_ROWS_MEDIUM = 10_000
+UNINDEXED_ROWS_HIGH = 1_000_000
+
+
+# Estimated size of a JSON value in a PostgREST response, by column type.
+# Strings are sized by column naming conventions: ids are UUIDs and *_at
+# columns are timestamps
+JSON_VALUE_BYTES = {
+    'number': 8,
+    'boolean': 5,
+    'string': 24,
+    'uuid': 38,
+    'timestamp': 34,
+    'Json': 128,
+    'array': 64,
+    'enum': 12,
+    'unknown': 24,
+}
+# Relations with at least this many columns are wide for select('*')
+WIDE_RELATION_COLUMNS = 15
+# Bytes per row from which a wide select('*') is reported as medium
+WIDE_ROW_BYTES_MEDIUM = 1024
+# Estimated response size from which an unbounded list query is high
+UNBOUNDED_RESPONSE_BYTES_HIGH = 10 * 1024 * 1024
+
+
+def _json_value_bytes(column: str, ts_type: str) -> int:
+    """Estimate the JSON size of a column value from its generated TypeScript type"""
+    value_type = ts_type.split(' | ')[0].strip()
+    if value_type.endswith('[]'):
+        return JSON_VALUE_BYTES['array']
+    if value_type.startswith('Database['):
+        return JSON_VALUE_BYTES['enum']
+    if value_type == 'string':
+        if column == 'id' or column.endswith('_id'):
+            return JSON_VALUE_BYTES['uuid']
+        if column.endswith(('_at', '_date', '_time')) or column in ('date', 'time'):
+            return JSON_VALUE_BYTES['timestamp']
+    return JSON_VALUE_BYTES.get(value_type, JSON_VALUE_BYTES['unknown'])
+
+
+def _selected_columns(select: str, relation: DatabaseTable) -> Tuple[List[str], int]:
+    """Get the relation columns a PostgREST select list returns, and the
+    number of embedded resources (rel(cols)) it also fetches"""
+    items: List[str] = []
+    depth = 0
+    start = 0
+    for i, char in enumerate(select + ','):
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            items.append(select[start:i].strip())
+            start = i + 1
+
+    columns: List[str] = []
+    embedded = 0
+    for item in items:
+        if '(' in item:
+            embedded += 1
+        elif item == '*':
+            columns.extend(relation.columns)
+        elif item:
+            # alias:column::cast->json_path
+            name = re.split(r"::|->", item)[0]
+            name = name.split(':')[-1].strip()
+            if name in relation.columns:
+                columns.append(name)
+    return list(dict.fromkeys(columns)), embedded
+
+
+COUNT_OPTION = re.compile(r"\bcount\s*:\s*['\"](?P<count>exact|planned|estimated)['\"]")
+HEAD_OPTION = re.compile(r"\bhead\s*:\s*true\b")
+# Estimated rows from which an exact count is a medium / high cost
+EXACT_COUNT_ROWS_MEDIUM = 10_000
+EXACT_COUNT_ROWS_HIGH = 1_000_000
+COST_CLASSES = ('low', 'medium', 'high')
 
 
 class MismatchDetector:
     """Detects mismatches between code and database schema"""
 
-    def __init__(self, db_parser: DatabaseSchemaParser, code_matches: List[CodeMatch]):
+    def __init__(
+        self,
+        db_parser: DatabaseSchemaParser,
+        code_matches: List[CodeMatch],
+        cache: Optional[ScanCache] = None
+    ):
         self.db_parser = db_parser
         self.code_matches = code_matches
+        self.cache = cache
         self.mismatches: List[Mismatch] = []
+        self.rechecked_files = 0
+        self._column_fragment_cache: Dict[str, bool] = {}
 
     def detect(self) -> List[Mismatch]:
         """Detect all mismatches"""
-        for match in self.code_matches:
-            if match.type == 'from':
-                self._check_table_or_view(match)
-            elif match.type == 'rpc':
-                self._check_rpc_function(match)
-            elif match.type == 'schema':
-                self._check_schema(match)
-            elif match.type == 'property_access':
-                self._check_property(match)
+        if self.cache is None:
+            for match in self.code_matches:
+                self._check_match(match)
+            return self.mismatches
+
+        # Matches of a file are contiguous; only files that were rescanned,
+        # or checked against another schema, need detection to rerun
+        for file, file_matches in groupby(self.code_matches, key=attrgetter('file')):
+            cached = self.cache.get_mismatches(file)
+            if cached is not None:
+                self.mismatches.extend(cached)
+                continue
+
+            start = len(self.mismatches)
+            for match in file_matches:
+                self._check_match(match)
+            self.cache.put_mismatches(file, self.mismatches[start:])
+            self.rechecked_files += 1
 
         return self.mismatches
 
+    def check(self, matches: Iterable[CodeMatch]) -> List[Mismatch]:
+        """Check matches on their own, leaving the detected mismatches untouched"""
+        start = len(self.mismatches)
+        for match in matches:
+            self._check_match(match)
+        found = self.mismatches[start:]
+        del self.mismatches[start:]
+        return found
+
+    def _check_match(self, match: CodeMatch) -> None:
+        """Run the check for a single code match"""
+        if match.type == 'from':
+            self._check_table_or_view(match)
+            self._check_query_in_loop(match)
+            self._check_filter_indexes(match)
+            self._check_payload(match)
+            self._check_exact_count(match)
+            self._check_waterfall(match)
+        elif match.type == 'rpc':
+            self._check_rpc_function(match)
+            self._check_query_in_loop(match)
+            self._check_waterfall(match)
+        elif match.type == 'schema':
+            self._check_schema(match)
+        elif match.type == 'property_access':
+            self._check_property(match)
+
     def _check_table_or_view(self, match: CodeMatch) -> None:
         """Check if a table or view exists"""
         schema = match.schema_name or 'public'
@@ -491,6 +1621,335 @@ class MismatchDetector:
             context=match.context
         ))
 
+    def _check_query_in_loop(self, match: CodeMatch) -> None:
+        """Check for a query issued once per iteration of a loop (N+1)"""
+        loop = match.loop
+        if not loop or not QUERY_MODULE_PATTERN.search(match.file):
+            return
+
+        call = f".from('{match.table_or_function}')" if match.type == 'from' else f".rpc('{match.table_or_function}')"
+        estimate = loop['estimated_fan_out']
+        fan_out = f"{loop['fan_out']}" + (f" (~{estimate})" if estimate is not None and str(estimate) != loop['fan_out'] else '')
+        concurrency = loop['concurrency']
+        if concurrency == 'parallel':
+            issue = f"{call} runs once per element in Promise.all(.map) at line {loop['line']}: {fan_out} concurrent queries"
+        elif concurrency == 'unawaited':
+            issue = (f"{call} runs once per element in the .{loop['kind']}() callback at line {loop['line']}: "
+                     f"{fan_out} queries started at once, not awaited together")
+        else:
+            issue = f"{call} runs once per iteration of the {loop['kind']} loop at line {loop['line']}: {fan_out} sequential queries"
+
+        if loop['batched']:
+            issue += ", one .in() batch each"
+            suggestion = ("Already batched with .in(); check the batch size keeps the fan-out small"
+                          + (", or run the batches with Promise.all" if concurrency == 'sequential' else ""))
+            severity = 'low'
+        elif match.type == 'from':
+            suggestion = (f"Fetch all rows in one query with .in(key, ids) (or a range filter) before the loop, "
+                          f"then group the result in code")
+            severity = 'high' if concurrency == 'sequential' else 'medium'
+        else:
+            suggestion = f"Pass all keys to one call: give {match.table_or_function} an array parameter"
+            severity = 'high' if concurrency == 'sequential' else 'medium'
+        if concurrency == 'unawaited' and not loop['batched']:
+            suggestion += "; if the calls must stay separate, await them with Promise.all so errors are not lost"
+
+        self.mismatches.append(Mismatch(
+            type='n_plus_one_query',
+            severity=severity,
+            file=match.file,
+            line=match.line,
+            code_element=match.table_or_function,
+            issue=issue,
+            suggestion=suggestion,
+            context=match.context,
+            details=dict(loop)
+        ))
+
+    def _check_waterfall(self, match: CodeMatch) -> None:
+        """Check for independent queries awaited one after another"""
+        waterfall = match.waterfall
+        if not waterfall or not WATERFALL_MODULE_PATTERN.search(match.file):
+            return
+
+        saved = waterfall['round_trips_saved']
+        lines = waterfall['lines']
+        self.mismatches.append(Mismatch(
+            type='sequential_await_waterfall',
+            severity='medium' if saved > 1 else 'low',
+            file=match.file,
+            line=match.line,
+            code_element=', '.join(waterfall['calls']),
+            issue=(f"{len(lines)} independent queries (lines {', '.join(map(str, lines))}) are awaited one "
+                   f"after another: {saved} serialized round trip{'s' if saved != 1 else ''} could overlap"),
+            suggestion="Start them together and await once: const [a, b] = await Promise.all([queryA, queryB])",
+            context=match.context,
+            details=dict(waterfall)
+        ))
+
+    def _check_filter_indexes(self, match: CodeMatch) -> None:
+        """Check that filters and orderings chained on a .from() have a usable index"""
+        filters = (match.query or {}).get('filters')
+        if not filters or not self.db_parser.relations:
+            return
+
+        schema = match.schema_name or 'public'
+        target = self.db_parser.indexed_relation(schema, match.table_or_function)
+        if target is None:
+            return
+        relation = self.db_parser.relations[target]
+        # Columns of the table (or materialized view) the indexes belong to
+        columns = self.db_parser.table_columns.get(target)
+        if columns is None:
+            view = self.db_parser.views.get(target[0], {}).get(target[1])
+            columns = set(view.columns) if view else None
+        equality = {f['column'] for f in filters if f['method'] in EQUALITY_FILTERS}
+
+        # Filters on plain columns; embedded resource and JSON path filters
+        # (and columns the relation does not have) are not checked
+        checked = [
+            f for f in filters
+            if '.' not in f['column'] and '->' not in f['column']
+            and (columns is None or f['column'] in columns)
+        ]
+        # One usable index is enough for the planner to avoid a full scan
+        if not checked or any(
+            self._has_index_for(relation['indexes'], f['column'], f['method'], equality) for f in checked
+        ):
+            return
+
+        rows = relation.get('estimated_rows')
+        if rows is None:
+            size_hint, severity = "size unknown (not analyzed)", 'medium'
+        else:
+            size_hint = f"~{_format_rows(rows)}"
+            if relation.get('total_bytes'):
+                size_hint += f", {_format_bytes(relation['total_bytes'])}"
+            severity = (
+                'high' if rows >= UNINDEXED_ROWS_HIGH
+                else 'medium' if rows >= UNINDEXED_ROWS_MEDIUM
+                else 'low'
+            )
+        table = '.'.join(target)
+        via = f" (via {schema}.{match.table_or_function})" if target != (schema, match.table_or_function) else ''
+
+        calls = list(dict.fromkeys(f".{f['method']}('{f['column']}')" for f in checked))
+        unindexed = list(dict.fromkeys(f['column'] for f in checked))
+        # Equality columns first, then the first range or ordering column
+        keys = [column for column in unindexed if column in equality]
+        keys += [column for column in unindexed if column not in equality][:1]
+        self.mismatches.append(Mismatch(
+            type='filter_on_unindexed_column',
+            severity=severity,
+            file=match.file,
+            line=checked[0]['line'],
+            code_element=table,
+            issue=(f"{', '.join(calls)} on {table}{via}: no index serves any of these filters "
+                   f"({size_hint}); expect a sequential scan"),
+            suggestion=f"CREATE INDEX ON {table} ({', '.join(keys)})",
+            context=checked[0]['context'],
+            details={
+                'table': table,
+                'columns': unindexed,
+                'estimated_rows': rows,
+                'total_bytes': relation.get('total_bytes'),
+            }
+        ))
+
+    @staticmethod
+    def _has_index_for(indexes: List[Dict[str, Any]], column: str, method: str, equality: Set[str]) -> bool:
+        """Check if an index can serve a filter or ordering on a column.
+
+        The column must be a key column whose preceding keys are all
+        equality-filtered in the same query. Partial indexes count as usable:
+        their predicates are not checked.
+        """
+        for index in indexes:
+            if method not in INDEX_METHOD_OPERATIONS.get(index['method'], ()):
+                continue
+            for key in index['columns']:
+                if key == column:
+                    return True
+                if key not in equality:
+                    break
+        return False
+
+    def _check_payload(self, match: CodeMatch) -> None:
+        """Check a read's response size: select('*') on wide relations and
+        list queries with no limit, range or single-row bound"""
+        query = match.query or {}
+        select = query.get('select')
+        modifiers = query.get('modifiers', [])
+        if not select or any(name in MUTATIONS for name in modifiers):
+            return
+        # head: true returns a count and no rows
+        if select['options'] and HEAD_OPTION.search(select['options']):
+            return
+
+        schema = match.schema_name or 'public'
+        name = match.table_or_function
+        relation = self.db_parser.get_view(schema, name) or self.db_parser.get_table(schema, name)
+        if relation is None:
+            return
+
+        rows = self.db_parser.estimated_rows(relation.schema, relation.name)
+        relation_name = f"{relation.schema}.{relation.name}"
+        # A column list the scanner cannot read has no width to estimate
+        if select['columns'] is None:
+            columns, embedded, row_bytes = None, 0, None
+            width = "columns not known statically"
+        else:
+            columns, embedded = _selected_columns(select['columns'], relation)
+            row_bytes = sum(len(column) + 4 + _json_value_bytes(column, relation.columns[column]) for column in columns)
+            embedded_note = f" plus {embedded} embedded resource{'s' if embedded != 1 else ''}" if embedded else ''
+            width = f"{len(columns)} columns{embedded_note}, ~{_format_bytes(row_bytes)} per row"
+
+        if select['columns'] == '*' and len(relation.columns) >= WIDE_RELATION_COLUMNS:
+            self.mismatches.append(Mismatch(
+                type='wide_select_star',
+                severity='medium' if row_bytes >= WIDE_ROW_BYTES_MEDIUM else 'low',
+                file=match.file,
+                line=select['line'],
+                code_element=relation_name,
+                issue=(f"select('*') on {relation_name} fetches all {len(relation.columns)} columns, "
+                       f"~{_format_bytes(row_bytes)} per row"),
+                suggestion="Select only the columns the caller uses",
+                context=select['context'],
+                details={
+                    'columns': len(relation.columns),
+                    'bytes_per_row': row_bytes,
+                    'estimated_rows': rows,
+                    'estimated_response_bytes': None,
+                }
+            ))
+
+        if any(name in BOUNDING_MODIFIERS for name in modifiers) or self._selects_unique_row(match):
+            return
+
+        # Without filters the whole relation comes back; with them, an
+        # unknown share of it, so the relation size is only an upper bound
+        filtered = bool(query.get('filters'))
+        response_bytes = rows * row_bytes if rows is not None and row_bytes is not None else None
+        if rows is None:
+            size_hint, severity = "row count unknown", 'low'
+        elif response_bytes is None:
+            size_hint = f"{'filtered from' if filtered else 'all of'} ~{_format_rows(rows)}"
+            severity = 'medium' if rows >= UNINDEXED_ROWS_MEDIUM else 'low'
+        else:
+            size_hint = f"{'filtered from' if filtered else 'all of'} ~{_format_rows(rows)}, up to ~{_format_bytes(response_bytes)}"
+            severity = (
+                'high' if response_bytes >= UNBOUNDED_RESPONSE_BYTES_HIGH and not filtered
+                else 'medium' if rows >= UNINDEXED_ROWS_MEDIUM
+                else 'low'
+            )
+        self.mismatches.append(Mismatch(
+            type='unbounded_list_query',
+            severity=severity,
+            file=match.file,
+            line=match.line,
+            code_element=relation_name,
+            issue=(f"List query on {relation_name} has no .limit(), .range() or .single(): "
+                   f"{width} ({size_hint})"),
+            suggestion="Page the results with .range(from, to) or cap them with .limit(n)",
+            context=match.context,
+            details={
+                'columns': len(columns) if columns is not None else None,
+                'bytes_per_row': row_bytes,
+                'estimated_rows': rows,
+                'estimated_response_bytes': response_bytes,
+            }
+        ))
+
+    def _check_exact_count(self, match: CodeMatch) -> None:
+        """Audit a select with { count: 'exact' }, which makes PostgREST run a
+        full COUNT(*) of the filtered relation alongside the query"""
+        query = match.query or {}
+        select = query.get('select')
+        options = select and select['options']
+        count = COUNT_OPTION.search(options) if options else None
+        # Mutations count the rows they touch, which costs nothing extra
+        if not count or count.group('count') != 'exact' or any(
+            name in MUTATIONS for name in query.get('modifiers', [])
+        ):
+            return
+
+        schema = match.schema_name or 'public'
+        name = match.table_or_function
+        relation = self.db_parser.get_view(schema, name) or self.db_parser.get_table(schema, name)
+        if relation is not None:
+            schema, name = relation.schema, relation.name
+        kind = relation.type if relation else 'unknown'
+        joins = {'table': False, 'view': self.db_parser.view_joins(schema, name)}.get(kind)
+        rows = self.db_parser.estimated_rows(schema, name)
+        filtered = bool(query.get('filters'))
+
+        if rows is not None:
+            cost = 2 if rows >= EXACT_COUNT_ROWS_HIGH else 1 if rows >= EXACT_COUNT_ROWS_MEDIUM else 0
+        else:
+            cost = 1
+        if joins:
+            cost += 1  # the count runs the view's joins over every counted row
+        if filtered and cost and self._filter_uses_index(match):
+            cost -= 1  # only the matching rows are counted, through the index
+        cost_class = COST_CLASSES[min(cost, len(COST_CLASSES) - 1)]
+
+        # A filtered count can be small enough to stay exact, which
+        # 'estimated' does up to db-max-rows; an unfiltered count is what the
+        # planner's statistics already know
+        suggested = 'estimated' if filtered else 'planned'
+        notes = [f"~{_format_rows(rows)}" if rows is not None else "row count unknown"]
+        if kind == 'view':
+            notes.append('joins several relations' if joins else 'single relation' if joins is False else 'joins unknown')
+        notes.append('filtered' if filtered else 'unfiltered')
+        head = bool(HEAD_OPTION.search(options))
+        notes.append('count only' if head else 'rows and total count')
+
+        self.mismatches.append(Mismatch(
+            type='exact_count',
+            severity=cost_class,
+            file=match.file,
+            line=select['line'],
+            code_element=f"{schema}.{name}",
+            issue=(f"count: 'exact' on {'relation' if kind == 'unknown' else kind} {schema}.{name} "
+                   f"({', '.join(notes)}) runs a full COUNT(*) on every request"),
+            suggestion=(f"Use count: '{suggested}' unless the UI needs the exact total"
+                        + ("" if cost_class != 'low' else "; exact is cheap here")),
+            context=select['context'],
+            details={
+                'relation_kind': kind,
+                'joins': joins,
+                'estimated_rows': rows,
+                'filtered': filtered,
+                'head': head,
+                'cost_class': cost_class,
+                'suggested_count': suggested,
+            }
+        ))
+
+    def _filter_uses_index(self, match: CodeMatch) -> bool:
+        """Check if an index from the manifest serves any filter of a query"""
+        target = self.db_parser.indexed_relation(match.schema_name or 'public', match.table_or_function)
+        if target is None:
+            return False
+        filters = match.query['filters']
+        equality = {f['column'] for f in filters if f['method'] in EQUALITY_FILTERS}
+        indexes = self.db_parser.relations[target]['indexes']
+        return any(self._has_index_for(indexes, f['column'], f['method'], equality) for f in filters)
+
+    def _selects_unique_row(self, match: CodeMatch) -> bool:
+        """Check if equality filters pin a query to one row (or one per key):
+        an id filter, or every column of a unique index"""
+        equality = {f['column'] for f in (match.query or {}).get('filters', []) if f['method'] in EQUALITY_FILTERS}
+        if 'id' in equality:
+            return True
+        target = self.db_parser.indexed_relation(match.schema_name or 'public', match.table_or_function)
+        if target is None:
+            return False
+        return any(
+            index['unique'] and not index['partial'] and set(index['columns']) <= equality
+            for index in self.db_parser.relations[target]['indexes']
+        )
+
     def _check_schema(self, match: CodeMatch) -> None:
         """Check if a schema exists"""
         schema = match.schema_name
@@ -507,6 +1966,14 @@ class MismatchDetector:
                 context=match.context
             ))
 
+    def _contains_column(self, prop: str) -> bool:
+        """Check if any table column name occurs in a property name (memoized)"""
+        found = self._column_fragment_cache.get(prop)
+        if found is None:
+            found = prop in self.db_parser.all_table_columns or self.db_parser.column_fragment_in(prop)
+            self._column_fragment_cache[prop] = found
+        return found
+
     def _check_property(self, match: CodeMatch) -> None:
         """Check if a property exists on database rows"""
         # This is simplified - would need to track context to know which table
@@ -518,11 +1985,7 @@ class MismatchDetector:
             return
 
         # SQL-like properties that might not exist
-        if '_' in prop and not any(
-            col in prop for schema_tables in self.db_parser.tables.values()
-            for table in schema_tables.values()
-            for col in table.columns
-        ):
+        if '_' in prop and not self._contains_column(prop):
             # Might be a computed property or joined data - low severity
             self.mismatches.append(Mismatch(
                 type='property_possibly_not_found',
@@ -536,19 +1999,120 @@ class MismatchDetector:
             ))
 
 
+REPORT_FORMAT_VERSION = 2
+
+
+class MismatchRows(Sequence):
+    """The 'mismatches' section of a report: a read-only view of the
+    mismatch list whose rows are converted with asdict() as they are read.
+
+    The report never holds a second copy of every mismatch; the writer
+    serializes one row at a time, and in-process readers index it like the
+    list of dicts a loaded report has.
+    """
+
+    def __init__(self, mismatches: List[Mismatch]):
+        self._mismatches = mismatches
+
+    def __len__(self) -> int:
+        return len(self._mismatches)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [asdict(m) for m in self._mismatches[index]]
+        return asdict(self._mismatches[index])
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return (asdict(m) for m in self._mismatches)
+
+
+class ReportWriter:
+    """Streams a JSON object to a file handle one key at a time.
+
+    Row sections (lists of mismatches, maps of index arrays) are encoded a
+    row at a time, so the serialized report never exists as one string.
+    Pretty mode puts each row on its own line; compact mode drops all
+    optional whitespace.
+    """
+
+    def __init__(self, handle, compact: bool = False):
+        self.handle = handle
+        self.compact = compact
+        self._encode = json.JSONEncoder(
+            separators=(',', ':') if compact else (', ', ': ')
+        ).encode
+        self._keys_written = 0
+
+    def _newline(self, depth: int) -> str:
+        return '' if self.compact else '\n' + '  ' * depth
+
+    def _write_key(self, key: str) -> None:
+        separator = ',' if self._keys_written else ''
+        colon = ':' if self.compact else ': '
+        self.handle.write(f"{separator}{self._newline(1)}{self._encode(key)}{colon}")
+        self._keys_written += 1
+
+    def begin(self) -> None:
+        self.handle.write('{')
+
+    def end(self) -> None:
+        self.handle.write(self._newline(0) + '}\n')
+
+    def write_value(self, key: str, value: Any, inline: bool = False) -> None:
+        """Write a small section as a single nested value"""
+        self._write_key(key)
+        if self.compact or inline:
+            self.handle.write(self._encode(value))
+        else:
+            self.handle.write(json.dumps(value, indent=2).replace('\n', self._newline(1)))
+
+    def write_rows(self, key: str, rows: Iterable[Any]) -> None:
+        """Write a list section, encoding one row at a time"""
+        self._write_key(key)
+        self.handle.write('[')
+        empty = True
+        for row in rows:
+            self.handle.write(('' if empty else ',') + self._newline(2) + self._encode(row))
+            empty = False
+        self.handle.write((']' if empty else self._newline(1) + ']'))
+
+    def write_row_map(self, key: str, rows: Dict[str, Any]) -> None:
+        """Write an object section, encoding one entry per row"""
+        self._write_key(key)
+        self.handle.write('{')
+        colon = ':' if self.compact else ': '
+        for i, (name, value) in enumerate(rows.items()):
+            self.handle.write(
+                (',' if i else '') + self._newline(2) + self._encode(name) + colon + self._encode(value)
+            )
+        self.handle.write(('}' if not rows else self._newline(1) + '}'))
+
+
 class ScannerReporter:
     """Generates reports from scan results"""
 
+    # Sections that index into the flat mismatch list (report format v2)
+    INDEX_SECTIONS = ('mismatches_by_type', 'mismatches_by_file', 'critical_mismatches', 'payload_ranking')
+    # 'count_audit' also holds indexes, in its 'sites' list
+    # Mismatch types ranked by expected response size in 'payload_ranking'
+    PAYLOAD_TYPES = ('wide_select_star', 'unbounded_list_query')
+
     @staticmethod
-    def generate_json_report(
+    def build_report(
         db_parser: DatabaseSchemaParser,
         code_matches: List[CodeMatch],
-        mismatches: List[Mismatch],
-        output_path: str
-    ) -> None:
-        """Generate a comprehensive JSON report"""
+        mismatches: List[Mismatch]
+    ) -> Dict[str, Any]:
+        """Build the comprehensive report as an in-memory dict.
+
+        'mismatches' is a MismatchRows view of the mismatch list, so only
+        the summaries and index sections are built here; the type, file and
+        critical groupings hold indexes into it.
+        """
+        severities = Counter(m.severity for m in mismatches)
 
         report = {
+            'format_version': REPORT_FORMAT_VERSION,
             'metadata': {
                 'title': 'Database Schema vs Frontend Code Mismatch Report',
                 'description': 'Scan of TypeScript/TSX code against Supabase database schema',
@@ -572,43 +2136,95 @@ class ScannerReporter:
             },
             'mismatch_summary': {
                 'total_mismatches': len(mismatches),
-                'critical': sum(1 for m in mismatches if m.severity == 'critical'),
-                'high': sum(1 for m in mismatches if m.severity == 'high'),
-                'medium': sum(1 for m in mismatches if m.severity == 'medium'),
-                'low': sum(1 for m in mismatches if m.severity == 'low'),
+                'critical': severities['critical'],
+                'high': severities['high'],
+                'medium': severities['medium'],
+                'low': severities['low'],
             },
-            'mismatches_by_type': {},
-            'mismatches_by_file': {},
-            'critical_mismatches': [],
-            'all_mismatches': []
+            'mismatches': MismatchRows(mismatches),
+            'mismatches_by_type': defaultdict(list),
+            'mismatches_by_file': defaultdict(list),
+            'critical_mismatches': []
         }
 
-        # Organize by type
-        for mismatch in mismatches:
-            mtype = mismatch.type
-            if mtype not in report['mismatches_by_type']:
-                report['mismatches_by_type'][mtype] = []
-            report['mismatches_by_type'][mtype].append(asdict(mismatch))
+        for i, mismatch in enumerate(mismatches):
+            report['mismatches_by_type'][mismatch.type].append(i)
+            report['mismatches_by_file'][mismatch.file].append(i)
+            if mismatch.severity == 'critical':
+                report['critical_mismatches'].append(i)
+
+        report['mismatches_by_type'] = dict(report['mismatches_by_type'])
+        report['mismatches_by_file'] = dict(report['mismatches_by_file'])
+
+        # Over-fetching sites, largest expected response first; without a row
+        # estimate the size of one row decides
+        report['payload_ranking'] = sorted(
+            (i for i, m in enumerate(mismatches) if m.type in ScannerReporter.PAYLOAD_TYPES),
+            key=lambda i: (
+                mismatches[i].details['estimated_response_bytes'] or 0,
+                mismatches[i].details['bytes_per_row'] or 0,
+            ),
+            reverse=True,
+        )
+        report['count_audit'] = ScannerReporter.build_count_audit(mismatches)
+
+        return report
 
-        # Organize by file
-        for mismatch in mismatches:
-            file = mismatch.file
-            if file not in report['mismatches_by_file']:
-                report['mismatches_by_file'][file] = []
-            report['mismatches_by_file'][file].append(asdict(mismatch))
-
-        # Extract critical mismatches
-        report['critical_mismatches'] = [
-            asdict(m) for m in mismatches if m.severity == 'critical'
-        ]
+    @staticmethod
+    def build_count_audit(mismatches: List[Mismatch]) -> Dict[str, Any]:
+        """Summarize the count: 'exact' sites, costliest first in 'sites'
+        (indexes into the mismatch list)"""
+        sites = [i for i, m in enumerate(mismatches) if m.type == 'exact_count']
+        sites.sort(key=lambda i: (
+            COST_CLASSES.index(mismatches[i].details['cost_class']),
+            mismatches[i].details['estimated_rows'] or 0,
+        ), reverse=True)
+        details = [mismatches[i].details for i in sites]
+        by_relation = Counter(mismatches[i].code_element for i in sites)
+        return {
+            'total_sites': len(sites),
+            'by_cost_class': {cost: sum(1 for d in details if d['cost_class'] == cost) for cost in reversed(COST_CLASSES)},
+            'by_suggestion': dict(Counter(d['suggested_count'] for d in details)),
+            'by_relation_kind': dict(Counter(
+                'view_with_joins' if d['joins'] else d['relation_kind'] for d in details
+            )),
+            'by_relation': dict(by_relation.most_common()),
+            'sites': sites,
+        }
 
-        # All mismatches
-        report['all_mismatches'] = [asdict(m) for m in mismatches]
+    @staticmethod
+    def write_json_report(report: Dict[str, Any], output_path: str, compact: bool = False) -> None:
+        """Stream a report to disk, replacing any previous report atomically"""
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        tmp_path = output_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            writer = ReportWriter(f, compact=compact)
+            writer.begin()
+            for key, value in report.items():
+                if key == 'mismatches':
+                    writer.write_rows(key, value)
+                elif key in ('critical_mismatches', 'payload_ranking'):
+                    writer.write_value(key, value, inline=True)
+                elif key in ScannerReporter.INDEX_SECTIONS:
+                    writer.write_row_map(key, value)
+                else:
+                    writer.write_value(key, value)
+            writer.end()
+        os.replace(tmp_path, output_path)
+
+    @staticmethod
+    def generate_json_report(
+        db_parser: DatabaseSchemaParser,
+        code_matches: List[CodeMatch],
+        mismatches: List[Mismatch],
+        output_path: str,
+        compact: bool = False
+    ) -> Dict[str, Any]:
+        """Generate a comprehensive JSON report, returning it for in-process use"""
+        report = ScannerReporter.build_report(db_parser, code_matches, mismatches)
 
         # Write report
-        os.makedirs(os.path.dirname(output_path), exist_ok=True)
-        with open(output_path, 'w') as f:
-            json.dump(report, f, indent=2)
+        ScannerReporter.write_json_report(report, output_path, compact=compact)
 
         print(f"✅ Report generated: {output_path}")
         print(f"   Total mismatches: {len(mismatches)}")
@@ -617,6 +2233,8 @@ class ScannerReporter:
         print(f"   Medium: {report['mismatch_summary']['medium']}")
         print(f"   Low: {report['mismatch_summary']['low']}")
 
+        return report
+
     @staticmethod
     def print_summary(mismatches: List[Mismatch]) -> None:
         """Print a summary to console"""
@@ -642,38 +2260,88 @@ class ScannerReporter:
         print("\n" + "="*80)
 
 
-def main():
-    """Main entry point"""
-    # Get root path
-    root_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+def parse_args() -> argparse.Namespace:
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(
+        description="Scan TypeScript/TSX code for mismatches against the Supabase database schema"
+    )
+    parser.add_argument(
+        '--jobs', '-j',
+        type=int,
+        default=1,
+        help="Number of worker processes for scanning files (0 = one per CPU core, default: 1)",
+    )
+    parser.add_argument(
+        '--no-cache',
+        dest='use_cache',
+        action='store_false',
+        help="Rescan every file instead of reusing results for unchanged files",
+    )
+    parser.add_argument(
+        '--cache-dir',
+        default=None,
+        help="Directory for the incremental scan cache (default: .cache/schema-scan)",
+    )
+    parser.add_argument(
+        '--compact',
+        action='store_true',
+        help="Write the JSON report without indentation or line breaks",
+    )
+    parser.add_argument(
+        '--watch',
+        action='store_true',
+        help="After the initial scan, keep rescanning changed files and print new and resolved mismatches",
+    )
+    parser.add_argument(
+        '--poll-interval',
+        type=float,
+        default=0.2,
+        help="Seconds between file checks in --watch mode when watchdog is not installed (default: 0.2)",
+    )
+    return parser.parse_args()
+
+
+class ScanError(RuntimeError):
+    """Raised when a stage of the scan fails"""
+
+
+def run_scan(
+    root_path: str,
+    jobs: int = 1,
+    use_cache: bool = True,
+    cache_dir: Optional[str] = None
+) -> Tuple[DatabaseSchemaParser, List[CodeMatch], List[Mismatch]]:
+    """Parse the schema, scan the code and detect mismatches, reporting progress"""
     db_types_path = os.path.join(root_path, 'lib', 'types', 'database.types.ts')
-    output_path = os.path.join(root_path, 'docs', 'schema-scan-report.json')
-
-    print("🔍 Database Schema Scanner & Mismatch Detector")
-    print("="*80)
-    print(f"Root path: {root_path}")
-    print(f"Database types: {db_types_path}")
-    print(f"Output: {output_path}")
-    print()
+    cache_dir = cache_dir or os.path.join(root_path, '.cache', 'schema-scan')
+    snapshot_path = os.path.join(cache_dir, SCHEMA_SNAPSHOT_FILE) if use_cache else None
 
     # Parse database schema
     print("📊 Parsing database schema...")
     try:
         db_parser = DatabaseSchemaParser(db_types_path)
-        db_parser.parse()
+        db_parser.parse(snapshot_path=snapshot_path)
         print(f"   ✅ Found {len(db_parser.schemas)} schemas")
         print(f"   ✅ Found {sum(len(t) for t in db_parser.tables.values())} tables")
         print(f"   ✅ Found {sum(len(v) for v in db_parser.views.values())} views")
         print(f"   ✅ Found {sum(len(f) for f in db_parser.functions.values())} RPC functions")
+        if db_parser.relations:
+            print(f"   ✅ Loaded index manifest ({len(db_parser.relations)} relations)")
     except Exception as e:
         print(f"   ❌ Error parsing database schema: {e}")
-        sys.exit(1)
+        raise ScanError(f"Error parsing database schema: {e}") from e
+
+    cache: Optional[ScanCache] = None
+    if use_cache:
+        cache = ScanCache(cache_dir, db_parser.content_hash)
 
     # Scan code
     print("\n🔎 Scanning TypeScript/TSX files for database access...")
     try:
-        scanner = CodeScanner(root_path)
+        scanner = CodeScanner(root_path, jobs=jobs, cache=cache)
         matches = scanner.scan()
+        if cache:
+            print(f"   ✅ Rescanned {scanner.rescanned_files} changed files (others from cache)")
         print(f"   ✅ Found {len(matches)} database access patterns")
         from_calls = sum(1 for m in matches if m.type == 'from')
         rpc_calls = sum(1 for m in matches if m.type == 'rpc')
@@ -683,13 +2351,16 @@ def main():
         print(f"      - {schema_calls} .schema() calls")
     except Exception as e:
         print(f"   ❌ Error scanning code: {e}")
-        sys.exit(1)
+        raise ScanError(f"Error scanning code: {e}") from e
 
     # Detect mismatches
     print("\n🔗 Detecting mismatches...")
     try:
-        detector = MismatchDetector(db_parser, matches)
+        detector = MismatchDetector(db_parser, matches, cache=cache)
         mismatches = detector.detect()
+        if cache:
+            cache.close()
+            print(f"   ✅ Re-checked {detector.rechecked_files} files (others from cache)")
         print(f"   ✅ Found {len(mismatches)} mismatches")
         critical = sum(1 for m in mismatches if m.severity == 'critical')
         high = sum(1 for m in mismatches if m.severity == 'high')
@@ -701,19 +2372,272 @@ def main():
         print(f"      - {low} low")
     except Exception as e:
         print(f"   ❌ Error detecting mismatches: {e}")
-        sys.exit(1)
+        raise ScanError(f"Error detecting mismatches: {e}") from e
+
+    return db_parser, matches, mismatches
+
+
+class ScanWatcher:
+    """Keeps a scan resident in memory and rescans files as they change.
+
+    Matches and mismatches are held per file. A change to a source file
+    rescans and rechecks only that file; a change to database.types.ts
+    reparses the schema and rechecks the resident matches without touching
+    any source file. Each batch of changes prints the mismatches it added
+    and resolved.
+
+    File events come from watchdog when it is installed; otherwise the
+    watched directories are polled for mtime/size changes.
+    """
+
+    WATCH_DIRS = ('app', 'features', 'lib')
+    # Editors often write a file in several steps; events this close
+    # together are handled as one batch
+    DEBOUNCE_SECONDS = 0.05
+
+    def __init__(
+        self,
+        root_path: str,
+        db_parser: DatabaseSchemaParser,
+        matches: List[CodeMatch],
+        mismatches: List[Mismatch],
+        poll_interval: float = 0.2
+    ):
+        self.root_path = root_path
+        self.db_parser = db_parser
+        self.poll_interval = poll_interval
+        self.scanner = CodeScanner(root_path)
+        self.detector = MismatchDetector(db_parser, [])
+        self.watch_dirs = [
+            os.path.join(root_path, d) for d in self.WATCH_DIRS
+            if os.path.isdir(os.path.join(root_path, d))
+        ]
+
+        self.file_matches: Dict[str, List[CodeMatch]] = {
+            file: list(group) for file, group in groupby(matches, key=attrgetter('file'))
+        }
+        self.file_mismatches: Dict[str, List[Mismatch]] = defaultdict(list)
+        for mismatch in mismatches:
+            self.file_mismatches[mismatch.file].append(mismatch)
+
+    def watch(self) -> None:
+        """Watch for changes until interrupted"""
+        try:
+            batches = self._watchdog_batches()
+            mode = 'watchdog'
+        except ImportError:
+            batches = self._polling_batches()
+            mode = f"polling every {self.poll_interval * 1000:.0f} ms"
+
+        print(f"\n👀 Watching {', '.join(self.WATCH_DIRS)} for changes ({mode}). Press Ctrl+C to stop.")
+        try:
+            for changed in batches:
+                self.apply_changes(changed)
+        except KeyboardInterrupt:
+            print("\n👋 Stopped watching")
+
+    def apply_changes(self, changed: Set[str]) -> None:
+        """Rescan changed files (absolute paths) and print the mismatch delta"""
+        start = time.perf_counter()
+        before = {file: self.file_mismatches.get(file, []) for file in self.file_matches}
+
+        if changed.intersection(self.db_parser.source_paths):
+            self._reload_schema()
+            dirty = set(self.file_matches)
+        else:
+            dirty = set()
+
+        for file_path in changed:
+            if not file_path.endswith(('.ts', '.tsx')):
+                continue
+            file = self.scanner._relative_path(file_path)
+            before.setdefault(file, self.file_mismatches.get(file, []))
+            if os.path.exists(file_path):
+                self.file_matches[file] = self.scanner._scan_file(file_path)
+            else:
+                self.file_matches.pop(file, None)
+            dirty.add(file)
+
+        for file in dirty:
+            found = self.detector.check(self.file_matches.get(file, []))
+            if found:
+                self.file_mismatches[file] = found
+            else:
+                self.file_mismatches.pop(file, None)
+
+        elapsed = (time.perf_counter() - start) * 1000
+        self._print_delta(before, dirty, len(changed), elapsed)
+
+    def _reload_schema(self) -> None:
+        """Reparse database.types.ts and reset the checks that depend on it"""
+        self.db_parser = DatabaseSchemaParser(self.db_parser.path)
+        self.db_parser.parse()
+        self.detector = MismatchDetector(self.db_parser, [])
+        print(f"\n📊 Schema reloaded: {sum(len(t) for t in self.db_parser.tables.values())} tables, "
+              f"{sum(len(v) for v in self.db_parser.views.values())} views, "
+              f"{sum(len(f) for f in self.db_parser.functions.values())} RPC functions")
+
+    @staticmethod
+    def _mismatch_key(mismatch: Mismatch) -> tuple:
+        """Identity of a mismatch that survives edits shifting its line"""
+        return (mismatch.type, mismatch.code_element, mismatch.issue, mismatch.context)
+
+    def _print_delta(
+        self,
+        before: Dict[str, List[Mismatch]],
+        dirty: Set[str],
+        changed_count: int,
+        elapsed_ms: float
+    ) -> None:
+        """Print mismatches added and resolved by a batch of changes"""
+        added: List[Mismatch] = []
+        resolved: List[Mismatch] = []
+        for file in sorted(dirty):
+            old = before.get(file, [])
+            new = self.file_mismatches.get(file, [])
+            old_keys = Counter(self._mismatch_key(m) for m in old)
+            new_keys = Counter(self._mismatch_key(m) for m in new)
+            added.extend(m for m in new if self._take(new_keys - old_keys, m))
+            resolved.extend(m for m in old if self._take(old_keys - new_keys, m))
+
+        total = sum(len(found) for found in self.file_mismatches.values())
+        stamp = time.strftime('%H:%M:%S')
+        print(f"\n[{stamp}] {changed_count} changed, {len(dirty)} rechecked in {elapsed_ms:.0f} ms: "
+              f"+{len(added)} new, -{len(resolved)} resolved, {total} total")
+        for m in added:
+            print(f"  + [{m.severity}] {m.file}:{m.line}")
+            print(f"      {m.issue}")
+        for m in resolved:
+            print(f"  - [{m.severity}] {m.file}:{m.line}")
+            print(f"      {m.issue}")
+
+    @classmethod
+    def _take(cls, remaining: Counter, mismatch: Mismatch) -> bool:
+        """Consume one occurrence of a mismatch from a multiset difference"""
+        key = cls._mismatch_key(mismatch)
+        if remaining[key] > 0:
+            remaining[key] -= 1
+            return True
+        return False
+
+    def _is_watched(self, path: str) -> bool:
+        return path.endswith(('.ts', '.tsx')) or path in self.db_parser.source_paths
+
+    def _watchdog_batches(self) -> Iterator[Set[str]]:
+        """Yield batches of changed paths reported by watchdog.
+
+        Raises ImportError (before yielding) when watchdog is not installed.
+        """
+        from watchdog.events import FileSystemEventHandler
+        from watchdog.observers import Observer
+
+        events: 'queue.Queue[str]' = queue.Queue()
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                if event.is_directory:
+                    return
+                events.put(event.src_path)
+                dest_path = getattr(event, 'dest_path', '')
+                if dest_path:
+                    events.put(dest_path)
+
+        observer = Observer()
+        for directory in self.watch_dirs:
+            observer.schedule(Handler(), directory, recursive=True)
+        observer.start()
+        return self._drain_events(observer, events)
+
+    def _drain_events(self, observer, events: 'queue.Queue[str]') -> Iterator[Set[str]]:
+        try:
+            while True:
+                changed = {events.get()}
+                deadline = time.monotonic() + self.DEBOUNCE_SECONDS
+                while (remaining := deadline - time.monotonic()) > 0:
+                    try:
+                        changed.add(events.get(timeout=remaining))
+                    except queue.Empty:
+                        break
+                changed = {os.path.abspath(p) for p in changed if self._is_watched(os.path.abspath(p))}
+                if changed:
+                    yield changed
+        finally:
+            observer.stop()
+            observer.join()
+
+    def _stat_files(self) -> Dict[str, Tuple[int, int]]:
+        """Get (mtime_ns, size) of every watched file"""
+        stats = {}
+        for directory in self.watch_dirs:
+            for root, dirs, files in os.walk(directory):
+                dirs[:] = [d for d in dirs if d not in ['node_modules', '.next', '.git', 'dist']]
+                for file in files:
+                    path = os.path.join(root, file)
+                    if not self._is_watched(path):
+                        continue
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    stats[path] = (st.st_mtime_ns, st.st_size)
+        return stats
+
+    def _polling_batches(self) -> Iterator[Set[str]]:
+        """Yield batches of changed paths found by polling file stats"""
+        previous = self._stat_files()
+        while True:
+            time.sleep(self.poll_interval)
+            current = self._stat_files()
+            changed = {
+                path for path in previous.keys() | current.keys()
+                if previous.get(path) != current.get(path)
+            }
+            previous = current
+            if changed:
+                yield changed
+
+
+def main():
+    """Main entry point"""
+    args = parse_args()
+    jobs = args.jobs or os.cpu_count() or 1
+
+    # Get root path
+    root_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    db_types_path = os.path.join(root_path, 'lib', 'types', 'database.types.ts')
+    output_path = os.path.join(root_path, 'docs', 'schema-scan-report.json')
+
+    print("🔍 Database Schema Scanner & Mismatch Detector")
+    print("="*80)
+    print(f"Root path: {root_path}")
+    print(f"Database types: {db_types_path}")
+    print(f"Output: {output_path}")
+    print(f"Scan workers: {jobs}")
+    print()
+
+    try:
+        db_parser, matches, mismatches = run_scan(
+            root_path, jobs=jobs, use_cache=args.use_cache, cache_dir=args.cache_dir
+        )
+    except ScanError:
+        return 1
 
     # Generate report
     print("\n📄 Generating JSON report...")
     try:
-        ScannerReporter.generate_json_report(db_parser, matches, mismatches, output_path)
+        ScannerReporter.generate_json_report(
+            db_parser, matches, mismatches, output_path, compact=args.compact
+        )
     except Exception as e:
         print(f"   ❌ Error generating report: {e}")
-        sys.exit(1)
+        return 1
 
     # Print summary
     ScannerReporter.print_summary(mismatches)
 
+    if args.watch:
+        ScanWatcher(root_path, db_parser, matches, mismatches, poll_interval=args.poll_interval).watch()
+
     return 0
 
 
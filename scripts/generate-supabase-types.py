@@ -9,20 +9,32 @@ definitions for the ENORAE codebase. It relies on the credentials stored in
 from __future__ import annotations
 
 import argparse
+import asyncio
+from abc import ABC, abstractmethod
+import difflib
+import hashlib
+import importlib.util
+import json
 import os
 import re
 import shutil
+import signal
 import subprocess
 import sys
-import textwrap
+import time
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional, Sequence
+from typing import Awaitable, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 ENV_FILE = PROJECT_ROOT / ".env.local"
 CONFIG_FILE = PROJECT_ROOT / "supabase" / "config.toml"
 OUTPUT_FILE = PROJECT_ROOT / "lib" / "types" / "database.types.ts"
+SCANNER_SCRIPT = PROJECT_ROOT / "scripts" / "database-schema-scanner.py"
+SCHEMA_SNAPSHOT_FILE = PROJECT_ROOT / ".cache" / "schema-scan" / "schema-model.bin"
+# Indexes and size estimates of the introspected tables, written next to the
+# types file, where the schema scanner looks for it
+INDEX_MANIFEST_FILE = "database.indexes.json"
 PROJECT_ID = "nwmcpfioxerzodvbjigw"
 REQUIRED_ENV_VARS: Sequence[str] = (
     "SUPABASE_ACCESS_TOKEN",
@@ -61,7 +73,75 @@ def parse_args() -> argparse.Namespace:
         default=None,
         help="Optional Postgres connection string to use when remote generation fails",
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--diff",
+        dest="diff",
+        action="store_true",
+        help="Print the tables, columns, enums and functions that would change, without writing",
+    )
+    parser.add_argument(
+        "--strategy",
+        dest="strategy",
+        choices=("serial", "race"),
+        default="serial",
+        help="serial: try the remote CLI, the CLI with --db-url, then psycopg, each after the previous "
+        "fails (default); race: run them concurrently and keep the first success",
+    )
+    parser.add_argument(
+        "--timeout",
+        dest="timeouts",
+        action="append",
+        type=strategy_timeout,
+        default=[],
+        metavar="STRATEGY=SECONDS",
+        help="Time limit for one strategy in --strategy race (remote, direct or psycopg; defaults: "
+        + " ".join(f"{name}={seconds:g}" for name, seconds in DEFAULT_STRATEGY_TIMEOUTS.items())
+        + ")",
+    )
+    parser.add_argument(
+        "--shard",
+        dest="shard",
+        action="store_true",
+        help="Write one file per schema (database.<schema>.types.ts) behind a barrel at --output; "
+        "uses the direct database connection",
+    )
+    snapshot = parser.add_mutually_exclusive_group()
+    snapshot.add_argument(
+        "--snapshot-out",
+        dest="snapshot_out",
+        type=Path,
+        default=None,
+        help="Write the introspected catalog rows to a JSON snapshot and exit (uses the direct database connection)",
+    )
+    snapshot.add_argument(
+        "--snapshot-in",
+        dest="snapshot_in",
+        type=Path,
+        default=None,
+        help="Render types from a catalog snapshot written by --snapshot-out, without connecting anywhere",
+    )
+    parser.add_argument(
+        "--verify-format",
+        dest="verify_format",
+        action="store_true",
+        help=f"Check the generated types against prettier@{PRETTIER_VERSION} (needs npx) and fail on differences",
+    )
+    parser.add_argument(
+        "--index-manifest",
+        dest="index_manifest",
+        type=Path,
+        default=None,
+        metavar="PATH",
+        help=(
+            "Where to write the index manifest (indexes and table size estimates) for the schema scanner, "
+            "whenever the catalog is introspected or read from --snapshot-in "
+            f"(default: {INDEX_MANIFEST_FILE} next to --output)"
+        ),
+    )
+    args = parser.parse_args()
+    if args.index_manifest is None:
+        args.index_manifest = args.output.with_name(INDEX_MANIFEST_FILE)
+    return args
 
 
 class GenerationError(RuntimeError):
@@ -138,13 +218,13 @@ def merge_schemas(*schema_iterables: Iterable[str]) -> List[str]:
     return result
 
 
-def run_supabase_gen(
+def supabase_gen_command(
     cli_cmd: Sequence[str],
     schemas: Iterable[str],
     *,
     project_ref: Optional[str] = None,
     db_url: Optional[str] = None,
-) -> str:
+) -> List[str]:
     if not project_ref and not db_url:
         raise ValueError("Either project_ref or db_url must be provided")
 
@@ -158,108 +238,697 @@ def run_supabase_gen(
     for schema in schemas:
         command.extend(["--schema", schema])
 
+    return command
+
+
+def supabase_gen_env() -> Dict[str, str]:
     env = os.environ.copy()
     env.setdefault("SUPABASE_ACCESS_TOKEN", "")
+    return env
+
+
+def supabase_gen_output(returncode: int, stdout: str, stderr: str) -> str:
+    if returncode != 0:
+        stderr = stderr.strip() or "Unknown error"
+        raise GenerationError(f"Supabase CLI failed ({returncode}): {stderr}")
+
+    output = stdout.strip()
+    if not output:
+        raise GenerationError("Supabase CLI returned no output")
+
+    return output
+
+
+def run_supabase_gen(
+    cli_cmd: Sequence[str],
+    schemas: Iterable[str],
+    *,
+    project_ref: Optional[str] = None,
+    db_url: Optional[str] = None,
+) -> str:
+    command = supabase_gen_command(cli_cmd, schemas, project_ref=project_ref, db_url=db_url)
 
     result = subprocess.run(
         command,
         cwd=str(PROJECT_ROOT),
-        env=env,
+        env=supabase_gen_env(),
         capture_output=True,
         text=True,
         check=False,
     )
 
-    if result.returncode != 0:
-        stderr = result.stderr.strip() or "Unknown error"
-        raise GenerationError(f"Supabase CLI failed ({result.returncode}): {stderr}")
+    return supabase_gen_output(result.returncode, result.stdout, result.stderr)
 
-    output = result.stdout.strip()
-    if not output:
-        raise GenerationError("Supabase CLI returned no output")
 
-    return output
+async def run_supabase_gen_async(
+    cli_cmd: Sequence[str],
+    schemas: Iterable[str],
+    *,
+    project_ref: Optional[str] = None,
+    db_url: Optional[str] = None,
+) -> str:
+    """run_supabase_gen as an asyncio subprocess, killed when cancelled"""
+    command = supabase_gen_command(cli_cmd, schemas, project_ref=project_ref, db_url=db_url)
+
+    process = await asyncio.create_subprocess_exec(
+        *command,
+        cwd=str(PROJECT_ROOT),
+        env=supabase_gen_env(),
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        start_new_session=True,
+    )
+    try:
+        stdout, stderr = await process.communicate()
+    except asyncio.CancelledError:
+        # npx runs the CLI in a child process, which would keep the pipes
+        # open, so the whole process group is killed
+        try:
+            if hasattr(os, "killpg"):
+                os.killpg(process.pid, signal.SIGKILL)
+            else:
+                process.kill()
+        except ProcessLookupError:
+            pass
+        await process.wait()
+        raise
+
+    return supabase_gen_output(
+        process.returncode,
+        stdout.decode("utf-8", errors="replace"),
+        stderr.decode("utf-8", errors="replace"),
+    )
+
+
+# Layout rules of the Prettier run the Supabase CLI formats its output with
+# (prettier@3, parser "typescript", semi: false, otherwise defaults)
+PRETTIER_VERSION = "3.3.3"
+PRETTIER_OPTIONS: Sequence[str] = ("--parser", "typescript", "--no-semi")
+PRINT_WIDTH = 80
+IDENTIFIER_PATTERN = re.compile(r"^(?:[^\W\d]|\$)(?:\w|\$)*$")
+
+JSON_TYPE = """export type Json =
+  | string
+  | number
+  | boolean
+  | null
+  | { [key: string]: Json | undefined }
+  | Json[]"""
+
+# The CLI's helper types, so code using Tables<{ schema: ... }, ...> compiles
+# against fallback output as well
+HELPER_TYPES = """type DatabaseWithoutInternals = Omit<Database, "__InternalSupabase">
+
+type DefaultSchema = DatabaseWithoutInternals[Extract<keyof Database, "public">]
+
+export type Tables<
+  DefaultSchemaTableNameOrOptions extends
+    | keyof (DefaultSchema["Tables"] & DefaultSchema["Views"])
+    | { schema: keyof DatabaseWithoutInternals },
+  TableName extends DefaultSchemaTableNameOrOptions extends {
+    schema: keyof DatabaseWithoutInternals
+  }
+    ? keyof (DatabaseWithoutInternals[DefaultSchemaTableNameOrOptions["schema"]]["Tables"] &
+        DatabaseWithoutInternals[DefaultSchemaTableNameOrOptions["schema"]]["Views"])
+    : never = never,
+> = DefaultSchemaTableNameOrOptions extends {
+  schema: keyof DatabaseWithoutInternals
+}
+  ? (DatabaseWithoutInternals[DefaultSchemaTableNameOrOptions["schema"]]["Tables"] &
+      DatabaseWithoutInternals[DefaultSchemaTableNameOrOptions["schema"]]["Views"])[TableName] extends {
+      Row: infer R
+    }
+    ? R
+    : never
+  : DefaultSchemaTableNameOrOptions extends keyof (DefaultSchema["Tables"] &
+        DefaultSchema["Views"])
+    ? (DefaultSchema["Tables"] &
+        DefaultSchema["Views"])[DefaultSchemaTableNameOrOptions] extends {
+        Row: infer R
+      }
+      ? R
+      : never
+    : never
+
+export type TablesInsert<
+  DefaultSchemaTableNameOrOptions extends
+    | keyof DefaultSchema["Tables"]
+    | { schema: keyof DatabaseWithoutInternals },
+  TableName extends DefaultSchemaTableNameOrOptions extends {
+    schema: keyof DatabaseWithoutInternals
+  }
+    ? keyof DatabaseWithoutInternals[DefaultSchemaTableNameOrOptions["schema"]]["Tables"]
+    : never = never,
+> = DefaultSchemaTableNameOrOptions extends {
+  schema: keyof DatabaseWithoutInternals
+}
+  ? DatabaseWithoutInternals[DefaultSchemaTableNameOrOptions["schema"]]["Tables"][TableName] extends {
+      Insert: infer I
+    }
+    ? I
+    : never
+  : DefaultSchemaTableNameOrOptions extends keyof DefaultSchema["Tables"]
+    ? DefaultSchema["Tables"][DefaultSchemaTableNameOrOptions] extends {
+        Insert: infer I
+      }
+      ? I
+      : never
+    : never
+
+export type TablesUpdate<
+  DefaultSchemaTableNameOrOptions extends
+    | keyof DefaultSchema["Tables"]
+    | { schema: keyof DatabaseWithoutInternals },
+  TableName extends DefaultSchemaTableNameOrOptions extends {
+    schema: keyof DatabaseWithoutInternals
+  }
+    ? keyof DatabaseWithoutInternals[DefaultSchemaTableNameOrOptions["schema"]]["Tables"]
+    : never = never,
+> = DefaultSchemaTableNameOrOptions extends {
+  schema: keyof DatabaseWithoutInternals
+}
+  ? DatabaseWithoutInternals[DefaultSchemaTableNameOrOptions["schema"]]["Tables"][TableName] extends {
+      Update: infer U
+    }
+    ? U
+    : never
+  : DefaultSchemaTableNameOrOptions extends keyof DefaultSchema["Tables"]
+    ? DefaultSchema["Tables"][DefaultSchemaTableNameOrOptions] extends {
+        Update: infer U
+      }
+      ? U
+      : never
+    : never
+
+export type Enums<
+  DefaultSchemaEnumNameOrOptions extends
+    | keyof DefaultSchema["Enums"]
+    | { schema: keyof DatabaseWithoutInternals },
+  EnumName extends DefaultSchemaEnumNameOrOptions extends {
+    schema: keyof DatabaseWithoutInternals
+  }
+    ? keyof DatabaseWithoutInternals[DefaultSchemaEnumNameOrOptions["schema"]]["Enums"]
+    : never = never,
+> = DefaultSchemaEnumNameOrOptions extends {
+  schema: keyof DatabaseWithoutInternals
+}
+  ? DatabaseWithoutInternals[DefaultSchemaEnumNameOrOptions["schema"]]["Enums"][EnumName]
+  : DefaultSchemaEnumNameOrOptions extends keyof DefaultSchema["Enums"]
+    ? DefaultSchema["Enums"][DefaultSchemaEnumNameOrOptions]
+    : never
+
+export type CompositeTypes<
+  PublicCompositeTypeNameOrOptions extends
+    | keyof DefaultSchema["CompositeTypes"]
+    | { schema: keyof DatabaseWithoutInternals },
+  CompositeTypeName extends PublicCompositeTypeNameOrOptions extends {
+    schema: keyof DatabaseWithoutInternals
+  }
+    ? keyof DatabaseWithoutInternals[PublicCompositeTypeNameOrOptions["schema"]]["CompositeTypes"]
+    : never = never,
+> = PublicCompositeTypeNameOrOptions extends {
+  schema: keyof DatabaseWithoutInternals
+}
+  ? DatabaseWithoutInternals[PublicCompositeTypeNameOrOptions["schema"]]["CompositeTypes"][CompositeTypeName]
+  : PublicCompositeTypeNameOrOptions extends keyof DefaultSchema["CompositeTypes"]
+    ? DefaultSchema["CompositeTypes"][PublicCompositeTypeNameOrOptions]
+    : never"""
+
+
+def ts_string(value: str) -> str:
+    """Quote a string literal as Prettier does: double quotes unless singles need fewer escapes"""
+    quote = "'" if value.count('"') > value.count("'") else '"'
+    escaped = value.replace("\\", "\\\\").replace(quote, "\\" + quote).replace("\n", "\\n")
+    return f"{quote}{escaped}{quote}"
+
+
+def ts_key(name: str) -> str:
+    """Property key as Prettier prints it: quoted only when not an identifier"""
+    return name if IDENTIFIER_PATTERN.match(name) else ts_string(name)
+
+
+class TsType(ABC):
+    """A TypeScript type expression that can be laid out flat or broken.
+
+    print_type() chooses between the two the way Prettier does for the
+    shapes typegen emits: a group stays on one line when it fits within
+    PRINT_WIDTH (including the text that follows it up to the next line
+    break) and nothing inside it is forced to break. The layout is checked
+    against CLI output in scripts/fixtures/typegen (see benchmark-typegen.py).
+    """
+
+    must_break = False
+
+    @abstractmethod
+    def flat(self) -> str:
+        """The type on a single line"""
+
+    def broken(self, indent: int, column: int, trailing: int) -> List[str]:
+        """The type over several lines; the first continues the current line"""
+        return [self.flat()]
+
+
+class Atom(TsType):
+    def __init__(self, text: str):
+        self.text = text
+
+    def flat(self) -> str:
+        return self.text
+
+
+class ObjectType(TsType):
+    """A type literal. expand=True keeps it broken even when it would fit,
+    as Prettier does for objects written with a newline after '{'."""
+
+    def __init__(self, members: List[tuple[str, TsType]], expand: bool = False):
+        self.members = members
+        self.must_break = bool(members) and (expand or any(value.must_break for _, value in members))
+
+    def flat(self) -> str:
+        if not self.members:
+            return "{}"
+        return "{ " + "; ".join(f"{key}: {value.flat()}" for key, value in self.members) + " }"
+
+    def broken(self, indent: int, column: int, trailing: int) -> List[str]:
+        if not self.members:
+            return ["{}"]
+        lines = ["{"]
+        for key, value in self.members:
+            lines.extend(print_property(key, value, indent + 2))
+        lines.append(" " * indent + "}")
+        return lines
+
+
+class UnionType(TsType):
+    def __init__(self, members: List[TsType]):
+        self.members = members
+        self.must_break = any(member.must_break for member in members)
+
+    def flat(self) -> str:
+        return " | ".join(member.flat() for member in self.members)
+
+    def broken(self, indent: int, column: int, trailing: int) -> List[str]:
+        # Starts on a new line below its key; members are aligned past '| '
+        lines = [""]
+        for member in self.members:
+            member_lines = print_type(member, indent + 4, indent + 4, 0)
+            lines.append(" " * (indent + 2) + "| " + member_lines[0])
+            lines.extend(member_lines[1:])
+        return lines
+
+
+class ArrayType(TsType):
+    def __init__(self, element: TsType):
+        self.element = element
+        self.must_break = element.must_break
+
+    def flat(self) -> str:
+        return self.element.flat() + "[]"
+
+    def broken(self, indent: int, column: int, trailing: int) -> List[str]:
+        lines = print_type(self.element, indent, column, trailing + 2)
+        lines[-1] += "[]"
+        return lines
+
+
+class TupleType(TsType):
+    def __init__(self, elements: List[TsType]):
+        self.elements = elements
+        self.must_break = any(element.must_break for element in elements)
+
+    def flat(self) -> str:
+        return "[" + ", ".join(element.flat() for element in self.elements) + "]"
+
+    def broken(self, indent: int, column: int, trailing: int) -> List[str]:
+        if not self.elements:
+            return ["[]"]
+        lines = ["["]
+        for element in self.elements:
+            element_lines = print_type(element, indent + 2, indent + 2, 1)
+            element_lines[0] = " " * (indent + 2) + element_lines[0]
+            element_lines[-1] += ","
+            lines.extend(element_lines)
+        lines.append(" " * indent + "]")
+        return lines
+
+
+def print_type(node: TsType, indent: int, column: int, trailing: int) -> List[str]:
+    """Lay out a type starting at a column; the first line continues the current one"""
+    if not node.must_break:
+        flat = node.flat()
+        if column + len(flat) + trailing <= PRINT_WIDTH:
+            return [flat]
+    return node.broken(indent, column, trailing)
+
+
+def print_property(key: str, value: TsType, indent: int) -> List[str]:
+    """Lay out a 'key: type' member at an indentation level"""
+    head = " " * indent + key + ":"
+    value_lines = print_type(value, indent, len(head) + 1, 0)
+    if value_lines[0] == "":
+        # A broken union continues on the next lines
+        return [head] + value_lines[1:]
+    return [head + " " + value_lines[0]] + value_lines[1:]
+
+
+# TypeScript type of each built-in Postgres type, by (lower-cased) type name
+POSTGRES_TS_TYPES: Dict[str, str] = {
+    **dict.fromkeys(('bool', 'boolean'), 'boolean'),
+    **dict.fromkeys(
+        ('int2', 'int4', 'int8', 'smallint', 'integer', 'bigint', 'float4', 'float8', 'numeric', 'real',
+         'double precision'),
+        'number',
+    ),
+    **dict.fromkeys(
+        ('money', 'bytea', 'bpchar', 'varchar', 'date', 'text', 'citext', 'time', 'timetz', 'timestamp',
+         'timestamptz', 'uuid', 'vector', 'inet', 'cidr', 'macaddr', 'macaddr8', 'tsvector', 'interval', 'name',
+         'ltree'),
+        'string',
+    ),
+    'json': 'Json',
+    'jsonb': 'Json',
+    'void': 'void',
+    'record': 'Record<string, unknown>',
+}
 
 
 def map_postgres_type(
-    schema: str,
+    type_schema: str,
     type_name: str,
     data_type: str,
-    enums_by_schema: Dict[str, Dict[str, List[str]]],
+    enums: Dict[Tuple[str, str], List[str]],
+    composite_types: Optional[Dict[Tuple[str, str], object]] = None,
+    domains: Optional[Dict[Tuple[str, str], Dict[str, object]]] = None,
 ) -> str:
+    """TypeScript type of a Postgres type, given the schema the type lives in.
+
+    Enums, composite types and domains are looked up by (schema, name), so
+    types from other schemas resolve too.
+    """
     base_type = type_name.lstrip('_') if type_name else ''
     is_array = type_name.startswith('_') or data_type.endswith('[]')
 
-    enum_schema = enums_by_schema.get(schema, {})
-    if base_type in enum_schema:
-        ts_type = f"Database[{schema!r}]['Enums'][{base_type!r}]"
+    key = (type_schema, base_type)
+    domain = (domains or {}).get(key)
+    if key in enums:
+        ts_type = f"Database[{ts_string(type_schema)}][\"Enums\"][{ts_string(base_type)}]"
+    elif key in (composite_types or {}):
+        ts_type = f"Database[{ts_string(type_schema)}][\"CompositeTypes\"][{ts_string(base_type)}]"
+    elif domain:
+        # Columns of a domain type already report its base type; arrays of
+        # domains and domains over arrays get here
+        ts_type = map_postgres_type(
+            domain['base_schema'], domain['base_type_name'], domain['base_data_type'],
+            enums, composite_types, domains,
+        )
     else:
-        normalized = base_type.lower()
-        if normalized in {'bool', 'boolean'}:
-            ts_type = 'boolean'
-        elif normalized in {'int2', 'int4', 'int8', 'smallint', 'integer', 'bigint', 'float4', 'float8', 'numeric', 'real', 'double precision'}:
-            ts_type = 'number'
-        elif normalized in {
-            'money',
-            'bytea',
-            'bpchar',
-            'varchar',
-            'date',
-            'text',
-            'citext',
-            'time',
-            'timetz',
-            'timestamp',
-            'timestamptz',
-            'uuid',
-            'vector',
-            'inet',
-            'cidr',
-            'macaddr',
-            'macaddr8',
-            'tsvector',
-            'interval',
-            'name',
-            'ltree',
-        }:
-            ts_type = 'string'
-        elif normalized in {'json', 'jsonb'}:
-            ts_type = 'Json'
-        elif normalized == 'void':
-            ts_type = 'void'
-        elif normalized == 'record':
-            ts_type = 'Record<string, unknown>'
-        else:
-            ts_type = 'unknown'
+        ts_type = POSTGRES_TS_TYPES.get(base_type.lower(), 'unknown')
 
-    if is_array and ts_type != 'unknown':
-        return f"{ts_type}[]"
-    if is_array and ts_type == 'unknown':
-        return 'unknown[]'
-    return ts_type
+    return f"{ts_type}[]" if is_array else ts_type
 
 
 def format_with_prettier(content: str) -> str:
+    npx = shutil.which("npx")
+    if not npx:
+        raise GenerationError("npx not found; Node.js is required to run Prettier")
     try:
         process = subprocess.run(
-            [
-                "npx",
-                "--yes",
-                "prettier@3.3.3",
-                "--parser",
-                "typescript",
-            ],
+            [npx, "--yes", f"prettier@{PRETTIER_VERSION}", *PRETTIER_OPTIONS],
             input=content,
             text=True,
             capture_output=True,
             check=True,
         )
-        return process.stdout
-    except Exception:
-        return content
+    except subprocess.CalledProcessError as exc:
+        stderr = exc.stderr.strip() or "Unknown error"
+        raise GenerationError(f"Prettier failed ({exc.returncode}): {stderr}") from exc
+    return process.stdout
+
+
+def verify_formatting(content: str) -> List[str]:
+    """Compare generated types with Prettier's formatting of them.
+
+    Returns a unified diff, empty when the output is already canonical.
+    """
+    formatted = format_with_prettier(content)
+    return list(
+        difflib.unified_diff(
+            content.splitlines(),
+            formatted.splitlines(),
+            fromfile="generated",
+            tofile="prettier",
+            lineterm="",
+        )
+    )
 
 
-def generate_types_with_psycopg(db_url: str, schemas: List[str]) -> str:
+# The whole catalog in one statement, so introspection costs a single round
+# trip however slow the link to the database is. Reads pg_catalog only: the
+# information_schema views are slow on large catalogs, and foreign key
+# columns come straight from pg_constraint.conkey/confkey in key order.
+# Functions and their arguments come from pg_proc, composite type fields
+# from pg_type/pg_attribute, aggregated per object inside the same query.
+CATALOG_QUERY = """
+WITH RECURSIVE
+relations AS (
+  SELECT c.oid::bigint AS id,
+         n.nspname AS schema,
+         c.relname AS name,
+         c.relkind,
+         obj_description(c.oid) AS comment,
+         -- Planner statistics: -1 (or 0 before PostgreSQL 14) until analyzed
+         CASE WHEN c.reltuples >= 0 THEN c.reltuples::bigint END AS estimated_rows,
+         CASE WHEN c.relkind IN ('r', 'p', 'm') THEN pg_total_relation_size(c.oid) END AS total_bytes,
+         -- Relations a view reads, from its rewrite rule's dependencies
+         CASE WHEN c.relkind IN ('v', 'm') THEN ARRAY(
+           SELECT DISTINCT dn.nspname || '.' || dc.relname
+           FROM pg_rewrite rw
+           JOIN pg_depend d ON d.classid = 'pg_rewrite'::regclass AND d.objid = rw.oid
+             AND d.refclassid = 'pg_class'::regclass
+           JOIN pg_class dc ON dc.oid = d.refobjid
+           JOIN pg_namespace dn ON dn.oid = dc.relnamespace
+           WHERE rw.ev_class = c.oid
+             AND dc.oid <> c.oid
+             AND dc.relkind IN ('r', 'p', 'v', 'm', 'f')
+           ORDER BY 1
+         ) END AS base_relations
+  FROM pg_class c
+  JOIN pg_namespace n ON n.oid = c.relnamespace
+  WHERE n.nspname = ANY(%(schemas)s)
+    AND c.relkind IN ('r', 'p', 'v', 'm', 'f')
+),
+columns AS (
+  SELECT
+    c.oid::bigint AS table_id,
+    n.nspname AS schema,
+    c.relname AS table,
+    a.attnum AS ordinal_position,
+    a.attname AS name,
+    format_type(a.atttypid, a.atttypmod) AS data_type,
+    COALESCE(bt.typname, t.typname) AS type_name,
+    tn.nspname AS type_schema,
+    a.atthasdef AS has_default,
+    CASE WHEN a.atthasdef THEN pg_get_expr(ad.adbin, ad.adrelid) END AS default_value,
+    a.attidentity IN ('a','d') AS is_identity,
+    CASE a.attidentity WHEN 'a' THEN 'ALWAYS' WHEN 'd' THEN 'BY DEFAULT' ELSE NULL END AS identity_generation,
+    a.attgenerated = 's' AS is_generated,
+    NOT a.attnotnull AS is_nullable
+  FROM pg_attribute a
+  LEFT JOIN pg_attrdef ad ON a.attrelid = ad.adrelid AND a.attnum = ad.adnum
+  JOIN pg_class c ON c.oid = a.attrelid
+  JOIN pg_namespace n ON n.oid = c.relnamespace
+  JOIN pg_type t ON t.oid = a.atttypid
+  LEFT JOIN pg_type bt ON t.typtype = 'd' AND t.typbasetype = bt.oid
+  JOIN pg_namespace tn ON tn.oid = COALESCE(bt.typnamespace, t.typnamespace)
+  WHERE n.nspname = ANY(%(schemas)s)
+    AND c.relkind IN ('r','p','v','m','f')
+    AND a.attnum > 0
+    AND NOT a.attisdropped
+),
+relationships AS (
+  SELECT
+    n.nspname AS schema,
+    c.relname AS table_name,
+    con.conname AS constraint_name,
+    ARRAY(
+      SELECT a.attname
+      FROM unnest(con.conkey) WITH ORDINALITY AS k(attnum, position)
+      JOIN pg_attribute a ON a.attrelid = con.conrelid AND a.attnum = k.attnum
+      ORDER BY k.position
+    ) AS columns,
+    rn.nspname AS referenced_schema,
+    rc.relname AS referenced_table,
+    ARRAY(
+      SELECT a.attname
+      FROM unnest(con.confkey) WITH ORDINALITY AS k(attnum, position)
+      JOIN pg_attribute a ON a.attrelid = con.confrelid AND a.attnum = k.attnum
+      ORDER BY k.position
+    ) AS referenced_columns
+  FROM pg_constraint con
+  JOIN pg_class c ON c.oid = con.conrelid
+  JOIN pg_namespace n ON n.oid = c.relnamespace
+  JOIN pg_class rc ON rc.oid = con.confrelid
+  JOIN pg_namespace rn ON rn.oid = rc.relnamespace
+  WHERE con.contype = 'f'
+    AND n.nspname = ANY(%(schemas)s)
+),
+enums AS (
+  SELECT
+    t.oid::bigint AS id,
+    n.nspname AS schema,
+    t.typname AS name,
+    array_agg(e.enumlabel ORDER BY e.enumsortorder) AS labels
+  FROM pg_type t
+  JOIN pg_enum e ON e.enumtypid = t.oid
+  JOIN pg_namespace n ON n.oid = t.typnamespace
+  WHERE n.nspname = ANY(%(schemas)s)
+  GROUP BY t.oid, n.nspname, t.typname
+),
+functions AS (
+  SELECT
+    p.oid::bigint AS id,
+    n.nspname AS schema,
+    p.proname AS name,
+    p.proretset AS is_set_returning,
+    format_type(p.prorettype, NULL) AS return_data_type,
+    COALESCE(rbt.typname, rt.typname) AS return_type_name,
+    rtn.nspname AS return_type_schema,
+    rt.typrelid::bigint AS return_type_relation_id,
+    p.pronargs AS input_arg_count,
+    p.pronargdefaults AS default_arg_count,
+    COALESCE((
+      SELECT json_agg(json_build_object(
+        'name', COALESCE(p.proargnames[a.position], ''),
+        'mode', CASE COALESCE(p.proargmodes[a.position], 'i')
+                  WHEN 'i' THEN 'in' WHEN 'o' THEN 'out' WHEN 'b' THEN 'inout'
+                  WHEN 'v' THEN 'variadic' WHEN 't' THEN 'table' END,
+        'data_type', format_type(a.type_oid, NULL),
+        'type_name', COALESCE(bt.typname, t.typname),
+        'type_schema', tn.nspname
+      ) ORDER BY a.position)
+      FROM unnest(COALESCE(p.proallargtypes, p.proargtypes::oid[])) WITH ORDINALITY AS a(type_oid, position)
+      JOIN pg_type t ON t.oid = a.type_oid
+      LEFT JOIN pg_type bt ON t.typtype = 'd' AND t.typbasetype = bt.oid
+      JOIN pg_namespace tn ON tn.oid = COALESCE(bt.typnamespace, t.typnamespace)
+    ), '[]') AS args
+  FROM pg_proc p
+  JOIN pg_namespace n ON n.oid = p.pronamespace
+  JOIN pg_type rt ON rt.oid = p.prorettype
+  LEFT JOIN pg_type rbt ON rt.typtype = 'd' AND rt.typbasetype = rbt.oid
+  JOIN pg_namespace rtn ON rtn.oid = COALESCE(rbt.typnamespace, rt.typnamespace)
+  WHERE n.nspname = ANY(%(schemas)s)
+    AND p.prokind = 'f'
+    AND rt.typname NOT IN ('trigger', 'event_trigger')
+),
+domain_bases AS (
+  -- Domains over domains are followed down to the first non-domain type
+  SELECT t.oid AS id, t.typbasetype AS base_id
+  FROM pg_type t
+  JOIN pg_namespace n ON n.oid = t.typnamespace
+  WHERE n.nspname = ANY(%(schemas)s)
+    AND t.typtype = 'd'
+  UNION ALL
+  SELECT d.id, b.typbasetype
+  FROM domain_bases d
+  JOIN pg_type b ON b.oid = d.base_id
+  WHERE b.typtype = 'd'
+),
+domains AS (
+  SELECT
+    t.oid::bigint AS id,
+    n.nspname AS schema,
+    t.typname AS name,
+    bn.nspname AS base_schema,
+    b.typname AS base_type_name,
+    format_type(b.oid, NULL) AS base_data_type
+  FROM domain_bases d
+  JOIN pg_type b ON b.oid = d.base_id AND b.typtype <> 'd'
+  JOIN pg_type t ON t.oid = d.id
+  JOIN pg_namespace n ON n.oid = t.typnamespace
+  JOIN pg_namespace bn ON bn.oid = b.typnamespace
+),
+indexes AS (
+  SELECT
+    n.nspname AS schema,
+    c.relname AS table,
+    i.relname AS name,
+    am.amname AS method,
+    -- Key columns in index order; expressions as their SQL text
+    ARRAY(
+      SELECT pg_get_indexdef(x.indexrelid, k, true)
+      FROM generate_series(1, x.indnkeyatts) AS k
+      ORDER BY k
+    ) AS columns,
+    x.indisunique AS is_unique,
+    x.indisprimary AS is_primary,
+    x.indpred IS NOT NULL AS is_partial,
+    x.indisvalid AS is_valid
+  FROM pg_index x
+  JOIN pg_class i ON i.oid = x.indexrelid
+  JOIN pg_class c ON c.oid = x.indrelid
+  JOIN pg_namespace n ON n.oid = c.relnamespace
+  JOIN pg_am am ON am.oid = i.relam
+  WHERE n.nspname = ANY(%(schemas)s)
+),
+composite_types AS (
+  SELECT
+    t.oid::bigint AS id,
+    n.nspname AS schema,
+    t.typname AS name,
+    COALESCE((
+      SELECT json_agg(json_build_object(
+        'name', a.attname,
+        'data_type', format_type(a.atttypid, a.atttypmod),
+        'type_name', COALESCE(bt.typname, at.typname),
+        'type_schema', tn.nspname
+      ) ORDER BY a.attnum)
+      FROM pg_attribute a
+      JOIN pg_type at ON at.oid = a.atttypid
+      LEFT JOIN pg_type bt ON at.typtype = 'd' AND at.typbasetype = bt.oid
+      JOIN pg_namespace tn ON tn.oid = COALESCE(bt.typnamespace, at.typnamespace)
+      WHERE a.attrelid = t.typrelid AND a.attnum > 0 AND NOT a.attisdropped
+    ), '[]') AS attributes
+  FROM pg_type t
+  JOIN pg_namespace n ON n.oid = t.typnamespace
+  JOIN pg_class c ON c.oid = t.typrelid
+  WHERE n.nspname = ANY(%(schemas)s)
+    AND t.typtype = 'c'
+    AND c.relkind = 'c'
+)
+SELECT json_build_object(
+  'tables', COALESCE((
+    SELECT json_agg(r ORDER BY r.schema, r.name) FROM relations r WHERE r.relkind IN ('r', 'p')
+  ), '[]'),
+  'views', COALESCE((
+    SELECT json_agg(r ORDER BY r.schema, r.name) FROM relations r WHERE r.relkind IN ('v', 'm', 'f')
+  ), '[]'),
+  'columns', COALESCE((
+    SELECT json_agg(c ORDER BY c.table_id, c.ordinal_position) FROM columns c
+  ), '[]'),
+  'relationships', COALESCE((
+    SELECT json_agg(r ORDER BY r.schema, r.table_name, r.constraint_name) FROM relationships r
+  ), '[]'),
+  'enums', COALESCE((
+    SELECT json_agg(e ORDER BY e.schema, e.name) FROM enums e
+  ), '[]'),
+  'functions', COALESCE((
+    SELECT json_agg(f ORDER BY f.schema, f.name, f.id) FROM functions f
+  ), '[]'),
+  'domains', COALESCE((
+    SELECT json_agg(d ORDER BY d.schema, d.name) FROM domains d
+  ), '[]'),
+  'composite_types', COALESCE((
+    SELECT json_agg(t ORDER BY t.schema, t.name) FROM composite_types t
+  ), '[]'),
+  'indexes', COALESCE((
+    SELECT json_agg(i ORDER BY i.schema, i.table, i.name) FROM indexes i
+  ), '[]')
+) AS catalog;
+"""
+
+
+def fetch_catalog(db_url: str, schemas: List[str]) -> Dict[str, List[Dict[str, object]]]:
+    """Introspect the schemas' relations, functions and types in one query"""
     try:
         import psycopg
         from psycopg.rows import dict_row
@@ -268,156 +937,403 @@ def generate_types_with_psycopg(db_url: str, schemas: List[str]) -> str:
             "psycopg is required for fallback generation. Install it with 'pip install psycopg[binary]'."
         ) from exc
 
-    schemas = sorted(set(schemas))
-    schema_clause = ",".join(f"'{s}'" for s in schemas)
-
     try:
         with psycopg.connect(db_url, autocommit=True) as conn:
             with conn.cursor(row_factory=dict_row) as cur:
-                cur.execute(
-                    f"""
-                SELECT c.oid::bigint AS id,
-                       n.nspname AS schema,
-                       c.relname AS name,
-                       c.relkind,
-                       obj_description(c.oid) AS comment
-                FROM pg_class c
-                JOIN pg_namespace n ON n.oid = c.relnamespace
-                WHERE n.nspname IN ({schema_clause})
-                  AND c.relkind IN ('r', 'p')
-                ORDER BY n.nspname, c.relname;
-                    """
-                )
-                tables = cur.fetchall()
-
-                cur.execute(
-                    f"""
-                SELECT c.oid::bigint AS id,
-                       n.nspname AS schema,
-                       c.relname AS name,
-                       c.relkind,
-                       obj_description(c.oid) AS comment
-                FROM pg_class c
-                JOIN pg_namespace n ON n.oid = c.relnamespace
-                WHERE n.nspname IN ({schema_clause})
-                  AND c.relkind IN ('v', 'm', 'f')
-                ORDER BY n.nspname, c.relname;
-                    """
-                )
-                views = cur.fetchall()
-
-                cur.execute(
-                    f"""
-                SELECT
-                  c.oid::bigint AS table_id,
-                  n.nspname AS schema,
-                  c.relname AS table,
-                  a.attnum AS ordinal_position,
-                  a.attname AS name,
-                  format_type(a.atttypid, a.atttypmod) AS data_type,
-                  COALESCE(bt.typname, t.typname) AS type_name,
-                  a.atthasdef AS has_default,
-                  CASE WHEN a.atthasdef THEN pg_get_expr(ad.adbin, ad.adrelid) END AS default_value,
-                  a.attidentity IN ('a','d') AS is_identity,
-                  CASE a.attidentity WHEN 'a' THEN 'ALWAYS' WHEN 'd' THEN 'BY DEFAULT' ELSE NULL END AS identity_generation,
-                  a.attgenerated = 's' AS is_generated,
-                  NOT a.attnotnull AS is_nullable
-                FROM pg_attribute a
-                LEFT JOIN pg_attrdef ad ON a.attrelid = ad.adrelid AND a.attnum = ad.adnum
-                JOIN pg_class c ON c.oid = a.attrelid
-                JOIN pg_namespace n ON n.oid = c.relnamespace
-                JOIN pg_type t ON t.oid = a.atttypid
-                LEFT JOIN pg_type bt ON t.typtype = 'd' AND t.typbasetype = bt.oid
-                WHERE n.nspname IN ({schema_clause})
-                  AND c.relkind IN ('r','p','v','m','f')
-                  AND a.attnum > 0
-                  AND NOT a.attisdropped
-                ORDER BY c.oid, a.attnum;
-                    """
-                )
-                columns = cur.fetchall()
-
-                cur.execute(
-                    f"""
-                SELECT
-                  tc.constraint_schema AS schema,
-                  tc.table_name AS table_name,
-                  tc.constraint_name,
-                  array_agg(kcu.column_name ORDER BY kcu.ordinal_position) AS columns,
-                  ccu.table_schema AS referenced_schema,
-                  ccu.table_name AS referenced_table,
-                  array_agg(ccu.column_name ORDER BY kcu.ordinal_position) AS referenced_columns
-                FROM information_schema.table_constraints tc
-                JOIN information_schema.key_column_usage kcu
-                  ON tc.constraint_name = kcu.constraint_name
-                 AND tc.constraint_schema = kcu.constraint_schema
-                JOIN information_schema.constraint_column_usage ccu
-                  ON ccu.constraint_name = tc.constraint_name
-                 AND ccu.constraint_schema = tc.constraint_schema
-                WHERE tc.constraint_type = 'FOREIGN KEY'
-                  AND tc.constraint_schema IN ({schema_clause})
-                GROUP BY tc.constraint_schema, tc.table_name, tc.constraint_name, ccu.table_schema, ccu.table_name
-                ORDER BY tc.constraint_schema, tc.table_name;
-                    """
-                )
-                relationships = cur.fetchall()
-
-                cur.execute(
-                    f"""
-                SELECT
-                  t.oid::bigint AS id,
-                  n.nspname AS schema,
-                  t.typname AS name,
-                  array_agg(e.enumlabel ORDER BY e.enumsortorder) AS labels
-                FROM pg_type t
-                JOIN pg_enum e ON e.enumtypid = t.oid
-                JOIN pg_namespace n ON n.oid = t.typnamespace
-                WHERE n.nspname IN ({schema_clause})
-                GROUP BY t.oid, n.nspname, t.typname
-                ORDER BY n.nspname, t.typname;
-                    """
-                )
-                enums = cur.fetchall()
+                cur.execute(CATALOG_QUERY, {"schemas": schemas})
+                return cur.fetchone()["catalog"]
     except psycopg.Error as exc:
         raise GenerationError(f"Failed to inspect database schema: {exc}") from exc
 
-    columns_by_table: Dict[int, List[Dict[str, object]]] = {}
-    for column in columns:
-        columns_by_table.setdefault(column['table_id'], []).append(column)
 
-    relationships_by_table: Dict[tuple[str, str], List[Dict[str, object]]] = {}
-    for rel in relationships:
-        key = (rel['schema'], rel['table_name'])
-        relationships_by_table.setdefault(key, []).append(rel)
+async def fetch_catalog_async(db_url: str, schemas: List[str]) -> Dict[str, List[Dict[str, object]]]:
+    """fetch_catalog over an async connection, so it can race the CLI"""
+    try:
+        import psycopg
+        from psycopg.rows import dict_row
+    except ImportError as exc:
+        raise GenerationError(
+            "psycopg is required for fallback generation. Install it with 'pip install psycopg[binary]'."
+        ) from exc
+
+    try:
+        async with await psycopg.AsyncConnection.connect(db_url, autocommit=True) as conn:
+            async with conn.cursor(row_factory=dict_row) as cur:
+                await cur.execute(CATALOG_QUERY, {"schemas": schemas})
+                return (await cur.fetchone())["catalog"]
+    except psycopg.Error as exc:
+        raise GenerationError(f"Failed to inspect database schema: {exc}") from exc
 
-    enums_by_schema: Dict[str, Dict[str, List[str]]] = {}
-    for enum in enums:
-        enums_by_schema.setdefault(enum['schema'], {})[enum['name']] = enum['labels'] or []
 
-    tables_by_schema: Dict[str, List[Dict[str, object]]] = {schema: [] for schema in schemas}
-    for table in tables:
-        tables_by_schema.setdefault(table['schema'], []).append(table)
+# Sections of the CATALOG_QUERY result, in the order snapshots store them
+CATALOG_SECTIONS: Sequence[str] = (
+    "tables", "views", "columns", "relationships", "enums", "functions", "domains", "composite_types",
+    "indexes",
+)
+CATALOG_SNAPSHOT_VERSION = 4
+INDEX_MANIFEST_VERSION = 1
 
-    views_by_schema: Dict[str, List[Dict[str, object]]] = {schema: [] for schema in schemas}
-    for view in views:
-        views_by_schema.setdefault(view['schema'], []).append(view)
 
-    for schema in schemas:
-        tables_by_schema.setdefault(schema, [])
-        views_by_schema.setdefault(schema, [])
-        enums_by_schema.setdefault(schema, {})
-
-    def column_row_type(column: Dict[str, object], schema: str) -> str:
-        base = map_postgres_type(
-            schema,
-            (column['type_name'] or '') if column['type_name'] else '',
-            column['data_type'] or '',
-            enums_by_schema,
+def write_catalog_snapshot(
+    catalog: Dict[str, List[Dict[str, object]]], schemas: List[str], destination: Path
+) -> None:
+    """Store introspected catalog rows for rendering types offline.
+
+    Each section is stored column-wise (field names once, then one JSON
+    array per row) with a row per line, which keeps snapshots of large
+    catalogs small and their diffs readable.
+    """
+    missing = [section for section in CATALOG_SECTIONS if section not in catalog]
+    if missing:
+        raise GenerationError(
+            f"Cannot write catalog snapshot {destination}: missing section(s) {', '.join(missing)}"
+        )
+
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = destination.with_name(destination.name + ".tmp")
+
+    def dumps(value: object) -> str:
+        return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+    with open(temp_path, "w", encoding="utf-8", newline="\n") as handle:
+        handle.write(
+            f'{{"format_version":{CATALOG_SNAPSHOT_VERSION},"schemas":{dumps(sorted(set(schemas)))},"catalog":{{'
+        )
+        for i, section in enumerate(CATALOG_SECTIONS):
+            rows = catalog[section]
+            fields = list(rows[0]) if rows else []
+            handle.write(f'{"," if i else ""}\n{dumps(section)}:{{"fields":{dumps(fields)},"rows":[')
+            for j, row in enumerate(rows):
+                handle.write(("," if j else "") + "\n" + dumps([row[field] for field in fields]))
+            handle.write("]}")
+        handle.write("\n}}\n")
+    os.replace(temp_path, destination)
+
+
+def read_catalog_snapshot(path: Path) -> Tuple[List[str], Dict[str, List[Dict[str, object]]]]:
+    """Load the schemas and catalog rows stored by write_catalog_snapshot"""
+    try:
+        with open(path, encoding="utf-8") as handle:
+            snapshot = json.load(handle)
+    except (OSError, ValueError) as exc:
+        raise GenerationError(f"Could not read catalog snapshot {path}: {exc}") from exc
+
+    if not isinstance(snapshot, dict) or snapshot.get("format_version") != CATALOG_SNAPSHOT_VERSION:
+        raise GenerationError(
+            f"Unsupported catalog snapshot {path}; write it again with --snapshot-out"
+        )
+    try:
+        catalog = {
+            section: [dict(zip(table["fields"], row)) for row in table["rows"]]
+            for section, table in ((name, snapshot["catalog"][name]) for name in CATALOG_SECTIONS)
+        }
+    except (KeyError, TypeError) as exc:
+        raise GenerationError(f"Malformed catalog snapshot {path}: missing {exc}") from exc
+    return snapshot["schemas"], catalog
+
+
+def index_manifest(catalog: Dict[str, List[Dict[str, object]]]) -> Dict[str, object]:
+    """The schema scanner's view of a catalog's indexes.
+
+    Every table and view is listed by "schema.name", with its planner size
+    estimates, the relations a view reads, and the valid indexes of tables
+    and materialized views.
+    """
+    relations: Dict[str, Dict[str, object]] = {}
+    for relation in [*catalog["tables"], *catalog["views"]]:
+        entry: Dict[str, object] = {
+            "kind": {"r": "table", "p": "table", "v": "view", "m": "materialized_view"}.get(
+                relation["relkind"], "foreign_table"
+            ),
+            "estimated_rows": relation.get("estimated_rows"),
+            "total_bytes": relation.get("total_bytes"),
+            "indexes": [],
+        }
+        if relation.get("base_relations") is not None:
+            entry["base_relations"] = relation["base_relations"]
+        relations[f"{relation['schema']}.{relation['name']}"] = entry
+
+    for index in catalog["indexes"]:
+        entry = relations.get(f"{index['schema']}.{index['table']}")
+        if entry is None or not index["is_valid"]:
+            continue
+        entry["indexes"].append({
+            "name": index["name"],
+            "method": index["method"],
+            "columns": index["columns"],
+            "unique": index["is_unique"],
+            "primary": index["is_primary"],
+            "partial": index["is_partial"],
+        })
+    return {"format_version": INDEX_MANIFEST_VERSION, "relations": relations}
+
+
+def write_index_manifest(catalog: Dict[str, List[Dict[str, object]]], destination: Path) -> bool:
+    """Write the index manifest of a catalog, returning whether it changed"""
+    content = json.dumps(index_manifest(catalog), indent=2, sort_keys=True) + "\n"
+    try:
+        if destination.read_text(encoding="utf-8") == content:
+            return False
+    except OSError:
+        pass
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = destination.with_name(destination.name + ".tmp")
+    temp_path.write_text(content, encoding="utf-8")
+    os.replace(temp_path, destination)
+    return True
+
+
+def shard_path(output: Path, schema: str) -> Path:
+    """Path of a schema's shard next to the barrel (database.public.types.ts)"""
+    name = output.name
+    stem = name[: -len(".types.ts")] if name.endswith(".types.ts") else output.stem
+    return output.with_name(f"{stem}.{schema}.types.ts")
+
+
+def schema_type_name(schema: str) -> str:
+    """Name of the type a shard exports for its schema (PublicSchema)"""
+    return "".join(part.capitalize() for part in re.split(r"[^0-9A-Za-z]+", schema) if part) + "Schema"
+
+
+class TypesRenderer:
+    """Lays out an introspected catalog as TypeScript, one line at a time.
+
+    Lines are yielded rather than collected, so the output can be streamed
+    straight into a file, either as one database.types.ts or as a barrel
+    plus one shard per schema.
+    """
+
+    def __init__(self, catalog: Dict[str, List[Dict[str, object]]], schemas: List[str]):
+        self.schemas = sorted(set(schemas))
+
+        self.columns_by_table: Dict[int, List[Dict[str, object]]] = {}
+        for column in catalog["columns"]:
+            self.columns_by_table.setdefault(column['table_id'], []).append(column)
+
+        # Global (schema, name) indexes: columns and arguments may use types
+        # from any schema
+        self.enums: Dict[Tuple[str, str], List[str]] = {
+            (enum['schema'], enum['name']): enum['labels'] or [] for enum in catalog["enums"]
+        }
+        self.domains: Dict[Tuple[str, str], Dict[str, object]] = {
+            (domain['schema'], domain['name']): domain for domain in catalog["domains"]
+        }
+        self.composite_types: Dict[Tuple[str, str], Dict[str, object]] = {
+            (composite['schema'], composite['name']): composite for composite in catalog["composite_types"]
+        }
+
+        self.relationships_by_table: Dict[Tuple[str, str], List[Dict[str, object]]] = {}
+        for rel in catalog["relationships"]:
+            key = (rel['schema'], rel['table_name'])
+            self.relationships_by_table.setdefault(key, []).append(rel)
+
+        # Per-schema listings, for the Enums and CompositeTypes sections
+        self.enums_by_schema: Dict[str, Dict[str, List[str]]] = {}
+        for (schema, name), labels in self.enums.items():
+            self.enums_by_schema.setdefault(schema, {})[name] = labels
+
+        self.composite_types_by_schema: Dict[str, Dict[str, object]] = {}
+        for (schema, name), composite in self.composite_types.items():
+            self.composite_types_by_schema.setdefault(schema, {})[name] = composite
+
+        # Overloads share a name and are rendered as a union
+        self.functions_by_schema: Dict[str, Dict[str, List[Dict[str, object]]]] = {}
+        for function in catalog["functions"]:
+            self.functions_by_schema.setdefault(function['schema'], {}).setdefault(
+                function['name'], []
+            ).append(function)
+
+        self.tables_by_schema: Dict[str, List[Dict[str, object]]] = {schema: [] for schema in self.schemas}
+        for table in catalog["tables"]:
+            self.tables_by_schema.setdefault(table['schema'], []).append(table)
+
+        self.views_by_schema: Dict[str, List[Dict[str, object]]] = {schema: [] for schema in self.schemas}
+        for view in catalog["views"]:
+            self.views_by_schema.setdefault(view['schema'], []).append(view)
+
+        for schema in self.schemas:
+            self.enums_by_schema.setdefault(schema, {})
+
+        # Rendered TypeScript type per (type_schema, type_name, data_type)
+        self.ts_types: Dict[Tuple[str, str, str], str] = {}
+
+    def lines(self) -> Iterator[str]:
+        """The whole Database type, as in a single database.types.ts"""
+        yield JSON_TYPE
+        yield ""
+        yield "export type Database = {"
+        for schema in self.schemas:
+            yield f"  {ts_key(schema)}: {{"
+            yield from self.schema_lines(schema, 4)
+            yield "  }"
+        yield "}"
+        yield ""
+        yield HELPER_TYPES
+
+    def outputs(self, output: Path, shard: bool = False) -> List[Tuple[Path, Iterator[str]]]:
+        """The files to write for an output path, with their (lazy) lines"""
+        if not shard:
+            return [(output, self.lines())]
+        files = [(shard_path(output, schema), self.shard_lines(schema, output)) for schema in self.schemas]
+        files.append((output, self.barrel_lines(output)))
+        return files
+
+    def barrel_lines(self, output: Path) -> Iterator[str]:
+        """A Database type assembled from the schema shards of an output path"""
+        for schema in self.schemas:
+            module = shard_path(output, schema).name[: -len(".ts")]
+            yield f'import type {{ {schema_type_name(schema)} }} from "./{module}"'
+        yield ""
+        yield JSON_TYPE
+        yield ""
+        yield "export type Database = {"
+        for schema in self.schemas:
+            yield f"  {ts_key(schema)}: {schema_type_name(schema)}"
+        yield "}"
+        yield ""
+        yield HELPER_TYPES
+
+    def shard_lines(self, schema: str, output: Path) -> Iterator[str]:
+        """One schema's type, importing what it references from the barrel"""
+        # Buffered (one schema at a time) to know which imports are needed
+        body = list(self.schema_lines(schema, 2))
+        text = "\n".join(body)
+        imports = [name for name in ("Database", "Json") if re.search(rf"\b{name}\b", text)]
+        if imports:
+            yield f'import type {{ {", ".join(imports)} }} from "./{output.name[: -len(".ts")]}"'
+            yield ""
+        yield f"export type {schema_type_name(schema)} = {{"
+        yield from body
+        yield "}"
+
+    def schema_lines(self, schema: str, indent: int) -> Iterator[str]:
+        """The sections of one schema's type, at an indentation level"""
+        pad = " " * indent
+
+        yield pad + "Tables: {"
+        schema_tables = self.tables_by_schema.get(schema, [])
+        if schema_tables:
+            for table in schema_tables:
+                yield from print_property(ts_key(table['name']), self.table_type(table), indent + 2)
+        else:
+            yield from self.never_section(indent + 2)
+        yield pad + "}"
+
+        yield pad + "Views: {"
+        schema_views = self.views_by_schema.get(schema, [])
+        if schema_views:
+            for view in schema_views:
+                yield from print_property(ts_key(view['name']), self.view_type(view), indent + 2)
+        else:
+            yield from self.never_section(indent + 2)
+        yield pad + "}"
+
+        # Overloads are a union of signatures
+        yield pad + "Functions: {"
+        schema_functions = {
+            name: [function for function in overloads if self.is_callable(function)]
+            for name, overloads in self.functions_by_schema.get(schema, {}).items()
+        }
+        schema_functions = {name: overloads for name, overloads in schema_functions.items() if overloads}
+        if schema_functions:
+            for function_name, overloads in schema_functions.items():
+                signatures = [self.function_type(function) for function in overloads]
+                node = signatures[0] if len(signatures) == 1 else UnionType(signatures)
+                yield from print_property(ts_key(function_name), node, indent + 2)
+        else:
+            yield from self.never_section(indent + 2)
+        yield pad + "}"
+
+        yield pad + "Enums: {"
+        schema_enums = self.enums_by_schema.get(schema, {})
+        if schema_enums:
+            for enum_name, labels in schema_enums.items():
+                if labels:
+                    node = UnionType([Atom(ts_string(label)) for label in labels])
+                else:
+                    node = Atom('string')
+                yield from print_property(ts_key(enum_name), node, indent + 2)
+        else:
+            yield from self.never_section(indent + 2)
+        yield pad + "}"
+
+        yield pad + "CompositeTypes: {"
+        schema_composites = self.composite_types_by_schema.get(schema, {})
+        if schema_composites:
+            for composite_name, composite in schema_composites.items():
+                node = ObjectType(
+                    [
+                        (ts_key(attribute['name']), UnionType([self.arg_type(attribute), Atom('null')]))
+                        for attribute in composite['attributes']
+                    ],
+                    expand=True,
+                )
+                yield from print_property(ts_key(composite_name), node, indent + 2)
+        else:
+            yield from self.never_section(indent + 2)
+        yield pad + "}"
+
+    @staticmethod
+    def never_section(indent: int) -> List[str]:
+        return [" " * indent + "[_ in never]: never"]
+
+    def table_type(self, table: Dict[str, object]) -> TsType:
+        table_columns = self.columns_by_table.get(table['id'], [])
+        # Row, Insert and Update share each column's key and type
+        keys = [ts_key(column['name']) for column in table_columns]
+        types = [self.column_type(column) for column in table_columns]
+        if table_columns:
+            row: TsType = ObjectType(list(zip(keys, types)), expand=True)
+        else:
+            row = Atom("Record<string, never>")
+        insert = ObjectType(
+            [
+                (key + ('?' if self.column_insert_optional(column) else ''), node)
+                for key, node, column in zip(keys, types, table_columns)
+            ],
+            expand=True,
         )
+        update = ObjectType([(key + '?', node) for key, node in zip(keys, types)], expand=True)
+        return ObjectType([
+            ("Row", row),
+            ("Insert", insert),
+            ("Update", update),
+            ("Relationships", self.relationships_type(table['schema'], table['name'])),
+        ], expand=True)
+
+    def view_type(self, view: Dict[str, object]) -> TsType:
+        view_columns = self.columns_by_table.get(view['id'], [])
+        if view_columns:
+            row: TsType = ObjectType(
+                [(ts_key(column['name']), self.column_type(column)) for column in view_columns],
+                expand=True,
+            )
+        else:
+            row = Atom("Record<string, never>")
+        return ObjectType([
+            ("Row", row),
+            ("Insert", Atom("never")),
+            ("Update", Atom("never")),
+            ("Relationships", TupleType([])),
+        ], expand=True)
+
+    def ts_type(self, type_schema: str, type_name: str, data_type: str) -> str:
+        """map_postgres_type, memoized: catalogs repeat a handful of types"""
+        key = (type_schema, type_name, data_type)
+        ts_type = self.ts_types.get(key)
+        if ts_type is None:
+            ts_type = self.ts_types[key] = map_postgres_type(
+                type_schema, type_name, data_type, self.enums, self.composite_types, self.domains,
+            )
+        return ts_type
+
+    def column_type(self, column: Dict[str, object]) -> TsType:
+        base = Atom(self.ts_type(column['type_schema'], column['type_name'] or '', column['data_type'] or ''))
         if column.get('is_nullable'):
-            return f"{base} | null"
+            return UnionType([base, Atom('null')])
         return base
 
+    @staticmethod
     def column_insert_optional(column: Dict[str, object]) -> bool:
         return bool(
             column.get('is_nullable')
@@ -426,256 +1342,598 @@ def generate_types_with_psycopg(db_url: str, schemas: List[str]) -> str:
             or column.get('is_generated')
         )
 
-    def relationship_lines(schema: str, table_name: str) -> List[str]:
-        rels = relationships_by_table.get((schema, table_name), [])
-        if not rels:
-            return ["Relationships: []"]
-        lines: List[str] = ["Relationships: ["]
-        for rel in rels:
-            lines.append("  {")
-            lines.append(f"    foreignKeyName: {rel['constraint_name']!r}")
-            lines.append(f"    columns: {rel['columns']}")
-            lines.append(f"    referencedRelation: {rel['referenced_table']!r}")
-            lines.append(f"    referencedColumns: {rel['referenced_columns']}")
-            lines.append("  }")
-        lines.append("]")
-        return lines
+    def relationships_type(self, schema: str, table_name: str) -> TsType:
+        return TupleType([
+            ObjectType(
+                [
+                    ("foreignKeyName", Atom(ts_string(rel['constraint_name']))),
+                    ("columns", TupleType([Atom(ts_string(name)) for name in rel['columns']])),
+                ]
+                # referencedRelation names a relation in the table's own schema
+                # unless a referencedSchema says otherwise
+                + ([("referencedSchema", Atom(ts_string(rel['referenced_schema'])))]
+                   if rel['referenced_schema'] != schema else [])
+                + [
+                    ("referencedRelation", Atom(ts_string(rel['referenced_table']))),
+                    ("referencedColumns", TupleType([Atom(ts_string(name)) for name in rel['referenced_columns']])),
+                ],
+                expand=True,
+            )
+            for rel in self.relationships_by_table.get((schema, table_name), [])
+        ])
+
+    @staticmethod
+    def function_input_args(function: Dict[str, object]) -> List[Dict[str, object]]:
+        inputs = [arg for arg in function['args'] if arg['mode'] in ('in', 'inout', 'variadic')]
+        # Defaults always belong to the trailing input arguments
+        first_default = len(inputs) - function['default_arg_count']
+        return [dict(arg, has_default=i >= first_default) for i, arg in enumerate(inputs)]
+
+    def is_callable(self, function: Dict[str, object]) -> bool:
+        # PostgREST can only call functions with named arguments, or a
+        # single unnamed one (which takes the whole request body)
+        inputs = self.function_input_args(function)
+        return len(inputs) == 1 or all(arg['name'] for arg in inputs)
+
+    def arg_type(self, arg: Dict[str, object]) -> TsType:
+        return Atom(self.ts_type(arg['type_schema'], arg['type_name'] or '', arg['data_type'] or ''))
+
+    def function_returns_type(self, function: Dict[str, object]) -> TsType:
+        def set_of(node: TsType) -> TsType:
+            return ArrayType(node) if function['is_set_returning'] else node
+
+        # RETURNS TABLE (...)
+        table_args = [arg for arg in function['args'] if arg['mode'] == 'table']
+        if table_args:
+            fields = sorted((arg['name'], self.arg_type(arg)) for arg in table_args)
+            return set_of(ObjectType([(ts_key(name), node) for name, node in fields], expand=True))
+
+        # RETURNS [SETOF] some_table: the table's row type
+        relation_columns = self.columns_by_table.get(function['return_type_relation_id'])
+        if relation_columns:
+            fields = sorted(relation_columns, key=lambda column: column['name'])
+            return set_of(ObjectType(
+                [(ts_key(column['name']), self.column_type(column)) for column in fields],
+                expand=True,
+            ))
+
+        if function['return_type_name'] == 'void':
+            return Atom('undefined')
+        return set_of(Atom(self.ts_type(
+            function['return_type_schema'], function['return_type_name'] or '', function['return_data_type'] or ''
+        )))
+
+    def function_type(self, function: Dict[str, object]) -> TsType:
+        inputs = sorted(self.function_input_args(function), key=lambda arg: arg['name'])
+        if inputs:
+            args: TsType = ObjectType([
+                (ts_key(arg['name']) + ('?' if arg['has_default'] else ''), self.arg_type(arg))
+                for arg in inputs
+            ])
+        else:
+            args = Atom('never')
+        return ObjectType([("Args", args), ("Returns", self.function_returns_type(function))])
 
-    content_lines: List[str] = []
 
-    content_lines.append(
-        textwrap.dedent(
-            """
-export type Json =
-  | string
-  | number
-  | boolean
-  | null
-  | { [key: string]: Json | undefined }
-  | Json[]
-"""
-        ).strip()
-    )
+def generate_types_with_psycopg(db_url: str, schemas: List[str]) -> str:
+    schemas = sorted(set(schemas))
+    renderer = TypesRenderer(fetch_catalog(db_url, schemas), schemas)
+    # Already laid out the way Prettier would print it; see --verify-format
+    return "\n".join(renderer.lines()) + "\n"
 
-    content_lines.append("export type Database = {")
-    for schema in schemas:
-        content_lines.append(f"  {schema}: {{")
 
-        # Tables
-        content_lines.append("    Tables: {")
-        schema_tables = tables_by_schema.get(schema, [])
-        if schema_tables:
-            for table in schema_tables:
-                table_name = table['name']
-                table_columns = columns_by_table.get(table['id'], [])
-                content_lines.append(f"      {table_name!r}: {{")
-
-                # Row type
-                if table_columns:
-                    content_lines.append("        Row: {")
-                    for column in table_columns:
-                        ts_type = column_row_type(column, schema)
-                        content_lines.append(
-                            f"          {column['name']!r}: {ts_type}"  # type ok
-                        )
-                    content_lines.append("        }")
-                else:
-                    content_lines.append("        Row: Record<string, never>")
-
-                # Insert type
-                content_lines.append("        Insert: {")
-                if table_columns:
-                    for column in table_columns:
-                        optional = column_insert_optional(column)
-                        ts_type = column_row_type(column, schema)
-                        suffix = '?' if optional else ''
-                        content_lines.append(
-                            f"          {column['name']!r}{suffix}: {ts_type}"
-                        )
-                content_lines.append("        }")
-
-                # Update type
-                content_lines.append("        Update: {")
-                if table_columns:
-                    for column in table_columns:
-                        ts_type = column_row_type(column, schema)
-                        content_lines.append(
-                            f"          {column['name']!r}?: {ts_type}"
-                        )
-                content_lines.append("        }")
+TYPES_HEADER_PATTERN = re.compile(r"\A/\*\*.*?\*/\n\n", re.DOTALL)
 
-                rel_lines = relationship_lines(schema, table_name)
-                for rel_line in rel_lines:
-                    content_lines.append(f"        {rel_line}")
 
-                content_lines.append("      }")
-        else:
-            content_lines.append("      [key: string]: never")
-        content_lines.append("    }")
+def types_body(text: str) -> str:
+    """Strip the generated header (and trailing newlines) from a types file"""
+    return TYPES_HEADER_PATTERN.sub("", text, count=1).rstrip("\n")
 
-        # Views
-        content_lines.append("    Views: {")
-        schema_views = views_by_schema.get(schema, [])
-        if schema_views:
-            for view in schema_views:
-                view_name = view['name']
-                view_columns = columns_by_table.get(view['id'], [])
-                content_lines.append(f"      {view_name!r}: {{")
-                if view_columns:
-                    content_lines.append("        Row: {")
-                    for column in view_columns:
-                        ts_type = column_row_type(column, schema)
-                        content_lines.append(
-                            f"          {column['name']!r}: {ts_type}"
-                        )
-                    content_lines.append("        }")
-                else:
-                    content_lines.append("        Row: Record<string, never>")
-                content_lines.append("        Insert: never")
-                content_lines.append("        Update: never")
-                content_lines.append("        Relationships: []")
-                content_lines.append("      }")
-        else:
-            content_lines.append("      [key: string]: never")
-        content_lines.append("    }")
 
-        # Functions placeholder
-        content_lines.append("    Functions: {")
-        content_lines.append("      [key: string]: never")
-        content_lines.append("    }")
+def types_fingerprint(content: str) -> str:
+    """Stable fingerprint of generated types: a hash of the body, which is
+    fully determined by the introspected catalog (no timestamps)"""
+    return hashlib.sha256(types_body(content).encode("utf-8")).hexdigest()
 
-        # Enums
-        content_lines.append("    Enums: {")
-        schema_enums = enums_by_schema.get(schema, {})
-        if schema_enums:
-            for enum_name, labels in schema_enums.items():
-                if labels:
-                    union = " | ".join(repr(label) for label in labels)
-                else:
-                    union = 'string'
-                content_lines.append(f"      {enum_name!r}: {union}")
-        else:
-            content_lines.append("      [key: string]: never")
-        content_lines.append("    }")
 
-        content_lines.append("    CompositeTypes: {")
-        content_lines.append("      [key: string]: never")
-        content_lines.append("    }")
+def read_fingerprint(path: Path) -> Optional[str]:
+    """Fingerprint of an existing types file, or None if there is none.
 
-        content_lines.append("  }")
-    content_lines.append("}")
+    Recomputed from the body rather than trusted from the header, so files
+    from before fingerprinting or edited by hand compare correctly.
+    """
+    if not path.exists():
+        return None
+    return types_fingerprint(path.read_text(encoding="utf-8"))
 
-    content_lines.append(
-        textwrap.dedent(
-            """
-export type Tables<
-  Schema extends keyof Database = keyof Database,
-  TableName extends keyof Database[Schema]['Tables'] = keyof Database[Schema]['Tables']
-> = Database[Schema]['Tables'][TableName]['Row']
 
-export type TablesInsert<
-  Schema extends keyof Database = keyof Database,
-  TableName extends keyof Database[Schema]['Tables'] = keyof Database[Schema]['Tables']
-> = Database[Schema]['Tables'][TableName]['Insert']
+def write_types(lines: Iterable[str], destination: Path) -> Tuple[str, bool]:
+    """Stream types into a file with a header recording their fingerprint.
 
-export type TablesUpdate<
-  Schema extends keyof Database = keyof Database,
-  TableName extends keyof Database[Schema]['Tables'] = keyof Database[Schema]['Tables']
-> = Database[Schema]['Tables'][TableName]['Update']
+    Lines are written and hashed as they are produced, then the fingerprint
+    is filled into the header. Returns the fingerprint and whether the file
+    was written: when the destination already holds the same types it is
+    left (with its mtime) untouched.
+    """
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = destination.with_name(destination.name + ".tmp")
+    digest = hashlib.sha256()
+
+    with open(temp_path, "w", encoding="utf-8", newline="\n") as handle:
+        handle.write(
+            "/**\n"
+            " * Supabase Database Types\n"
+            f" * Generated on {datetime.utcnow().strftime('%Y-%m-%d %H:%M:%SZ')}\n"
+            " * Schema fingerprint: sha256:"
+        )
+        fingerprint_offset = handle.tell()
+        handle.write("0" * digest.digest_size * 2 + "\n * DO NOT EDIT THIS FILE MANUALLY.\n */\n\n")
+
+        # Trailing newlines are held back until more text follows, so the
+        # hash covers exactly types_body() of the finished file
+        pending = ""
+        for line in lines:
+            text = line + "\n"
+            stripped = text.rstrip("\n")
+            if stripped:
+                chunk = pending + stripped
+                handle.write(chunk)
+                digest.update(chunk.encode("utf-8"))
+                pending = text[len(stripped):]
+            else:
+                pending += text
+        handle.write("\n")
+
+        fingerprint = digest.hexdigest()
+        handle.seek(fingerprint_offset)
+        handle.write(fingerprint)
+
+    if read_fingerprint(destination) == fingerprint:
+        temp_path.unlink()
+        return fingerprint, False
+    os.replace(temp_path, destination)
+    return fingerprint, True
+
+
+class TypeGenerator:
+    """Generates types repeatedly over a pool of open database connections.
+
+    For watch loops and scripts that regenerate often, or for many outputs
+    and schema subsets: connection setup (TLS included) happens once, and
+    the catalog query is prepared once per connection instead of being
+    parsed and planned on every run.
+
+        with TypeGenerator(db_url) as generator:
+            generator.write(["public"], Path("public.types.ts"))
+            generator.write(["public", "organization"], OUTPUT_FILE, shard=True)
+
+    Prepared statements need a session: pass prepare=False for a
+    transaction-mode pooler (Supavisor / PgBouncer) URL.
+    """
+
+    # libpq TCP keepalives, so idle pooled connections are not silently
+    # dropped by NATs and load balancers between runs
+    CONNECTION_KWARGS: Dict[str, object] = {
+        "autocommit": True,
+        "keepalives": 1,
+        "keepalives_idle": 30,
+        "keepalives_interval": 10,
+        "keepalives_count": 3,
+    }
+
+    def __init__(self, db_url: str, *, max_size: int = 2, prepare: bool = True):
+        try:
+            from psycopg_pool import ConnectionPool
+        except ImportError as exc:
+            raise GenerationError(
+                "psycopg_pool is required for TypeGenerator. Install it with 'pip install psycopg[binary,pool]'."
+            ) from exc
+
+        self.prepare = prepare
+        self.pool = ConnectionPool(
+            db_url,
+            min_size=1,
+            max_size=max_size,
+            kwargs=dict(self.CONNECTION_KWARGS),
+            # Connections dropped while idle are replaced, not handed out
+            check=ConnectionPool.check_connection,
+            open=False,
+        )
 
-export type Views<
-  Schema extends keyof Database = keyof Database,
-  ViewName extends keyof Database[Schema]['Views'] = keyof Database[Schema]['Views']
-> = Database[Schema]['Views'][ViewName]['Row']
+    def open(self) -> None:
+        self.pool.open(wait=True)
 
-export type Enums<
-  Schema extends keyof Database = keyof Database,
-  EnumName extends keyof Database[Schema]['Enums'] = keyof Database[Schema]['Enums']
-> = Database[Schema]['Enums'][EnumName]
+    def close(self) -> None:
+        self.pool.close()
 
-export type CompositeTypes<
-  Schema extends keyof Database = keyof Database,
-  TypeName extends keyof Database[Schema]['CompositeTypes'] = keyof Database[Schema]['CompositeTypes']
-> = Database[Schema]['CompositeTypes'][TypeName]
-"""
-        ).strip()
-    )
+    def __enter__(self) -> "TypeGenerator":
+        self.open()
+        return self
 
-    raw_content = "\n".join(content_lines) + "\n"
-    return format_with_prettier(raw_content)
-def write_types(content: str, destination: Path) -> None:
-    destination.parent.mkdir(parents=True, exist_ok=True)
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def fetch_catalog(self, schemas: Iterable[str]) -> Dict[str, List[Dict[str, object]]]:
+        """Introspect schemas over a pooled connection"""
+        import psycopg
+        from psycopg.rows import dict_row
+
+        try:
+            with self.pool.connection() as conn:
+                with conn.cursor(row_factory=dict_row) as cur:
+                    cur.execute(CATALOG_QUERY, {"schemas": sorted(set(schemas))}, prepare=self.prepare)
+                    return cur.fetchone()["catalog"]
+        except psycopg.Error as exc:
+            raise GenerationError(f"Failed to inspect database schema: {exc}") from exc
+
+    def renderer(self, schemas: Iterable[str]) -> TypesRenderer:
+        schemas = sorted(set(schemas))
+        return TypesRenderer(self.fetch_catalog(schemas), schemas)
+
+    def generate(self, schemas: Iterable[str]) -> str:
+        """The types for schemas, as generate_types_with_psycopg returns them"""
+        return "\n".join(self.renderer(schemas).lines()) + "\n"
+
+    def write(
+        self,
+        schemas: Iterable[str],
+        output: Path,
+        shard: bool = False,
+        index_manifest: Optional[Path] = None,
+    ) -> List[Path]:
+        """Stream the types for schemas to an output path (and its shards),
+        and optionally the index manifest of the same catalog.
+
+        Returns the files that changed; unchanged ones are not rewritten.
+        """
+        schemas = sorted(set(schemas))
+        catalog = self.fetch_catalog(schemas)
+        files = TypesRenderer(catalog, schemas).outputs(output, shard=shard)
+        changed = [path for path, lines in files if write_types(lines, path)[1]]
+        if index_manifest is not None and write_index_manifest(catalog, index_manifest):
+            changed.append(index_manifest)
+        return changed
+
+
+def schema_diff(old_path: Path, new_content: str) -> List[str]:
+    """Describe the tables, views, columns, enums and functions that differ
+    between a types file (sharded or not) and new types"""
+    scanner = load_schema_scanner()
+    old = scanner.DatabaseSchemaParser(str(old_path))
+    old.parse()
+    new = scanner.DatabaseSchemaParser("")
+    new.parse_content(new_content)
+
+    lines: List[str] = []
+
+    for kind, old_relations, new_relations in (
+        ("table", old.tables, new.tables),
+        ("view", old.views, new.views),
+    ):
+        for schema in sorted(set(old_relations) | set(new_relations)):
+            before = old_relations.get(schema, {})
+            after = new_relations.get(schema, {})
+            for name in sorted(set(before) | set(after)):
+                if name not in before:
+                    lines.append(f"  + {kind} {schema}.{name} ({len(after[name].columns)} columns)")
+                    continue
+                if name not in after:
+                    lines.append(f"  - {kind} {schema}.{name}")
+                    continue
+                old_columns = before[name].columns
+                new_columns = after[name].columns
+                if old_columns == new_columns:
+                    continue
+                lines.append(f"  ~ {kind} {schema}.{name}")
+                for column in sorted(set(old_columns) | set(new_columns)):
+                    if column not in old_columns:
+                        lines.append(f"      + {column}: {new_columns[column]}")
+                    elif column not in new_columns:
+                        lines.append(f"      - {column}: {old_columns[column]}")
+                    elif old_columns[column] != new_columns[column]:
+                        lines.append(f"      ~ {column}: {old_columns[column]} -> {new_columns[column]}")
+
+    for schema in sorted(set(old.enums) | set(new.enums)):
+        before = old.enums.get(schema, {})
+        after = new.enums.get(schema, {})
+        for name in sorted(set(before) | set(after)):
+            if before.get(name) == after.get(name):
+                continue
+            if name not in before:
+                lines.append(f"  + enum {schema}.{name}: {' | '.join(after[name])}")
+            elif name not in after:
+                lines.append(f"  - enum {schema}.{name}")
+            else:
+                added = [label for label in after[name] if label not in before[name]]
+                removed = [label for label in before[name] if label not in after[name]]
+                changes = [f"+{label}" for label in added] + [f"-{label}" for label in removed]
+                lines.append(f"  ~ enum {schema}.{name}: {' '.join(changes) or 'reordered'}")
+
+    for schema in sorted(set(old.functions) | set(new.functions)):
+        before = old.functions.get(schema, {})
+        after = new.functions.get(schema, {})
+        for name in sorted(set(before) | set(after)):
+            if name not in before:
+                lines.append(f"  + function {schema}.{name}({', '.join(after[name].args)})")
+            elif name not in after:
+                lines.append(f"  - function {schema}.{name}")
+            elif before[name].args != after[name].args:
+                lines.append(
+                    f"  ~ function {schema}.{name}({', '.join(before[name].args)})"
+                    f" -> ({', '.join(after[name].args)})"
+                )
+
+    return lines
+
+
+def load_schema_scanner():
+    spec = importlib.util.spec_from_file_location("database_schema_scanner", SCANNER_SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
 
-    header = (
-        "/**\n"
-        " * Supabase Database Types\n"
-        " * Generated on {timestamp}\n"
-        " * DO NOT EDIT THIS FILE MANUALLY.\n"
-        " */\n\n"
-    ).format(timestamp=datetime.utcnow().strftime("%Y-%m-%d %H:%M:%SZ"))
 
-    destination.write_text(header + content + "\n", encoding="utf-8")
+def write_schema_snapshot(types_path: Path) -> None:
+    """Store the schema scanner's parsed model for the types just written.
+
+    The snapshot is keyed by the types file hash, so the next scanner run
+    loads it instead of parsing the TypeScript again.
+    """
+    scanner = load_schema_scanner()
+    parser = scanner.DatabaseSchemaParser(str(types_path))
+    parser.parse(snapshot_path=str(SCHEMA_SNAPSHOT_FILE))
+
+
+# Ways main() can generate the types, in the order --strategy serial tries them
+STRATEGIES: Sequence[str] = ("remote", "direct", "psycopg")
+# Seconds each strategy may run in --strategy race; the CLI can otherwise sit
+# out a network timeout long after another strategy has finished
+DEFAULT_STRATEGY_TIMEOUTS: Dict[str, float] = {"remote": 60.0, "direct": 60.0, "psycopg": 30.0}
+
+
+def strategy_timeout(value: str) -> Tuple[str, float]:
+    """Parse a --timeout STRATEGY=SECONDS argument"""
+    name, separator, seconds = value.partition("=")
+    if not separator or name not in STRATEGIES:
+        raise argparse.ArgumentTypeError(
+            f"expected STRATEGY=SECONDS with STRATEGY one of {', '.join(STRATEGIES)}"
+        )
+    try:
+        timeout = float(seconds)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid number of seconds: {seconds!r}") from None
+    if timeout <= 0:
+        raise argparse.ArgumentTypeError(f"timeout must be positive: {seconds!r}")
+    return name, timeout
+
+
+async def race_strategies(
+    attempts: Dict[str, Callable[[], Awaitable[object]]],
+    timeouts: Dict[str, float],
+) -> Tuple[Optional[Tuple[str, object]], List[Tuple[str, str, float, str]]]:
+    """Run strategies concurrently and keep the first successful result.
+
+    The remaining strategies are cancelled (killing CLI subprocesses) as
+    soon as one succeeds. Returns the winning (strategy, result), or None
+    if every strategy failed, and a (strategy, outcome, seconds, detail)
+    row per strategy.
+    """
+    start = time.perf_counter()
+    tasks = {
+        asyncio.ensure_future(asyncio.wait_for(factory(), timeouts[name])): name
+        for name, factory in attempts.items()
+    }
+    outcomes: Dict[str, Tuple[str, float, str]] = {}
+    winner: Optional[Tuple[str, object]] = None
+
+    pending = set(tasks)
+    while pending and winner is None:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        elapsed = time.perf_counter() - start
+        # Ties go to the strategy serial mode would have preferred
+        for task in sorted(done, key=lambda task: STRATEGIES.index(tasks[task])):
+            name = tasks[task]
+            try:
+                result = task.result()
+            except asyncio.TimeoutError:
+                outcomes[name] = ("timed out", elapsed, f"limit {timeouts[name]:g}s")
+            except Exception as exc:  # any failure just loses the race
+                outcomes[name] = ("failed", elapsed, str(exc) or type(exc).__name__)
+            else:
+                if winner is None:
+                    winner = (name, result)
+                    outcomes[name] = ("won", elapsed, "")
+                else:
+                    outcomes[name] = ("finished", elapsed, "")
+
+    for task in pending:
+        task.cancel()
+    await asyncio.gather(*pending, return_exceptions=True)
+    elapsed = time.perf_counter() - start
+    for task in pending:
+        outcomes[tasks[task]] = ("cancelled", elapsed, "")
+
+    return winner, [(name, *outcomes[name]) for name in attempts]
+
+
+def print_strategy_timings(rows: List[Tuple[str, str, float, str]]) -> None:
+    print(f"  {'Strategy':<10} {'Result':<10} {'Time':>8}")
+    for name, outcome, seconds, detail in rows:
+        line = f"  {name:<10} {outcome:<10} {seconds:7.2f}s"
+        if detail:
+            # CLI errors can span many lines; the first says what went wrong
+            summary = detail.strip().splitlines()[0]
+            line += f"  {summary[:100]}"
+        print(line)
+
+
+def display_path(path: Path) -> Path:
+    return path.relative_to(PROJECT_ROOT) if path.is_relative_to(PROJECT_ROOT) else path
 
 
 def main() -> int:
     args = parse_args()
     try:
-        env = load_env_file(ENV_FILE)
-        ensure_required_env(env)
-
-        config_schemas = [] if args.schema_only else read_schemas(CONFIG_FILE)
-        schemas = merge_schemas(["public"], config_schemas, args.schemas)
-        cli_command = resolve_cli_command()
+        # Rendering a snapshot needs neither credentials nor a connection
+        env: Dict[str, str] = {}
+        # The introspected catalog, when a mode other than the CLI provides one
+        catalog: Optional[Dict[str, List[Dict[str, object]]]] = None
+        if args.snapshot_in:
+            schemas, catalog = read_catalog_snapshot(args.snapshot_in)
+        else:
+            env = load_env_file(ENV_FILE)
+            ensure_required_env(env)
+
+            config_schemas = [] if args.schema_only else read_schemas(CONFIG_FILE)
+            schemas = merge_schemas(["public"], config_schemas, args.schemas)
+        fallback_url = (
+            args.db_url
+            or env.get("TYPEGEN_DB_URL")
+            or env.get("DIRECT_DATABASE_URL")
+            or env.get("DATABASE_URL")
+        )
 
         print("Generating Supabase types...")
-        print(f"  Project ref: {env['SUPABASE_PROJECT_REF']}")
+        if env:
+            print(f"  Project ref: {env['SUPABASE_PROJECT_REF']}")
         print(f"  Schemas: {', '.join(schemas)}")
 
-        print("  Mode: remote project")
-        try:
-            content = run_supabase_gen(
-                cli_command,
-                schemas,
-                project_ref=env["SUPABASE_PROJECT_REF"],
-            )
-        except GenerationError as exc:
-            fallback_url = (
-                args.db_url
-                or env.get("TYPEGEN_DB_URL")
-                or env.get("DIRECT_DATABASE_URL")
-                or env.get("DATABASE_URL")
-            )
-            if fallback_url:
-                print(
-                    "  Remote project generation failed. "
-                    "Falling back to direct connection." 
+        # Either the CLI's output, or a renderer streaming the psycopg fallback's
+        content: Optional[str] = None
+        renderer: Optional[TypesRenderer] = None
+
+        if args.snapshot_in:
+            print(f"  Mode: catalog snapshot ({display_path(args.snapshot_in)})")
+            renderer = TypesRenderer(catalog, schemas)
+        elif args.shard or args.snapshot_out:
+            # Only the psycopg fallback introspects a catalog (and can lay
+            # out per-schema files)
+            if not fallback_url:
+                raise GenerationError(
+                    f"{'--snapshot-out' if args.snapshot_out else '--shard'} needs a database connection "
+                    "string (--db-url or TYPEGEN_DB_URL in .env.local)"
+                )
+            print("  Mode: direct connection")
+            catalog = fetch_catalog(fallback_url, sorted(set(schemas)))
+            if args.snapshot_out:
+                write_catalog_snapshot(catalog, schemas, args.snapshot_out)
+                print(f"Catalog snapshot written to {display_path(args.snapshot_out)}")
+                return 0
+            renderer = TypesRenderer(catalog, schemas)
+        elif args.strategy == "race":
+            attempts: Dict[str, Callable[[], Awaitable[object]]] = {}
+            try:
+                cli_command = resolve_cli_command()
+            except GenerationError as exc:
+                print(f"  Skipping Supabase CLI strategies: {exc}")
+            else:
+                attempts["remote"] = lambda: run_supabase_gen_async(
+                    cli_command, schemas, project_ref=env["SUPABASE_PROJECT_REF"]
                 )
-                print("  Mode: direct connection")
-                try:
-                    content = run_supabase_gen(
-                        cli_command,
-                        schemas,
-                        db_url=fallback_url,
+                if fallback_url:
+                    attempts["direct"] = lambda: run_supabase_gen_async(
+                        cli_command, schemas, db_url=fallback_url
                     )
-                except GenerationError as direct_exc:
+            if fallback_url:
+                attempts["psycopg"] = lambda: fetch_catalog_async(fallback_url, sorted(set(schemas)))
+            if not attempts:
+                raise GenerationError("No generation strategy available")
+
+            print(f"  Mode: racing {', '.join(attempts)}")
+            timeouts = {**DEFAULT_STRATEGY_TIMEOUTS, **dict(args.timeouts)}
+            winner, timings = asyncio.run(race_strategies(attempts, timeouts))
+            print_strategy_timings(timings)
+            if winner is None:
+                raise GenerationError("Every generation strategy failed")
+
+            strategy, result = winner
+            if strategy == "psycopg":
+                catalog = result
+                renderer = TypesRenderer(catalog, schemas)
+            else:
+                content = result
+        else:
+            cli_command = resolve_cli_command()
+            print("  Mode: remote project")
+            try:
+                content = run_supabase_gen(
+                    cli_command,
+                    schemas,
+                    project_ref=env["SUPABASE_PROJECT_REF"],
+                )
+            except GenerationError as exc:
+                if fallback_url:
                     print(
-                        "  Direct CLI generation failed. Using psycopg fallback."
+                        "  Remote project generation failed. "
+                        "Falling back to direct connection." 
                     )
-                    content = generate_types_with_psycopg(fallback_url, list(schemas))
-            else:
-                raise
-
-        write_types(content, args.output)
+                    print("  Mode: direct connection")
+                    try:
+                        content = run_supabase_gen(
+                            cli_command,
+                            schemas,
+                            db_url=fallback_url,
+                        )
+                    except GenerationError as direct_exc:
+                        print(
+                            "  Direct CLI generation failed. Using psycopg fallback."
+                        )
+                        catalog = fetch_catalog(fallback_url, sorted(set(schemas)))
+                        renderer = TypesRenderer(catalog, schemas)
+                else:
+                    raise
 
-        try:
-            relative_output = (
-                args.output.relative_to(PROJECT_ROOT)
-                if args.output.is_relative_to(PROJECT_ROOT)
-                else args.output
-            )
-            print(f"Types written to {relative_output}")
-        except ValueError:
-            print("Types written to", args.output)
+        if renderer is not None:
+            outputs = renderer.outputs(args.output, shard=args.shard)
+        else:
+            outputs = [(args.output, content.splitlines())]
+
+        if args.verify_format or args.diff:
+            # Both need the full text of the types as one file
+            if content is None:
+                content = "\n".join(renderer.lines()) + "\n"
+
+        if args.verify_format:
+            diff = verify_formatting(content)
+            if diff:
+                print("\n".join(diff[:200]))
+                raise GenerationError("Generated types differ from Prettier's formatting")
+            print("  Formatting matches Prettier")
+
+        if args.diff:
+            if all(
+                read_fingerprint(path) == types_fingerprint("\n".join(lines))
+                for path, lines in outputs
+            ):
+                print("No changes: types are up to date")
+                return 0
+            changes = schema_diff(args.output, content) if args.output.exists() else []
+            print(f"Changes against {args.output}:")
+            print("\n".join(changes) if changes else "  No table, column, enum or function signature changes")
+            return 0
+
+        # Each file is streamed to disk as it is rendered
+        results = [(path, *write_types(lines, path)) for path, lines in outputs]
+        written = [path for path, _, changed in results if changed]
+
+        # Only a directly introspected catalog carries indexes; the CLI's
+        # output leaves the last manifest in place
+        if catalog is not None and write_index_manifest(catalog, args.index_manifest):
+            print(f"Index manifest written to {display_path(args.index_manifest)}")
+
+        if not written:
+            print(f"Types unchanged (fingerprint {results[-1][1][:12]}); not rewritten")
+            return 0
+
+        if args.output.resolve() == OUTPUT_FILE:
+            try:
+                write_schema_snapshot(args.output)
+            except Exception as exc:  # the snapshot is only a cache
+                print(f"  Warning: could not write schema scanner snapshot: {exc}")
+
+        for path in written:
+            print(f"Types written to {display_path(path)}")
         return 0
     except GenerationError as exc:
         print(f"Error: {exc}")
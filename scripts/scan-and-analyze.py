@@ -3,21 +3,31 @@
 Comprehensive Database Schema Scanner & Analyzer
 
 Runs both scanner and analyzer in sequence to provide complete database
-schema validation and recommendations.
+schema validation and recommendations. Both run in this process: the
+scanner's in-memory report is handed straight to the analyzer, so nothing
+is serialized and parsed back between the steps.
 
 Usage:
-    python3 scripts/scan-and-analyze.py
+    python3 scripts/scan-and-analyze.py [--jobs N] [--no-cache] [--compact]
 
 Output:
     - docs/schema-scan-report.json (detailed mismatch report)
+    - docs/schema-scan-analysis.json (prioritized recommendations)
     - Console output with analysis and recommendations
+
+Programmatic use:
+    report, analysis = run_pipeline(project_root)
 """
 
-import subprocess
+import argparse
+import importlib.util
+import os
+import platform
 import sys
-import json
 from pathlib import Path
-from datetime import datetime
+from typing import Any, Dict, Tuple
+
+SCRIPT_DIR = Path(__file__).resolve().parent
 
 
 class Colors:
@@ -29,48 +39,93 @@ class Colors:
     NC = '\033[0m'  # No Color
 
 
-def main():
-    """Run scanner and analyzer"""
-    script_dir = Path(__file__).resolve().parent
-    project_root = script_dir.parent
+def load_script(module_name: str, filename: str):
+    """Import a sibling script (hyphenated, so not importable by name)"""
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    spec = importlib.util.spec_from_file_location(module_name, SCRIPT_DIR / filename)
+    module = importlib.util.module_from_spec(spec)
+    # Registered so process pool workers can unpickle its functions
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
 
-    print(f"{Colors.BLUE}🔍 ENORAE Database Schema Scanner & Analyzer{Colors.NC}")
-    print("=" * 50)
-    print()
 
-    print(f"{Colors.BLUE}📍 Project root: {project_root}{Colors.NC}")
-    print(f"{Colors.BLUE}Python version:{Colors.NC}")
-    result = subprocess.run([sys.executable, "--version"], capture_output=True, text=True)
-    print(result.stdout)
+def run_pipeline(
+    root: Path,
+    jobs: int = 1,
+    use_cache: bool = True,
+    compact: bool = False
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Scan the project and analyze the results in-process.
+
+    Returns the scan report and the analysis. Both are also written to
+    docs/, each serialized exactly once.
+    """
+    scanner = load_script('database_schema_scanner', 'database-schema-scanner.py')
+    analyzer = load_script('analyze_schema_scan', 'analyze-schema-scan.py')
+
+    report_path = root / 'docs' / 'schema-scan-report.json'
+    analysis_path = root / 'docs' / 'schema-scan-analysis.json'
 
     # Step 1: Run Scanner
     print(f"{Colors.BLUE}Step 1: Running Database Schema Scanner...{Colors.NC}")
     print("─" * 50)
 
-    scanner_script = script_dir / "database-schema-scanner.py"
-    result = subprocess.run([sys.executable, str(scanner_script)], cwd=project_root)
-
-    if result.returncode != 0:
-        print(f"{Colors.RED}❌ Scanner failed{Colors.NC}")
-        return 1
+    db_parser, matches, mismatches = scanner.run_scan(str(root), jobs=jobs, use_cache=use_cache)
+    report = scanner.ScannerReporter.generate_json_report(
+        db_parser, matches, mismatches, str(report_path), compact=compact
+    )
+    scanner.ScannerReporter.print_summary(mismatches)
 
     print(f"{Colors.GREEN}✅ Scanner completed successfully{Colors.NC}")
     print()
 
-    # Step 2: Run Analyzer
+    # Step 2: Run Analyzer on the in-memory report
     print(f"{Colors.BLUE}Step 2: Running Analysis & Recommendations...{Colors.NC}")
     print("─" * 50)
 
-    analyzer_script = script_dir / "analyze-schema-scan.py"
-    result = subprocess.run([sys.executable, str(analyzer_script)], cwd=project_root)
-
-    if result.returncode != 0:
-        print(f"{Colors.RED}❌ Analysis failed{Colors.NC}")
-        return 1
+    scan_analyzer = analyzer.ScanAnalyzer(report=report)
+    scan_analyzer.print_analysis()
+    analysis = scan_analyzer.generate_analysis_report(str(analysis_path))
 
     print(f"{Colors.GREEN}✅ Analysis completed successfully{Colors.NC}")
     print()
 
+    return report, analysis
+
+
+def main():
+    """Run scanner and analyzer"""
+    parser = argparse.ArgumentParser(description="Scan the project for schema mismatches and analyze them")
+    parser.add_argument('--jobs', '-j', type=int, default=1,
+                        help="Number of worker processes for scanning files (0 = one per CPU core)")
+    parser.add_argument('--no-cache', dest='use_cache', action='store_false',
+                        help="Rescan every file instead of reusing results for unchanged files")
+    parser.add_argument('--compact', action='store_true',
+                        help="Write the JSON report without indentation or line breaks")
+    args = parser.parse_args()
+
+    project_root = SCRIPT_DIR.parent
+
+    print(f"{Colors.BLUE}🔍 ENORAE Database Schema Scanner & Analyzer{Colors.NC}")
+    print("=" * 50)
+    print()
+
+    print(f"{Colors.BLUE}📍 Project root: {project_root}{Colors.NC}")
+    print(f"{Colors.BLUE}Python version:{Colors.NC}")
+    print(f"Python {platform.python_version()}")
+    print()
+
+    try:
+        report, analysis = run_pipeline(
+            project_root, jobs=args.jobs or os.cpu_count() or 1, use_cache=args.use_cache,
+            compact=args.compact
+        )
+    except Exception as e:
+        print(f"{Colors.RED}❌ Schema scan failed: {e}{Colors.NC}")
+        return 1
+
     # Summary
     print("=" * 50)
     print(f"{Colors.GREEN}✅ Complete Database Schema Scan Finished{Colors.NC}")
@@ -78,27 +133,19 @@ def main():
     print()
 
     print(f"{Colors.BLUE}📊 Generated Reports:{Colors.NC}")
-    report_path = project_root / "docs" / "schema-scan-report.json"
-    print(f"   • {report_path}")
+    print(f"   • {project_root / 'docs' / 'schema-scan-report.json'}")
+    print(f"   • {project_root / 'docs' / 'schema-scan-analysis.json'}")
     print()
 
     # Show quick stats
-    if report_path.exists():
-        print(f"{Colors.BLUE}📈 Quick Stats:{Colors.NC}")
-        try:
-            with open(report_path, 'r') as f:
-                report = json.load(f)
-
-            summary = report.get('mismatch_summary', {})
-            print(f"   Total Mismatches: {summary.get('total_mismatches', 0)}")
-            print(f"   Critical: {summary.get('critical', 0)}")
-            print(f"   High: {summary.get('high', 0)}")
-            print(f"   Medium: {summary.get('medium', 0)}")
-            print(f"   Low: {summary.get('low', 0)}")
-        except Exception as e:
-            print(f"   Error reading report: {e}")
-
-        print()
+    print(f"{Colors.BLUE}📈 Quick Stats:{Colors.NC}")
+    summary = report.get('mismatch_summary', {})
+    print(f"   Total Mismatches: {summary.get('total_mismatches', 0)}")
+    print(f"   Critical: {summary.get('critical', 0)}")
+    print(f"   High: {summary.get('high', 0)}")
+    print(f"   Medium: {summary.get('medium', 0)}")
+    print(f"   Low: {summary.get('low', 0)}")
+    print()
 
     print(f"{Colors.BLUE}→ Next Steps:{Colors.NC}")
     print("   1. Review the critical mismatches above")